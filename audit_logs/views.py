@@ -13,6 +13,8 @@ from django.db.models import Q
 from audit_logs.models import AuditLog
 from audit_logs.serializers import AuditLogSerializer
 from user_auth.authentication import CookieTokenAuthentication
+from user_auth.operation_catalog import has_operation, has_any_operation
+from user_auth.scopes import scope_values
 
 logger = logging.getLogger(__name__)
 auth_backend = CookieTokenAuthentication()
@@ -46,8 +48,7 @@ class AuditLogListView(View):
             return _err("Authentication required.", 401)
         user, _ = result
 
-        perms = request.auth_context.get('permissions', [])
-        if not any(p in perms for p in ['platform:audit:read', 'org:audit:read']):
+        if not has_any_operation(request.auth_context, 'platform:audit:read', 'org:audit:read'):
             return _err("Permission denied. Requires audit:read.", 403)
 
         page = int(request.GET.get('page', 1))
@@ -88,9 +89,8 @@ class AuditLogListView(View):
             qs = qs.filter(created_at__date__lte=to_date)
 
         # Org-level users can only see logs for their org/tenants
-        if 'platform:audit:read' not in perms:
-            scope = request.auth_context.get('scope', {})
-            allowed_tenants = scope.get('tenant_ids')
+        if not has_operation(request.auth_context, 'platform:audit:read'):
+            allowed_tenants = scope_values(request.auth_context, 'tenant_ids')
             if allowed_tenants:
                 qs = qs.filter(tenant_id__in=allowed_tenants)
 
@@ -113,8 +113,7 @@ class AuditLogDetailView(View):
         if not result:
             return _err("Authentication required.", 401)
 
-        perms = request.auth_context.get('permissions', [])
-        if not any(p in perms for p in ['platform:audit:read', 'org:audit:read']):
+        if not has_any_operation(request.auth_context, 'platform:audit:read', 'org:audit:read'):
             return _err("Permission denied.", 403)
 
         try:
@@ -133,8 +132,7 @@ class AuditLogExportView(View):
         if not result:
             return _err("Authentication required.", 401)
 
-        perms = request.auth_context.get('permissions', [])
-        if 'platform:audit:read' not in perms:
+        if not has_operation(request.auth_context, 'platform:audit:read'):
             return _err("Permission denied. Requires platform:audit:read.", 403)
 
         limit = min(int(request.GET.get('limit', 5000)), 10000)
@@ -179,8 +177,7 @@ class AuditActionTypesView(View):
         if not result:
             return _err("Authentication required.", 401)
 
-        perms = request.auth_context.get('permissions', [])
-        if not any(p in perms for p in ['platform:audit:read', 'org:audit:read']):
+        if not has_any_operation(request.auth_context, 'platform:audit:read', 'org:audit:read'):
             return _err("Permission denied.", 403)
 
         actions = (
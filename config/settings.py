@@ -15,6 +15,36 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 ACCESS_TOKEN_LIFETIME_MINUTES = int(os.getenv("ACCESS_TOKEN_LIFETIME_MINUTES", 60))
 REFRESH_TOKEN_LIFETIME_DAYS = int(os.getenv("REFRESH_TOKEN_LIFETIME_DAYS", 7))
+# HMAC key for stored session/refresh/invitation token digests (defaults to SECRET_KEY)
+TOKEN_DIGEST_KEY = os.getenv("TOKEN_DIGEST_KEY") or None
+# Newest pre-digest (PBKDF2) refresh tokens still checked on refresh/logout;
+# 0 once `manage.py backfill_session_tokens` reports none left
+LEGACY_REFRESH_TOKEN_SCAN_LIMIT = int(os.getenv("LEGACY_REFRESH_TOKEN_SCAN_LIMIT", 20))
+# In-process cache of verified sessions (revoked exactly via epochs in CACHES;
+# off unless CACHE_BACKEND is shared between processes)
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 30))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", 10000))
+# Access token format: "opaque" (session lookup) or "jwt" (short-lived signed
+# token verified in memory; user_sessions is only read on login/refresh).
+# Revoked tokens are listed in the revoked_access_tokens table.
+AUTH_TOKEN_MODE = os.getenv("AUTH_TOKEN_MODE", "opaque")
+JWT_SIGNING_KEY = os.getenv("JWT_SIGNING_KEY") or None
+JWT_ACCESS_TOKEN_LIFETIME_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_LIFETIME_MINUTES", 5))
+JWT_REVOCATION_SYNC_SECONDS = int(os.getenv("JWT_REVOCATION_SYNC_SECONDS", 2))
+# Expired/revoked user_sessions rows are deleted in small batches by a
+# background thread in each worker (at most one per interval across workers,
+# 0 disables it) or by `manage.py reap_sessions`
+SESSION_REAPER_INTERVAL_SECONDS = int(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", 300))
+SESSION_REAPER_GRACE_MINUTES = int(os.getenv("SESSION_REAPER_GRACE_MINUTES", 60))
+SESSION_REAPER_BATCH_SIZE = int(os.getenv("SESSION_REAPER_BATCH_SIZE", 500))
+SESSION_REAPER_MAX_BATCHES = int(os.getenv("SESSION_REAPER_MAX_BATCHES", 200))
+SESSION_REAPER_PAUSE_MS = int(os.getenv("SESSION_REAPER_PAUSE_MS", 50))
+# Per-session last-seen/IP/request counts, buffered per worker and written in
+# batches; sessions idle longer than SESSION_IDLE_TIMEOUT_MINUTES are
+# rejected (0 = no idle timeout)
+SESSION_ACTIVITY_FLUSH_SECONDS = int(os.getenv("SESSION_ACTIVITY_FLUSH_SECONDS", 15))
+SESSION_ACTIVITY_MAX_PENDING = int(os.getenv("SESSION_ACTIVITY_MAX_PENDING", 50000))
+SESSION_IDLE_TIMEOUT_MINUTES = int(os.getenv("SESSION_IDLE_TIMEOUT_MINUTES", 0))
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
@@ -109,6 +139,99 @@ TEMPLATES = [
 MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 MEDIA_URL = os.getenv("MEDIA_URL", "/media/")
 
+# Disk cache for finished compliance PDF/Excel documents (LRU by total bytes)
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(MEDIA_ROOT, "report_cache"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# JSON exports take arbitrary query params; they expire instead of living until evicted
+REPORT_EXPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_EXPORT_CACHE_TTL_SECONDS", 3600))
+# Background pre-rendering of exports once a report completes
+REPORT_PRERENDER_WORKERS = int(os.getenv("REPORT_PRERENDER_WORKERS", 2))
+REPORT_PRERENDER_MAX_PENDING = int(os.getenv("REPORT_PRERENDER_MAX_PENDING", 50))
+
+# Gateway cache — job state, result caches. Must be a shared backend (e.g.
+# django.core.cache.backends.redis.RedisCache) when running several workers or
+# replicas; `manage.py check --deploy` fails on a per-process one.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "cspm-gateway"),
+    }
+}
+
+# Gateway cache for engine dashboard/summary GETs
+GATEWAY_CACHE_TTL_SECONDS = int(os.getenv("GATEWAY_CACHE_TTL_SECONDS", 300))
+
+# Per-tenant dashboard snapshots (stale-while-revalidate)
+DASHBOARD_SNAPSHOT_TTL_SECONDS = int(os.getenv("DASHBOARD_SNAPSHOT_TTL_SECONDS", 60))
+DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS", 7 * 24 * 3600))
+
+# Bulk cloud-account onboarding (create -> credentials -> validate per account)
+BULK_ONBOARDING_CONCURRENCY = int(os.getenv("BULK_ONBOARDING_CONCURRENCY", 8))
+BULK_ONBOARDING_MAX_ACCOUNTS = int(os.getenv("BULK_ONBOARDING_MAX_ACCOUNTS", 5000))
+
+# Batch account status lookups
+ACCOUNT_STATUS_BATCH_MAX = int(os.getenv("ACCOUNT_STATUS_BATCH_MAX", 500))
+ACCOUNT_STATUS_BATCH_CONCURRENCY = int(os.getenv("ACCOUNT_STATUS_BATCH_CONCURRENCY", 16))
+ACCOUNT_STATUS_CACHE_TTL_SECONDS = int(os.getenv("ACCOUNT_STATUS_CACHE_TTL_SECONDS", 15))
+
+# Scheduled scans (manage.py run_scan_scheduler)
+SCAN_SCHEDULER_TICK_SECONDS = int(os.getenv("SCAN_SCHEDULER_TICK_SECONDS", 30))
+SCAN_SCHEDULER_MAX_CONCURRENT = int(os.getenv("SCAN_SCHEDULER_MAX_CONCURRENT", 10))
+SCAN_SCHEDULER_SCAN_BATCH = int(os.getenv("SCAN_SCHEDULER_SCAN_BATCH", 500))
+
+# Scan dispatch queue (priority classes + per-tenant weighted fair share).
+# SCAN_SCHEDULER_MAX_CONCURRENT above caps the scheduled class; weights are
+# "tenant_id:weight,..." (default weight 1).
+SCAN_DISPATCH_MAX_IN_FLIGHT = int(os.getenv("SCAN_DISPATCH_MAX_IN_FLIGHT", 20))
+SCAN_DISPATCH_BULK_MAX_IN_FLIGHT = int(os.getenv("SCAN_DISPATCH_BULK_MAX_IN_FLIGHT", 10))
+SCAN_DISPATCH_RUN_TIMEOUT_SECONDS = int(os.getenv(
+    "SCAN_DISPATCH_RUN_TIMEOUT_SECONDS", os.getenv("SCAN_SCHEDULER_RUN_TIMEOUT_SECONDS", 6 * 3600)
+))
+# Web workers poll running scans and pump the queue this often, so slots are
+# freed without run_scan_scheduler (0 disables, e.g. when the scheduler runs)
+SCAN_DISPATCH_POLL_SECONDS = int(os.getenv("SCAN_DISPATCH_POLL_SECONDS", 60))
+# ETA estimate until some scans have completed
+SCAN_DISPATCH_DEFAULT_RUN_SECONDS = int(os.getenv("SCAN_DISPATCH_DEFAULT_RUN_SECONDS", 1800))
+SCAN_DISPATCH_TENANT_WEIGHTS = {
+    tenant_id.strip(): int(weight)
+    for tenant_id, weight in (
+        item.split(":", 1) for item in os.getenv("SCAN_DISPATCH_TENANT_WEIGHTS", "").split(",") if ":" in item
+    )
+}
+
+# Scan trigger duplicate protection (Idempotency-Key replay window / running-scan dedupe)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 3600))
+# A request still in progress after this long is presumed dead; a retry takes over its key
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 300))
+SCAN_INFLIGHT_TTL_SECONDS = int(os.getenv("SCAN_INFLIGHT_TTL_SECONDS", 6 * 3600))
+
+# Cached credential validation results (invalidated when credentials change)
+CREDENTIAL_VALIDATION_TTL_SECONDS = int(os.getenv("CREDENTIAL_VALIDATION_TTL_SECONDS", 900))
+
+# Job state webhooks from the engines (POST /api/internal/events/, HMAC-signed).
+# Pushed non-terminal states are trusted for ENGINE_EVENT_TRUST_SECONDS before
+# ScanStatusView falls back to polling the engine.
+ENGINE_WEBHOOK_SECRET = os.getenv("ENGINE_WEBHOOK_SECRET")
+ENGINE_EVENT_TRUST_SECONDS = int(os.getenv("ENGINE_EVENT_TRUST_SECONDS", 300))
+
+# Threat hunt jobs — rows are chunked into the cache; results are cached per (query, scan run)
+HUNT_WORKERS = int(os.getenv("HUNT_WORKERS", 4))
+HUNT_MAX_PENDING = int(os.getenv("HUNT_MAX_PENDING", 32))
+HUNT_CHUNK_ROWS = int(os.getenv("HUNT_CHUNK_ROWS", 500))
+HUNT_RESULT_TTL_SECONDS = int(os.getenv("HUNT_RESULT_TTL_SECONDS", 24 * 3600))
+
+# Streaming threat-intel feed ingestion
+INTEL_INGEST_MAX_BYTES = int(os.getenv("INTEL_INGEST_MAX_BYTES", 2 * 1024 ** 3))
+INTEL_INGEST_BATCH_SIZE = int(os.getenv("INTEL_INGEST_BATCH_SIZE", 1000))
+INTEL_INGEST_CONCURRENCY = int(os.getenv("INTEL_INGEST_CONCURRENCY", 4))
+# Indicators remembered for dedupe per ingest job (8 bytes each, sorted runs)
+INTEL_INGEST_DEDUPE_MAX = int(os.getenv("INTEL_INGEST_DEDUPE_MAX", 2_000_000))
+
+# Background engine health monitor (one leader per shared cache probes; the rest read its snapshot)
+ENGINE_HEALTH_INTERVAL_SECONDS = int(os.getenv("ENGINE_HEALTH_INTERVAL_SECONDS", 30))
+ENGINE_HEALTH_JITTER_SECONDS = int(os.getenv("ENGINE_HEALTH_JITTER_SECONDS", 5))
+ENGINE_HEALTH_HISTORY = int(os.getenv("ENGINE_HEALTH_HISTORY", 120))
+
 DB_SCHEMA = os.getenv("DB_SCHEMA")
 
 DATABASES = {
@@ -1,5 +1,7 @@
 from django.urls import path, include
 from config.health import health_check
+from onboarding_management.views import EngineEventView
+from user_auth.views.rbac_views import OperationCatalogView
 
 urlpatterns = [
     # ── System ───────────────────────────────────────────────────────────────
@@ -22,6 +24,10 @@ urlpatterns = [
     #   POST /api/engines/compliance/generate/
     path('api/engines/', include('engines.urls')),
 
+    # ── Internal (engine -> gateway, HMAC-signed) ───────────────────────────
+    path('api/internal/events/', EngineEventView.as_view(), name='engine-events'),
+    path('api/internal/operation-catalog/', OperationCatalogView.as_view(), name='operation-catalog'),
+
     # ── Audit Logs ────────────────────────────────────────────────────────────
     path('api/audit-logs/', include('audit_logs.urls')),
 ]
@@ -5,3 +5,7 @@ class EnginesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'engines'
     verbose_name = 'Engine Proxies'
+
+    def ready(self):
+        # Registers the shared-cache check for background jobs
+        from utils import jobs  # noqa: F401
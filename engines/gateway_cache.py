@@ -0,0 +1,122 @@
+"""
+Gateway response cache for engine GET calls.
+
+Entries are keyed by the full engine path (e.g. /inventory/api/v1/...), the
+normalized query params and the scope the response was fetched for, so the
+engine proxy views and onboarding's direct engine_client calls share the same
+entries. Engines filter their replies by the forwarded X-Auth-Context, so a
+proxied response is only ever served to users with the same scope (see
+scope_for); responses fetched by the gateway itself, without a user context,
+live under SERVICE_SCOPE and never serve proxied requests. Each tenant has a
+generation counter that is part of the key; invalidate_tenant() bumps it,
+which orphans every entry for that tenant at once (they then age out by TTL).
+
+Async views use the a-prefixed variants, which go through the cache's async
+API instead of blocking the event loop.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from user_auth.scopes import scope_digest
+
+DEFAULT_TTL = settings.GATEWAY_CACHE_TTL_SECONDS
+
+# Scope of engine calls the gateway makes on its own behalf (dashboard
+# snapshots, post-scan warming)
+SERVICE_SCOPE = 'service'
+
+
+def _normalize(params):
+    normalized = {}
+    for key, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        normalized[key] = sorted(str(v) for v in values)
+    return normalized
+
+
+def scope_for(auth_context):
+    """Cache scope of a user's proxied requests."""
+    return scope_digest((auth_context or {}).get('scope'))
+
+
+def generation(tenant_id):
+    """Current cache generation for a tenant; changes on invalidate_tenant()."""
+    if not tenant_id:
+        return 0
+    return cache.get(f"gwcache:gen:{tenant_id}", 0)
+
+
+async def ageneration(tenant_id):
+    if not tenant_id:
+        return 0
+    return await cache.aget(f"gwcache:gen:{tenant_id}", 0)
+
+
+def _tenant_and_digest(path, params, scope):
+    params = _normalize(params)
+    raw = json.dumps([path, params, scope], sort_keys=True)
+    return (params.get('tenant_id') or [''])[0], hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_key(path: str, params, scope: str) -> str:
+    tenant_id, digest = _tenant_and_digest(path, params, scope)
+    return f"gwcache:{tenant_id}:{generation(tenant_id)}:{digest}"
+
+
+async def acache_key(path: str, params, scope: str) -> str:
+    tenant_id, digest = _tenant_and_digest(path, params, scope)
+    return f"gwcache:{tenant_id}:{await ageneration(tenant_id)}:{digest}"
+
+
+def get(path: str, params, scope: str):
+    """Return the cached entry {status, content_type, body} or None."""
+    return cache.get(cache_key(path, params, scope))
+
+
+def put(path: str, params, scope: str, body: bytes, content_type='application/json', status=200, ttl=None):
+    cache.set(
+        cache_key(path, params, scope),
+        {'status': status, 'content_type': content_type, 'body': body},
+        ttl or DEFAULT_TTL,
+    )
+
+
+def get_json(path: str, params, scope: str):
+    entry = get(path, params, scope)
+    if entry is None:
+        return None
+    return json.loads(entry['body'])
+
+
+def put_json(path: str, params, scope: str, data, ttl=None):
+    put(path, params, scope, json.dumps(data).encode(), ttl=ttl)
+
+
+async def aget_json(path: str, params, scope: str):
+    entry = await cache.aget(await acache_key(path, params, scope))
+    if entry is None:
+        return None
+    return json.loads(entry['body'])
+
+
+async def aput_json(path: str, params, scope: str, data, ttl=None):
+    await cache.aset(
+        await acache_key(path, params, scope),
+        {'status': 200, 'content_type': 'application/json', 'body': json.dumps(data).encode()},
+        ttl or DEFAULT_TTL,
+    )
+
+
+def invalidate_tenant(tenant_id):
+    """Drop every cached engine response for a tenant (e.g. after a scan)."""
+    if not tenant_id:
+        return
+    key = f"gwcache:gen:{tenant_id}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
@@ -0,0 +1,222 @@
+"""
+Gateway-tracked threat hunt jobs.
+
+A hunt submitted to POST /api/engines/hunt/jobs/ runs in the background against
+the threat engine's execute endpoint. Rows are written to the job in fixed-size
+chunks as they arrive (NDJSON engine responses are consumed line by line), so
+clients can page through them with a cursor or stream them as NDJSON while the
+hunt is still running.
+
+Completed results are cached per (query hash, scan_run_id, scope): a scan
+run is immutable, so re-running the same hunt against it is served from the
+cache without touching the engine. The engine filters rows by the forwarded
+X-Auth-Context, so results are only shared between users with the same scope
+(gateway_cache.scope_for).
+"""
+import hashlib
+import json
+import logging
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.jobs import JobStore, BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+EXECUTE_PATH = 'api/v1/hunt/execute'
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+
+# Keys the engine may use for the row list in a plain JSON response
+ROW_KEYS = ('results', 'rows', 'data', 'items')
+
+hunt_jobs = JobStore('hunt', ttl=settings.HUNT_RESULT_TTL_SECONDS)
+_executor = BoundedExecutor(
+    max_workers=settings.HUNT_WORKERS,
+    max_pending=settings.HUNT_MAX_PENDING,
+    name='hunt',
+)
+
+
+def query_hash(query: dict) -> str:
+    """Stable hash of a hunt query, ignoring scan_run_id (keyed separately)."""
+    canonical = {k: v for k, v in query.items() if k != 'scan_run_id'}
+    raw = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _result_key(qhash, scan_run_id, scope):
+    return f"hunt:result:{qhash}:{scan_run_id}:{scope}"
+
+
+def start_hunt(query: dict, headers: dict, user_id, scope):
+    """
+    Create a hunt job. Returns the job dict, or None if the worker pool is full.
+    A cached result for the same query + scan run + scope completes the job
+    immediately.
+    """
+    qhash = query_hash(query)
+    scan_run_id = query.get('scan_run_id')
+
+    if scan_run_id:
+        cached = cache.get(_result_key(qhash, scan_run_id, scope))
+        if cached:
+            return hunt_jobs.create(
+                status='completed',
+                user_id=user_id,
+                query_hash=qhash,
+                scan_run_id=scan_run_id,
+                rows=cached['rows'],
+                chunks=cached['chunks'],
+                chunk_owner=cached['job_id'],
+                meta=cached['meta'],
+                cached=True,
+            )
+
+    job = hunt_jobs.create(
+        user_id=user_id,
+        query_hash=qhash,
+        scan_run_id=scan_run_id,
+        rows=0,
+        chunks=0,
+        chunk_owner=None,
+        meta=None,
+        cached=False,
+    )
+
+    if not _executor.submit(_run_hunt, job['job_id'], query, headers, scope):
+        hunt_jobs.update(job['job_id'], status='failed', error='Hunt queue is full, retry later.')
+        return None
+    return job
+
+
+def read_rows(job, cursor: int, limit: int):
+    """Return (rows, next_cursor) for rows [cursor, cursor+limit) of a job."""
+    size = settings.HUNT_CHUNK_ROWS
+    owner = job['chunk_owner'] or job['job_id']
+    rows = []
+    position = cursor
+    end = min(cursor + limit, job['rows'])
+    while position < end:
+        chunk = hunt_jobs.get_chunk(owner, position // size)
+        if chunk is None:
+            break
+        offset = position % size
+        take = chunk[offset:offset + (end - position)]
+        if not take:
+            break
+        rows.extend(take)
+        position += len(take)
+    return rows, position
+
+
+def _run_hunt(job_id, query, headers, scope):
+    try:
+        _hunt(job_id, query, headers, scope)
+    except Exception as exc:
+        logger.exception("Hunt job %s failed", job_id)
+        hunt_jobs.update(job_id, status='failed', error=f"Hunt failed: {exc}")
+
+
+def _hunt(job_id, query, headers, scope):
+    hunt_jobs.update(job_id, status='running')
+    writer = _ChunkWriter(job_id)
+    url = f"{settings.ENGINE_BASE_URL}/threat/{EXECUTE_PATH}"
+
+    try:
+        resp = requests.post(
+            url, json=query, headers=headers,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), stream=True,
+        )
+        try:
+            if resp.status_code >= 400:
+                hunt_jobs.update(
+                    job_id, status='failed',
+                    error=f"Threat engine returned {resp.status_code}",
+                )
+                return
+
+            meta = None
+            if 'ndjson' in resp.headers.get('Content-Type', ''):
+                for line in resp.iter_lines():
+                    if line:
+                        writer.add(json.loads(line))
+            else:
+                payload = resp.json()
+                rows, meta = _split_payload(payload)
+                for row in rows:
+                    writer.add(row)
+            writer.flush()
+        finally:
+            resp.close()
+
+    except requests.Timeout:
+        writer.flush()
+        hunt_jobs.update(job_id, status='failed', error='Threat engine timed out.')
+        return
+    except (requests.RequestException, ValueError) as exc:
+        writer.flush()
+        logger.error("Hunt job %s failed: %s", job_id, exc)
+        hunt_jobs.update(job_id, status='failed', error=str(exc))
+        return
+
+    hunt_jobs.update(job_id, status='completed', meta=meta)
+
+    scan_run_id = query.get('scan_run_id')
+    # The cached result points at this job's chunks, so it must not outlive
+    # the oldest of them
+    ttl = int(settings.HUNT_RESULT_TTL_SECONDS - writer.age())
+    if scan_run_id and ttl > 0:
+        cache.set(
+            _result_key(query_hash(query), scan_run_id, scope),
+            {'job_id': job_id, 'rows': writer.rows, 'chunks': writer.chunks, 'meta': meta},
+            ttl,
+        )
+
+
+def _split_payload(payload):
+    """Separate the row list from the rest of a JSON hunt response."""
+    if isinstance(payload, list):
+        return payload, None
+    if isinstance(payload, dict):
+        for key in ROW_KEYS:
+            if isinstance(payload.get(key), list):
+                meta = {k: v for k, v in payload.items() if k != key}
+                return payload[key], meta
+    return [], payload
+
+
+class _ChunkWriter:
+    """Buffers rows and publishes them to the job one chunk at a time."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.buffer = []
+        self.rows = 0
+        self.chunks = 0
+        self.first_chunk_at = None
+
+    def age(self):
+        """Seconds since the first chunk was written (0 before that)."""
+        if self.first_chunk_at is None:
+            return 0
+        return time.monotonic() - self.first_chunk_at
+
+    def add(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= settings.HUNT_CHUNK_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+        hunt_jobs.set_chunk(self.job_id, self.chunks, self.buffer)
+        self.rows += len(self.buffer)
+        self.chunks += 1
+        self.buffer = []
+        hunt_jobs.update(self.job_id, rows=self.rows, chunks=self.chunks)
@@ -0,0 +1,333 @@
+"""
+Streaming ingestion of large threat-intel feeds.
+
+POST /api/engines/intel/feed/ingest/ accepts an NDJSON feed (optionally gzip
+compressed) of indicator objects. The upload is spooled to a temp file in
+fixed-size chunks and processed by a background job, so neither the request
+nor the job ever holds the whole feed in memory:
+
+  - each line is parsed and validated on its own; lines over MAX_LINE_BYTES
+    are counted invalid and skipped without being buffered
+  - duplicates are dropped using a bounded set of 8-byte digests, kept as
+    sorted runs in arrays (about 8 bytes per indicator rather than the ~70 a
+    Python set entry costs) and merged as they grow
+  - valid indicators are forwarded to the threat engine's batch endpoint in
+    INTEL_INGEST_BATCH_SIZE batches, with at most INTEL_INGEST_CONCURRENCY
+    requests in flight; the reader blocks (backpressure) when all slots are busy
+
+Progress is exposed on GET /api/engines/intel/feed/ingest/{job_id}/. A job
+that fails for any reason ends as 'failed', never stuck in 'running'.
+"""
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+from utils.jobs import JobStore, BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = 'api/v1/intel/feed/batch'
+SPOOL_CHUNK = 64 * 1024
+MAX_REPORTED_ERRORS = 20
+# Longest line parsed as an indicator; longer ones are rejected unread
+MAX_LINE_BYTES = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Indicator types whose values are case-insensitive
+CASE_INSENSITIVE_TYPES = {'domain', 'hostname', 'email', 'md5', 'sha1', 'sha256', 'url_host'}
+
+ingest_jobs = JobStore('intel-ingest', ttl=24 * 3600)
+_executor = BoundedExecutor(max_workers=2, max_pending=8, name='intel-ingest')
+
+
+class IngestTooLarge(Exception):
+    pass
+
+
+def spool_upload(stream) -> str:
+    """Copy the request body stream to a temp file; returns its path."""
+    limit = settings.INTEL_INGEST_MAX_BYTES
+    fd, path = tempfile.mkstemp(prefix='intel-ingest-', suffix='.feed')
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            while True:
+                chunk = stream.read(SPOOL_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > limit:
+                    raise IngestTooLarge(f"Feed exceeds {limit} bytes")
+                fh.write(chunk)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def start_ingest(path, headers, user_id):
+    """Create an ingest job for a spooled feed. Returns None if the pool is full."""
+    job = ingest_jobs.create(
+        user_id=user_id,
+        lines=0,
+        accepted=0,
+        duplicates=0,
+        invalid=0,
+        forwarded=0,
+        batches_sent=0,
+        batches_failed=0,
+        errors=[],
+    )
+    if not _executor.submit(_run_ingest, job['job_id'], path, headers):
+        os.unlink(path)
+        ingest_jobs.update(job['job_id'], status='failed', error='Ingest queue is full, retry later.')
+        return None
+    return job
+
+
+def normalize_indicator(record):
+    """
+    Validate one feed record. Returns the normalized indicator dict,
+    or raises ValueError with a reason.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    value = record.get('value', record.get('indicator'))
+    ioc_type = record.get('type')
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("missing indicator value")
+    if not isinstance(ioc_type, str) or not ioc_type.strip():
+        raise ValueError("missing indicator type")
+
+    ioc_type = ioc_type.strip().lower()
+    value = value.strip()
+    if ioc_type in CASE_INSENSITIVE_TYPES:
+        value = value.lower()
+
+    indicator = dict(record)
+    indicator.pop('indicator', None)
+    indicator['type'] = ioc_type
+    indicator['value'] = value
+    return indicator
+
+
+def _open_feed(path):
+    with open(path, 'rb') as fh:
+        magic = fh.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _read_lines(feed):
+    """
+    Yield the feed's lines, or None for a line longer than MAX_LINE_BYTES;
+    the rest of an oversize line is read through in bounded pieces.
+    """
+    while True:
+        line = feed.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        if len(line) <= MAX_LINE_BYTES or line.endswith(b'\n'):
+            yield line
+            continue
+        while line and not line.endswith(b'\n'):
+            line = feed.readline(MAX_LINE_BYTES + 1)
+        yield None
+
+
+class _DigestSet:
+    """
+    Set of 64-bit digests in sorted array('Q') runs. New digests collect in a
+    small set; full sets become runs, and runs of similar size are merged, so
+    there are only O(log n) runs to binary-search.
+    """
+    RUN_SIZE = 1 << 14
+
+    def __init__(self):
+        self._recent = set()
+        self._runs = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, digest):
+        if digest in self._recent:
+            return True
+        for run in self._runs:
+            i = bisect_left(run, digest)
+            if i < len(run) and run[i] == digest:
+                return True
+        return False
+
+    def add(self, digest):
+        self._recent.add(digest)
+        self._len += 1
+        if len(self._recent) >= self.RUN_SIZE:
+            run = array('Q', sorted(self._recent))
+            self._recent = set()
+            while self._runs and len(self._runs[-1]) <= len(run):
+                run = array('Q', heapq.merge(self._runs.pop(), run))
+            self._runs.append(run)
+
+
+def _run_ingest(job_id, path, headers):
+    try:
+        _ingest(job_id, path, headers)
+    except Exception as exc:
+        logger.exception("Intel ingest %s failed", job_id)
+        ingest_jobs.update(job_id, status='failed', error=f"Ingest failed: {exc}")
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def _ingest(job_id, path, headers):
+    ingest_jobs.update(job_id, status='running')
+    progress = _Progress(job_id)
+    forwarder = _BatchForwarder(headers, progress)
+    seen = _DigestSet()
+    batch = []
+
+    try:
+        with _open_feed(path) as feed:
+            for line_no, line in enumerate(_read_lines(feed), start=1):
+                progress.lines = line_no
+                if line is None:
+                    progress.reject(line_no, f"Line exceeds {MAX_LINE_BYTES} bytes")
+                    continue
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    indicator = normalize_indicator(json.loads(line))
+                except ValueError as exc:
+                    progress.reject(line_no, str(exc))
+                    continue
+
+                digest = int.from_bytes(hashlib.blake2b(
+                    f"{indicator['type']}\x1f{indicator['value']}".encode(), digest_size=8
+                ).digest(), 'little')
+                if digest in seen:
+                    progress.duplicates += 1
+                    continue
+                if len(seen) < settings.INTEL_INGEST_DEDUPE_MAX:
+                    seen.add(digest)
+
+                progress.accepted += 1
+                batch.append(indicator)
+                if len(batch) >= settings.INTEL_INGEST_BATCH_SIZE:
+                    forwarder.submit(batch)
+                    batch = []
+                    progress.publish()
+
+        if batch:
+            forwarder.submit(batch)
+        forwarder.wait()
+    except (OSError, EOFError) as exc:
+        forwarder.wait()
+        progress.publish()
+        ingest_jobs.update(job_id, status='failed', error=f"Could not read feed: {exc}")
+        return
+    except Exception:
+        forwarder.wait()
+        progress.publish()
+        raise
+    finally:
+        os.unlink(path)
+
+    progress.publish()
+    status = 'completed' if progress.batches_failed == 0 else 'failed'
+    error = None if status == 'completed' else f"{progress.batches_failed} batch(es) rejected by the engine"
+    ingest_jobs.update(job_id, status=status, error=error)
+
+
+class _Progress:
+    """Counters for one job; publish() writes them to the job record."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.lines = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.forwarded = 0
+        self.batches_sent = 0
+        self.batches_failed = 0
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def reject(self, line_no, reason):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': reason})
+
+    def batch_done(self, size, ok):
+        with self.lock:
+            self.batches_sent += 1
+            if ok:
+                self.forwarded += size
+            else:
+                self.batches_failed += 1
+
+    def publish(self):
+        with self.lock:
+            ingest_jobs.update(
+                self.job_id,
+                lines=self.lines,
+                accepted=self.accepted,
+                duplicates=self.duplicates,
+                invalid=self.invalid,
+                forwarded=self.forwarded,
+                batches_sent=self.batches_sent,
+                batches_failed=self.batches_failed,
+                errors=list(self.errors),
+            )
+
+
+class _BatchForwarder:
+    """Posts batches to the engine concurrently, blocking when all slots are busy."""
+
+    def __init__(self, headers, progress):
+        concurrency = settings.INTEL_INGEST_CONCURRENCY
+        self.url = f"{settings.ENGINE_BASE_URL}/threat/{BATCH_PATH}"
+        self.headers = dict(headers, **{'Content-Type': 'application/json'})
+        self.progress = progress
+        self.session = requests.Session()
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='intel-batch')
+        self.slots = threading.Semaphore(concurrency)
+
+    def submit(self, batch):
+        self.slots.acquire()
+        self.pool.submit(self._send, batch)
+
+    def _send(self, batch):
+        ok = False
+        try:
+            resp = self.session.post(
+                self.url, data=json.dumps({'indicators': batch}),
+                headers=self.headers, timeout=(5, 60),
+            )
+            ok = resp.status_code < 400
+            if not ok:
+                logger.warning("Intel batch rejected (%s): %s", resp.status_code, resp.text[:200])
+        except requests.RequestException as exc:
+            logger.error("Intel batch failed: %s", exc)
+        finally:
+            self.progress.batch_done(len(batch), ok)
+            self.slots.release()
+
+    def wait(self):
+        self.pool.shutdown(wait=True)
+        self.session.close()
@@ -8,7 +8,10 @@ All engine proxy views inherit from EngineProxyView, which:
 4. Returns the engine's response transparently
 
 The proxy adds X-Auth-Context and X-User-ID headers so engines can optionally
-trust user context on the internal network.
+trust user context on the internal network. X-Auth-Context carries the
+user's operation keys in `permissions`, as it always has, and the same set as
+a packed bitset ({"v": catalog version, "bits": hex}) in `permissions_packed`;
+engines can map bits to keys with GET /api/internal/operation-catalog/?version=.
 """
 import base64
 import json
@@ -19,7 +22,11 @@ from django.conf import settings
 from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
 
+from engines import gateway_cache
+from onboarding_management.idempotency import idempotent, deduplicated_scan
 from user_auth.authentication import CookieTokenAuthentication
+from user_auth.operation_catalog import has_operation, permissions_of
+from user_auth.scopes import scope_allows, scope_as_lists
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +53,14 @@ class EngineProxyView(View):
     Subclasses must set:
         engine_prefix: str  — e.g., 'inventory', 'threat', 'compliance'
         required_operation: str | None  — operation key required, or None for auth-only
+
+    Optionally:
+        cache_response: bool  — serve GETs from the gateway response cache
     """
     engine_prefix: str = ''
     required_operation: str | None = None
     timeout: int = DEFAULT_TIMEOUT
+    cache_response: bool = False
 
     _auth_backend = CookieTokenAuthentication()
 
@@ -61,8 +72,7 @@ class EngineProxyView(View):
 
         # Check required operation
         if self.required_operation:
-            perms = request.auth_context.get('permissions', [])
-            if self.required_operation not in perms:
+            if not has_operation(request.auth_context, self.required_operation):
                 logger.warning(
                     "Access denied: user=%s operation=%s",
                     request.auth_context.get('email'), self.required_operation
@@ -79,9 +89,88 @@ class EngineProxyView(View):
         Forward request to engine and return its response.
         path: the path segment after the engine prefix (no leading slash needed).
         """
+        if self.cache_response and request.method == 'GET':
+            return self._cached_proxy(request, path, extra_params, timeout)
+
+        resp, error = self.send(request, path, extra_params=extra_params, timeout=timeout)
+        if error is not None:
+            return error
+        return self._build_response(resp)
+
+    def proxy_scan(self, request, path: str, status_path: str = None, timeout: int = None):
+        """
+        proxy() for endpoints that start scans. Honours an Idempotency-Key
+        header, and returns the running scan's original response instead of
+        starting an identical one (same tenant/provider/target).
+        status_path: job status path below this engine, with a {job_id} placeholder.
+        """
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            body = None
+        scope = f"{self.engine_prefix}:{path}"
+        if status_path:
+            status_path = f"/{self.engine_prefix}/{status_path.lstrip('/')}"
+
+        return idempotent(
+            request, scope, request.auth_context.get('user_id'),
+            lambda: deduplicated_scan(
+                scope, body, lambda: self.proxy(request, path, timeout=timeout),
+                status_path=status_path,
+            ),
+        )
+
+    def _cached_proxy(self, request, path, extra_params, timeout):
+        cache_path = f"/{self.engine_prefix}/{path.lstrip('/')}"
+        params = dict(request.GET)
+        if extra_params:
+            params.update(extra_params)
+
+        # Only tenant-pinned requests within the caller's scope are cached;
+        # anything else goes straight to the engine, which enforces access
+        tenant_id = request.GET.get('tenant_id')
+        if not tenant_id or not scope_allows(request.auth_context, 'tenant_ids', tenant_id):
+            resp, error = self.send(request, path, extra_params=extra_params, timeout=timeout)
+            if error is not None:
+                return error
+            return self._build_response(resp)
+
+        scope = gateway_cache.scope_for(request.auth_context)
+        entry = gateway_cache.get(cache_path, params, scope)
+        if entry is not None:
+            response = HttpResponse(
+                content=entry['body'], status=entry['status'], content_type=entry['content_type']
+            )
+            response['X-Gateway-Cache'] = 'HIT'
+            return response
+
+        resp, error = self.send(request, path, extra_params=extra_params, timeout=timeout)
+        if error is not None:
+            return error
+        if resp.status_code == 200:
+            gateway_cache.put(
+                cache_path, params, scope, resp.content,
+                content_type=resp.headers.get('Content-Type', 'application/json'),
+            )
+        response = self._build_response(resp)
+        response['X-Gateway-Cache'] = 'MISS'
+        return response
+
+    def engine_url(self, path: str) -> str:
+        """Absolute engine URL for a path below this view's engine prefix."""
         engine_base = getattr(settings, 'ENGINE_BASE_URL', '')
-        path = path.lstrip('/')
-        url = f"{engine_base}/{self.engine_prefix}/{path}"
+        return f"{engine_base}/{self.engine_prefix}/{path.lstrip('/')}"
+
+    def send(self, request, path: str, extra_params: dict = None, timeout: int = None,
+             stream: bool = False):
+        """
+        Send the request to the engine without converting the reply.
+
+        Returns (requests.Response, None) on success or (None, error JsonResponse)
+        when the engine could not be reached. With stream=True the body is left
+        unread so callers can consume it in chunks.
+        """
+        url = self.engine_url(path)
 
         params = dict(request.GET)
         if extra_params:
@@ -97,6 +186,7 @@ class EngineProxyView(View):
             'headers': headers,
             'timeout': timeout or self.timeout,
             'allow_redirects': True,
+            'stream': stream,
         }
 
         # Forward body for write methods
@@ -106,17 +196,16 @@ class EngineProxyView(View):
             headers['Content-Type'] = content_type
 
         try:
-            resp = requests.request(method, **kwargs)
-            return self._build_response(resp)
+            return requests.request(method, **kwargs), None
         except requests.Timeout:
             logger.error("Engine timeout: %s %s", method, url)
-            return _err(f"Engine {self.engine_prefix} timed out.", 504)
+            return None, _err(f"Engine {self.engine_prefix} timed out.", 504)
         except requests.ConnectionError:
             logger.error("Engine connection error: %s %s", method, url)
-            return _err(f"Engine {self.engine_prefix} is unreachable.", 503)
+            return None, _err(f"Engine {self.engine_prefix} is unreachable.", 503)
         except Exception as exc:
             logger.exception("Engine proxy error: %s", exc)
-            return _err("Proxy error: " + str(exc), 502)
+            return None, _err("Proxy error: " + str(exc), 502)
 
     def _build_forward_headers(self, request) -> dict:
         """Build headers to forward to the engine."""
@@ -129,11 +218,14 @@ class EngineProxyView(View):
         # Add auth context as header for engine trust
         auth_ctx = getattr(request, 'auth_context', {})
         if auth_ctx:
+            permissions = permissions_of(auth_ctx)
             ctx_json = json.dumps({
                 'user_id': auth_ctx.get('user_id'),
                 'email': auth_ctx.get('email'),
-                'permissions': auth_ctx.get('permissions', []),
-                'scope': auth_ctx.get('scope', {}),
+                # Key list for engines that don't decode the bitset yet
+                'permissions': list(permissions),
+                'permissions_packed': permissions.pack(),
+                'scope': scope_as_lists(auth_ctx.get('scope')),
             })
             headers['X-Auth-Context'] = base64.b64encode(ctx_json.encode()).decode()
             headers['X-User-ID'] = auth_ctx.get('user_id', '')
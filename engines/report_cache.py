@@ -0,0 +1,249 @@
+"""
+Gateway-side disk cache for finished compliance documents.
+
+A completed compliance report is immutable, so its PDF/Excel renderings only
+need to be produced by the engine once. Documents are stored under
+REPORT_CACHE_DIR, content-addressed by a SHA-256 of the cache key parts
+(e.g. report_id + format). Each entry is a data file plus a small JSON sidecar
+holding the content type, disposition and strong ETag (SHA-256 of the body).
+
+Hits are served straight from disk:
+  - full responses use FileResponse (wsgi.file_wrapper / sendfile when available)
+  - single `Range: bytes=...` requests get a 206 Partial Content
+  - `If-None-Match` with the current ETag returns 304
+
+The directory is bounded by REPORT_CACHE_MAX_BYTES with LRU eviction; the data
+file mtime is bumped on every hit and the oldest files go first. Entries
+stored with a ttl are treated as misses once it has passed.
+
+Another worker may evict an entry at any point, so a file that has
+disappeared by the time it is opened is a miss (serve() returns None), never
+an error. Both files are written to temp names and renamed into place, the
+sidecar last, so a reader never sees a partly written entry.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class ReportFileCache:
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or settings.REPORT_CACHE_DIR
+        self.max_bytes = max_bytes or settings.REPORT_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(*parts) -> str:
+        """Content address for a document, e.g. key_for('report', report_id, 'pdf')."""
+        raw = '\x1f'.join(str(p) for p in parts)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _paths(self, key):
+        directory = os.path.join(self.root, key[:2])
+        return directory, os.path.join(directory, key), os.path.join(directory, f"{key}.json")
+
+    def lookup(self, key):
+        """Return the entry metadata for a cached document, or None on a miss."""
+        _, data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            if meta.get('expires') and meta['expires'] <= time.time():
+                return None
+            os.utime(data_path)  # LRU touch
+        except (OSError, ValueError):
+            return None
+        meta['path'] = data_path
+        return meta
+
+    def store(self, key, chunks, content_type, disposition=None, ttl=None):
+        """
+        Write a document from an iterable of byte chunks and return its metadata.
+        The data file and its sidecar are written to temp names and atomically
+        renamed into place, the sidecar last.
+        ttl (seconds) makes the entry expire; None keeps it until evicted.
+        """
+        directory, data_path, meta_path = self._paths(key)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        tmp_paths = []
+        try:
+            fd, tmp_data = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            tmp_paths.append(tmp_data)
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    fh.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+
+            meta = {
+                'etag': f'"{digest.hexdigest()}"',
+                'size': size,
+                'content_type': content_type,
+                'disposition': disposition,
+                'expires': time.time() + ttl if ttl else None,
+            }
+            fd, tmp_meta = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            tmp_paths.append(tmp_meta)
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(meta, fh)
+
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+        except Exception:
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            raise
+
+        self.evict()
+        meta['path'] = data_path
+        return meta
+
+    def evict(self):
+        """Drop least-recently-used documents until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith('.json') or name.startswith('.tmp-'):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                for victim in (path, f"{path}.json"):
+                    try:
+                        os.unlink(victim)
+                    except OSError:
+                        pass
+                total -= size
+                logger.info("Report cache evicted %s (%d bytes)", os.path.basename(path), size)
+
+    def serve(self, request, meta):
+        """
+        Build the response for a cache hit, honouring ETag and Range headers.
+        Returns None if the document was evicted since lookup().
+        """
+        etag = meta['etag']
+        size = meta['size']
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [t.strip() for t in if_none_match.split(',')] or if_none_match.strip() == '*':
+            response = HttpResponse(status=304)
+            response['ETag'] = etag
+            return response
+
+        byte_range = self._parse_range(request, etag, size)
+        if byte_range == 'unsatisfiable':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        try:
+            fh = open(meta['path'], 'rb')
+        except FileNotFoundError:
+            return None
+
+        if byte_range is None:
+            response = FileResponse(fh, content_type=meta['content_type'])
+            response['Content-Length'] = str(size)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(fh, start, end - start + 1),
+                status=206,
+                content_type=meta['content_type'],
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        if meta.get('expires'):
+            response['Cache-Control'] = f"private, max-age={max(int(meta['expires'] - time.time()), 0)}"
+        else:
+            response['Cache-Control'] = 'private, max-age=86400, immutable'
+        if meta.get('disposition'):
+            response['Content-Disposition'] = meta['disposition']
+        return response
+
+    @staticmethod
+    def _parse_range(request, etag, size):
+        """
+        Parse a single-range `Range` header.
+        Returns (start, end) inclusive, None to serve the full body,
+        or 'unsatisfiable'. Multi-range requests fall back to the full body.
+        """
+        header = request.META.get('HTTP_RANGE')
+        if not header:
+            return None
+
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range and if_range.strip() != etag:
+            return None
+
+        match = _RANGE_RE.match(header.strip())
+        if not match:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            length = int(last)
+            if length == 0:
+                return 'unsatisfiable'
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        end = int(last) if last else size - 1
+        if start >= size or end < start:
+            return 'unsatisfiable'
+        return start, min(end, size - 1)
+
+
+def _read_range(fh, start, length):
+    with fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+report_cache = ReportFileCache()
@@ -0,0 +1,118 @@
+"""
+Background pre-rendering of compliance exports.
+
+When a user's status poll shows that a compliance report has finished, the
+PDF, Excel and JSON exports are fetched from the compliance engine in a small
+background pool, with that user's forwarded auth context, and written into
+the report disk cache under that user's scope. The first download by anyone
+with the same scope is then served from disk instead of waiting on a 30-60s
+render. Engine callbacks carry no user context, so they don't pre-render.
+
+The pool is bounded: at most REPORT_PRERENDER_WORKERS renders run at once and
+at most REPORT_PRERENDER_MAX_PENDING reports may be queued; anything beyond
+that is skipped and rendered on demand as before. A report already queued or
+rendering is never scheduled twice.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+from engines.report_cache import report_cache, CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUSES = {'completed', 'complete', 'done', 'success', 'succeeded', 'finished'}
+
+# (cache format, engine path template, ttl) — formats and ttls match the download views
+EXPORTS = (
+    ('pdf', 'api/v1/compliance/report/{report_id}/download/pdf', None),
+    ('excel', 'api/v1/compliance/report/{report_id}/download/excel', None),
+    ('export', 'api/v1/compliance/report/{report_id}/export', settings.REPORT_EXPORT_CACHE_TTL_SECONDS),
+)
+
+RENDER_TIMEOUT = 120
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.REPORT_PRERENDER_WORKERS,
+    thread_name_prefix='report-prerender',
+)
+_pending = set()
+_lock = threading.Lock()
+
+
+def export_cache_parts(report_id, fmt, scope, query=''):
+    """
+    Cache key parts shared by the download views and the pre-renderer.
+    scope: gateway_cache.scope_for() of the user the document is rendered for.
+    """
+    if fmt == 'export':
+        return ('report', report_id, fmt, scope, query)
+    return ('report', report_id, fmt, scope)
+
+
+def report_is_complete(payload) -> bool:
+    """Whether an engine status payload describes a finished report."""
+    if not isinstance(payload, dict):
+        return False
+    status = payload.get('status')
+    if status is None and isinstance(payload.get('data'), dict):
+        status = payload['data'].get('status')
+    return str(status or '').lower() in COMPLETED_STATUSES
+
+
+def schedule_prerender(report_id, headers, scope) -> bool:
+    """
+    Queue a background render of all exports for report_id.
+    headers: engine forward headers (X-Auth-Context etc.) captured from the
+    request that observed completion; scope: that request's cache scope.
+    Returns False if skipped.
+    """
+    pending_key = (str(report_id), scope)
+    with _lock:
+        if pending_key in _pending:
+            return False
+        if len(_pending) >= settings.REPORT_PRERENDER_MAX_PENDING:
+            logger.warning("Pre-render queue full, skipping report %s", report_id)
+            return False
+        _pending.add(pending_key)
+
+    _executor.submit(_render_all, pending_key, dict(headers))
+    return True
+
+
+def _render_all(pending_key, headers):
+    report_id, scope = pending_key
+    try:
+        for fmt, template, ttl in EXPORTS:
+            key = report_cache.key_for(*export_cache_parts(report_id, fmt, scope))
+            if report_cache.lookup(key) is not None:
+                continue
+            _render_one(key, template.format(report_id=report_id), headers, ttl)
+    except Exception:
+        logger.exception("Pre-render failed for report %s", report_id)
+    finally:
+        with _lock:
+            _pending.discard(pending_key)
+
+
+def _render_one(key, path, headers, ttl=None):
+    url = f"{settings.ENGINE_BASE_URL}/compliance/{path}"
+    headers.pop('Content-Type', None)
+    resp = requests.get(url, headers=headers, timeout=RENDER_TIMEOUT, stream=True)
+    try:
+        if resp.status_code != 200:
+            logger.info("Pre-render of %s returned %s, leaving to on-demand", path, resp.status_code)
+            return
+        report_cache.store(
+            key,
+            resp.iter_content(chunk_size=CHUNK_SIZE),
+            content_type=resp.headers.get('Content-Type', 'application/octet-stream'),
+            disposition=resp.headers.get('Content-Disposition'),
+            ttl=ttl,
+        )
+        logger.info("Pre-rendered %s", path)
+    finally:
+        resp.close()
@@ -0,0 +1,236 @@
+import asyncio
+import base64
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from user_auth import operation_catalog
+from user_auth.models import Operations
+
+from utils import jobs
+
+from . import gateway_cache, hunt_jobs, intel_ingest
+from .proxy import EngineProxyView
+from .report_cache import ReportFileCache
+from .views.threat import HuntJobStreamView
+
+
+class DigestSetTests(SimpleTestCase):
+
+    def test_membership_across_runs(self):
+        with mock.patch.object(intel_ingest._DigestSet, 'RUN_SIZE', 8):
+            seen = intel_ingest._DigestSet()
+            digests = [(i * 2654435761) % (1 << 64) for i in range(1, 200)]
+            for digest in digests:
+                seen.add(digest)
+        self.assertEqual(len(seen), len(digests))
+        self.assertLess(len(seen._runs), 8)
+        for digest in digests:
+            self.assertIn(digest, seen)
+        self.assertNotIn(0, seen)
+        self.assertNotIn(digests[0] + 1, seen)
+
+
+@override_settings(INTEL_INGEST_BATCH_SIZE=2, INTEL_INGEST_CONCURRENCY=1, INTEL_INGEST_DEDUPE_MAX=100)
+class IntelIngestTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.batches = []
+
+    def _feed(self, lines, compress=False):
+        data = '\n'.join(lines).encode()
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(gzip.compress(data) if compress else data)
+        return path
+
+    def _post(self, url, data=None, **kwargs):
+        self.batches.append(json.loads(data)['indicators'])
+        return mock.Mock(status_code=200)
+
+    def _run(self, path):
+        job = intel_ingest.ingest_jobs.create(lines=0)
+        with mock.patch('requests.Session.post', side_effect=self._post):
+            intel_ingest._run_ingest(job['job_id'], path, {})
+        return intel_ingest.ingest_jobs.get(job['job_id'])
+
+    def test_duplicates_and_invalid_lines(self):
+        path = self._feed([
+            json.dumps({'type': 'domain', 'value': 'Evil.example'}),
+            json.dumps({'type': 'DOMAIN', 'indicator': 'evil.example '}),
+            'not json',
+            json.dumps({'type': 'ip', 'value': ''}),
+            json.dumps({'type': 'ip', 'value': '10.0.0.1'}),
+            json.dumps({'type': 'url', 'value': 'http://x/A'}),
+        ], compress=True)
+        job = self._run(path)
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual((job['accepted'], job['duplicates'], job['invalid']), (3, 1, 2))
+        self.assertEqual(job['forwarded'], 3)
+        self.assertEqual([len(batch) for batch in self.batches], [2, 1])
+        self.assertEqual(self.batches[0][0], {'type': 'domain', 'value': 'evil.example'})
+        self.assertFalse(os.path.exists(path))
+
+    def test_oversize_lines_are_invalid(self):
+        long_line = json.dumps({'type': 'domain', 'value': 'a' * 200})
+        path = self._feed([
+            json.dumps({'type': 'ip', 'value': '10.0.0.1'}),
+            long_line,
+            json.dumps({'type': 'ip', 'value': '10.0.0.2'}),
+            long_line,
+        ])
+        with mock.patch.object(intel_ingest, 'MAX_LINE_BYTES', 64):
+            job = self._run(path)
+        self.assertEqual((job['lines'], job['accepted'], job['invalid']), (4, 2, 2))
+        self.assertEqual([e['line'] for e in job['errors']], [2, 4])
+        self.assertEqual(job['errors'][0]['error'], 'Line exceeds 64 bytes')
+
+    def test_unexpected_error_fails_the_job(self):
+        path = self._feed([json.dumps({'type': 'ip', 'value': '10.0.0.1'})])
+        with mock.patch.object(intel_ingest, 'normalize_indicator', side_effect=KeyError('boom')), \
+                self.assertLogs(intel_ingest.logger, 'ERROR'):
+            job = self._run(path)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('Ingest failed', job['error'])
+        self.assertFalse(os.path.exists(path))
+
+
+class GatewayCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_entries_are_per_scope(self):
+        params = {'tenant_id': 't1'}
+        gateway_cache.put_json('threat/api/v1/summary', params, 'scope-a', {'count': 1})
+        self.assertEqual(gateway_cache.get_json('threat/api/v1/summary', params, 'scope-a'), {'count': 1})
+        self.assertIsNone(gateway_cache.get_json('threat/api/v1/summary', params, 'scope-b'))
+
+    def test_invalidate_tenant(self):
+        params = {'tenant_id': 't1'}
+        gateway_cache.put_json('threat/api/v1/summary', params, 'scope-a', {'count': 1})
+        gateway_cache.put_json('threat/api/v1/summary', {'tenant_id': 't2'}, 'scope-a', {'count': 2})
+        gateway_cache.invalidate_tenant('t1')
+        self.assertIsNone(gateway_cache.get_json('threat/api/v1/summary', params, 'scope-a'))
+        self.assertEqual(gateway_cache.get_json('threat/api/v1/summary', {'tenant_id': 't2'}, 'scope-a'), {'count': 2})
+
+
+class ReportCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = self.enterContext(tempfile.TemporaryDirectory())
+        self.cache = ReportFileCache(root=self.root, max_bytes=1024)
+        self.key = ReportFileCache.key_for('report', 'r1', 'pdf')
+
+    def _files(self):
+        return sorted(name for _, _, names in os.walk(self.root) for name in names)
+
+    def test_store_and_serve(self):
+        self.cache.store(self.key, [b'%PDF', b'-1.7'], 'application/pdf')
+        self.assertEqual(self._files(), [self.key, f"{self.key}.json"])
+        meta = self.cache.lookup(self.key)
+        response = self.cache.serve(RequestFactory().get('/', HTTP_RANGE='bytes=1-3'), meta)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'PDF')
+
+    def test_entry_evicted_after_lookup_is_a_miss(self):
+        self.cache.store(self.key, [b'data'], 'application/pdf')
+        meta = self.cache.lookup(self.key)
+        os.unlink(meta['path'])
+        self.assertIsNone(self.cache.serve(RequestFactory().get('/'), meta))
+        self.assertIsNone(self.cache.lookup(self.key))
+
+    def test_failed_store_leaves_nothing_behind(self):
+        def chunks():
+            yield b'partial'
+            raise OSError('connection reset')
+
+        with self.assertRaises(OSError):
+            self.cache.store(self.key, chunks(), 'application/pdf')
+        self.assertEqual(self._files(), [])
+        self.assertIsNone(self.cache.lookup(self.key))
+
+
+class ForwardHeaderTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        operation_catalog.invalidate()
+        self.addCleanup(operation_catalog.invalidate)
+        for key in ('account:threats:read', 'account:threats:write'):
+            Operations.objects.create(key=key, name=key)
+
+    def test_auth_context_carries_keys_and_bitset(self):
+        request = RequestFactory().get('/')
+        permissions = operation_catalog.unpack(operation_catalog.pack(['account:threats:write']))
+        request.auth_context = {'user_id': 'u1', 'email': 'u1@example.com', 'permissions': permissions, 'scope': None}
+        headers = EngineProxyView()._build_forward_headers(request)
+        context = json.loads(base64.b64decode(headers['X-Auth-Context']))
+        self.assertEqual(context['permissions'], ['account:threats:write'])
+        self.assertEqual(context['permissions_packed'], permissions.pack())
+        self.assertEqual(context['scope'], {'org_ids': None, 'tenant_ids': None, 'account_ids': None})
+
+
+@override_settings(HUNT_CHUNK_ROWS=2, HUNT_RESULT_TTL_SECONDS=3600)
+class HuntJobTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _run(self, query, rows=None, **response):
+        job = hunt_jobs.hunt_jobs.create(user_id='u1', rows=0, chunks=0, chunk_owner=None, meta=None)
+        resp = mock.Mock(status_code=200, headers={'Content-Type': 'application/json'})
+        resp.json.return_value = rows
+        with mock.patch.object(hunt_jobs.requests, 'post', return_value=resp, **response):
+            hunt_jobs._run_hunt(job['job_id'], query, {}, 'scope-a')
+        return hunt_jobs.hunt_jobs.get(job['job_id'])
+
+    def test_rows_are_chunked_and_the_result_cached(self):
+        query = {'q': 'x', 'scan_run_id': 'r1'}
+        with mock.patch.object(hunt_jobs, 'cache', wraps=cache) as spy, \
+                mock.patch.object(hunt_jobs._ChunkWriter, 'age', return_value=600.5):
+            job = self._run(query, [{'n': 1}, {'n': 2}, {'n': 3}])
+        self.assertEqual((job['status'], job['rows'], job['chunks']), ('completed', 3, 2))
+        self.assertEqual(hunt_jobs.read_rows(job, 1, 10), ([{'n': 2}, {'n': 3}], 3))
+        # The result expires no later than the first chunk it points at
+        self.assertEqual(spy.set.call_args.args[2], 2999)
+
+        cached = hunt_jobs.start_hunt(query, {}, 'u1', 'scope-a')
+        self.assertTrue(cached['cached'])
+        self.assertEqual(cached['chunk_owner'], job['job_id'])
+
+    def test_unexpected_error_fails_the_job(self):
+        with mock.patch.object(hunt_jobs, '_split_payload', side_effect=KeyError('boom')), \
+                self.assertLogs(hunt_jobs.logger, 'ERROR'):
+            job = self._run({'q': 'x'}, [])
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('Hunt failed', job['error'])
+
+    def test_stream_stops_when_chunks_have_expired(self):
+        job = hunt_jobs.hunt_jobs.create(user_id='u1', status='completed', rows=4, chunks=2, chunk_owner=None)
+        hunt_jobs.hunt_jobs.set_chunk(job['job_id'], 0, [{'n': 1}, {'n': 2}])
+
+        async def collect():
+            return [line async for line in HuntJobStreamView()._stream(job['job_id'])]
+
+        lines = asyncio.run(collect())
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'n': 1}, {'n': 2}, {'_error': 'Hunt results expired.'},
+        ])
+
+
+class JobCacheCheckTests(SimpleTestCase):
+
+    def test_process_local_cache_fails_the_deploy_check(self):
+        errors = jobs.check_job_cache(None)
+        self.assertEqual([error.id for error in errors], ['jobs.E001'])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0',
+        }}):
+            self.assertEqual(jobs.check_job_cache(None), [])
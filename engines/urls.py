@@ -31,7 +31,9 @@ from engines.views.threat import (
     GraphBuildView, GraphSummaryView, GraphAttackPathsView, GraphInternetExposedView,
     GraphBlastRadiusView, GraphToxicCombinationsView, GraphResourceView,
     IntelFeedView, IntelFeedBatchView, IntelListView, IntelCorrelateView,
+    IntelFeedIngestView, IntelFeedIngestStatusView,
     HuntPredefinedView, HuntExecuteView, HuntQueriesView, HuntResultsView,
+    HuntJobCreateView, HuntJobDetailView, HuntJobStreamView,
     ThreatMapGeographicView, ThreatMapAccountView, ThreatMapServiceView,
     ThreatAnalyticsTrendView, ThreatAnalyticsPatternsView,
     ThreatAnalyticsDistributionView, ThreatAnalyticsCorrelationView,
@@ -157,6 +159,8 @@ urlpatterns = [
     # Threat Intel
     path('intel/feed/', IntelFeedView.as_view()),
     path('intel/feed/batch/', IntelFeedBatchView.as_view()),
+    path('intel/feed/ingest/', IntelFeedIngestView.as_view()),
+    path('intel/feed/ingest/<str:job_id>/', IntelFeedIngestStatusView.as_view()),
     path('intel/', IntelListView.as_view()),
     path('intel/correlate/', IntelCorrelateView.as_view()),
 
@@ -165,6 +169,9 @@ urlpatterns = [
     path('hunt/execute/', HuntExecuteView.as_view()),
     path('hunt/queries/', HuntQueriesView.as_view()),
     path('hunt/results/', HuntResultsView.as_view()),
+    path('hunt/jobs/', HuntJobCreateView.as_view()),
+    path('hunt/jobs/<str:job_id>/', HuntJobDetailView.as_view()),
+    path('hunt/jobs/<str:job_id>/stream/', HuntJobStreamView.as_view()),
 
     # ─────────────────────────────────────────────────────────────────────────
     # COMPLIANCE ENGINE  /api/engines/compliance/
@@ -12,7 +12,7 @@ class CheckScanView(EngineProxyView):
     timeout = SCAN_TIMEOUT
 
     def post(self, request):
-        return self.proxy(request, 'api/v1/scan', timeout=SCAN_TIMEOUT)
+        return self.proxy_scan(request, 'api/v1/scan', timeout=SCAN_TIMEOUT)
 
 
 class CheckFindingsView(EngineProxyView):
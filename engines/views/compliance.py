@@ -3,7 +3,69 @@ Compliance Engine Proxy Views
 Engine prefix: compliance
 Port: 8021
 """
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from engines import gateway_cache
 from engines.proxy import EngineProxyView, SCAN_TIMEOUT
+from engines.report_cache import report_cache, CHUNK_SIZE
+from engines.report_prerender import export_cache_parts, report_is_complete, schedule_prerender
+
+
+class CachedDocumentMixin:
+    """
+    Serves engine-rendered documents through the gateway disk cache.
+    A miss streams the engine response into the cache, then serves it from disk;
+    non-200 engine replies are passed through uncached. An entry evicted
+    between lookup and serve is treated as a miss.
+
+    A hit never reaches the engine, so cache_parts must include the caller's
+    scope (gateway_cache.scope_for): a document is only served from disk to
+    users who would get the same document from the engine. With report_id set,
+    the document is only stored once the engine reports that report complete.
+    """
+
+    def report_complete(self, request, report_id):
+        resp, error = self.send(request, f'api/v1/compliance/reports/{report_id}/status', timeout=15)
+        if error is not None or resp.status_code != 200:
+            return False
+        try:
+            return report_is_complete(resp.json())
+        except ValueError:
+            return False
+
+    def cached_download(self, request, path, cache_parts, timeout=60, report_id=None, ttl=None):
+        key = report_cache.key_for(*cache_parts)
+        meta = report_cache.lookup(key)
+        if meta is not None:
+            response = report_cache.serve(request, meta)
+            if response is not None:
+                return response
+
+        if report_id is not None and not self.report_complete(request, report_id):
+            return self.proxy(request, path, timeout=timeout)
+        resp, error = self.send(request, path, timeout=timeout, stream=True)
+        if error is not None:
+            return error
+        if resp.status_code != 200:
+            return self._build_response(resp)
+        try:
+            meta = report_cache.store(
+                key,
+                resp.iter_content(chunk_size=CHUNK_SIZE),
+                content_type=resp.headers.get('Content-Type', 'application/octet-stream'),
+                disposition=resp.headers.get('Content-Disposition'),
+                ttl=ttl,
+            )
+        finally:
+            resp.close()
+        response = report_cache.serve(request, meta)
+        if response is None:
+            # Evicted as soon as it was stored (larger than the whole cache)
+            return self.proxy(request, path, timeout=timeout)
+        return response
 
 
 class ComplianceGenerateView(EngineProxyView):
@@ -44,18 +106,27 @@ class ComplianceReportDetailView(EngineProxyView):
         return self.proxy(request, f'api/v1/compliance/reports/{report_id}')
 
 
-class ComplianceReportExportView(EngineProxyView):
+class ComplianceReportExportView(CachedDocumentMixin, EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'account:compliance:read'
     timeout = 60
 
     def get(self, request, report_id):
-        return self.proxy(request, f'api/v1/compliance/report/{report_id}/export', timeout=60)
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        return self.cached_download(
+            request, f'api/v1/compliance/report/{report_id}/export',
+            cache_parts=export_cache_parts(
+                report_id, 'export', gateway_cache.scope_for(request.auth_context), query,
+            ),
+            report_id=report_id,
+            ttl=settings.REPORT_EXPORT_CACHE_TTL_SECONDS,
+        )
 
 
 class ComplianceReportsListView(EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'account:compliance:read'
+    cache_response = True
 
     def get(self, request):
         return self.proxy(request, 'api/v1/compliance/reports')
@@ -66,7 +137,19 @@ class ComplianceReportStatusView(EngineProxyView):
     required_operation = 'account:compliance:read'
 
     def get(self, request, report_id):
-        return self.proxy(request, f'api/v1/compliance/reports/{report_id}/status')
+        response = self.proxy(request, f'api/v1/compliance/reports/{report_id}/status')
+        if response.status_code == 200:
+            try:
+                payload = json.loads(response.content)
+            except ValueError:
+                payload = None
+            if report_is_complete(payload):
+                # Warm the export cache so the first download is instant
+                schedule_prerender(
+                    report_id, self._build_forward_headers(request),
+                    gateway_cache.scope_for(request.auth_context),
+                )
+        return response
 
 
 class ComplianceDashboardView(EngineProxyView):
@@ -173,37 +256,67 @@ class ComplianceControlsSearchView(EngineProxyView):
         return self.proxy(request, 'api/v1/compliance/controls/search')
 
 
-class ComplianceFrameworkDownloadPdfView(EngineProxyView):
+class ComplianceFrameworkDownloadPdfView(CachedDocumentMixin, EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'tenant:reports:read'
     timeout = 60
 
     def get(self, request, framework):
-        return self.proxy(request, f'api/v1/compliance/framework/{framework}/download/pdf', timeout=60)
-
-
-class ComplianceFrameworkDownloadExcelView(EngineProxyView):
+        path = f'api/v1/compliance/framework/{framework}/download/pdf'
+        scan_run_id = request.GET.get('scan_run_id')
+        if not scan_run_id:
+            # Without a pinned scan run the framework view is live data — don't cache.
+            return self.proxy(request, path, timeout=60)
+        return self.cached_download(
+            request, path,
+            cache_parts=(
+                'framework', framework, request.GET.get('tenant_id', ''), scan_run_id, 'pdf',
+                gateway_cache.scope_for(request.auth_context),
+            ),
+        )
+
+
+class ComplianceFrameworkDownloadExcelView(CachedDocumentMixin, EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'tenant:reports:read'
     timeout = 60
 
     def get(self, request, framework):
-        return self.proxy(request, f'api/v1/compliance/framework/{framework}/download/excel', timeout=60)
-
-
-class ComplianceReportDownloadPdfView(EngineProxyView):
+        path = f'api/v1/compliance/framework/{framework}/download/excel'
+        scan_run_id = request.GET.get('scan_run_id')
+        if not scan_run_id:
+            # Without a pinned scan run the framework view is live data — don't cache.
+            return self.proxy(request, path, timeout=60)
+        return self.cached_download(
+            request, path,
+            cache_parts=(
+                'framework', framework, request.GET.get('tenant_id', ''), scan_run_id, 'excel',
+                gateway_cache.scope_for(request.auth_context),
+            ),
+        )
+
+
+class ComplianceReportDownloadPdfView(CachedDocumentMixin, EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'tenant:reports:read'
     timeout = 60
 
     def get(self, request, report_id):
-        return self.proxy(request, f'api/v1/compliance/report/{report_id}/download/pdf', timeout=60)
+        return self.cached_download(
+            request, f'api/v1/compliance/report/{report_id}/download/pdf',
+            cache_parts=export_cache_parts(report_id, 'pdf', gateway_cache.scope_for(request.auth_context)),
+            report_id=report_id,
+        )
 
 
-class ComplianceReportDownloadExcelView(EngineProxyView):
+class ComplianceReportDownloadExcelView(CachedDocumentMixin, EngineProxyView):
     engine_prefix = 'compliance'
     required_operation = 'tenant:reports:read'
     timeout = 60
 
     def get(self, request, report_id):
-        return self.proxy(request, f'api/v1/compliance/report/{report_id}/download/excel', timeout=60)
+        return self.cached_download(
+            request, f'api/v1/compliance/report/{report_id}/download/excel',
+            cache_parts=export_cache_parts(report_id, 'excel', gateway_cache.scope_for(request.auth_context)),
+            report_id=report_id,
+        )
@@ -27,6 +27,7 @@ from engines.proxy import EngineProxyView
 class InventoryLatestSummaryView(EngineProxyView):
     engine_prefix = 'inventory'
     required_operation = 'account:inventory:read'
+    cache_response = True
 
     def get(self, request):
         return self.proxy(request, 'api/v1/inventory/runs/latest/summary')
@@ -62,7 +63,10 @@ class InventoryScanAsyncView(EngineProxyView):
     required_operation = 'account:scans:execute'
 
     def post(self, request):
-        return self.proxy(request, 'api/v1/inventory/scan/discovery/async')
+        return self.proxy_scan(
+            request, 'api/v1/inventory/scan/discovery/async',
+            status_path='api/v1/inventory/jobs/{job_id}',
+        )
 
 
 class InventoryJobStatusView(EngineProxyView):
@@ -5,7 +5,18 @@ Port: 8020
 
 All paths proxied to: {ENGINE_BASE_URL}/threat/{path}
 """
-from engines.proxy import EngineProxyView, SCAN_TIMEOUT
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from engines import gateway_cache, hunt_jobs, intel_ingest
+from engines.proxy import EngineProxyView, SCAN_TIMEOUT, _err
 
 
 class ThreatGenerateView(EngineProxyView):
@@ -22,7 +33,10 @@ class ThreatGenerateAsyncView(EngineProxyView):
     required_operation = 'account:threats:read'
 
     def post(self, request):
-        return self.proxy(request, 'api/v1/threat/generate/async')
+        return self.proxy_scan(
+            request, 'api/v1/threat/generate/async',
+            status_path='api/v1/threat/jobs/{job_id}',
+        )
 
 
 class ThreatJobStatusView(EngineProxyView):
@@ -139,6 +153,7 @@ class GraphBuildView(EngineProxyView):
 class GraphSummaryView(EngineProxyView):
     engine_prefix = 'threat'
     required_operation = 'account:threats:read'
+    cache_response = True
 
     def get(self, request):
         return self.proxy(request, 'api/v1/graph/summary')
@@ -202,6 +217,47 @@ class IntelFeedBatchView(EngineProxyView):
         return self.proxy(request, 'api/v1/intel/feed/batch')
 
 
+class IntelFeedIngestView(EngineProxyView):
+    """
+    POST /api/engines/intel/feed/ingest/ — NDJSON (optionally gzip) feed upload.
+    Returns 202 with an ingest job; the feed is validated, deduped and forwarded
+    to the engine in bounded batches in the background.
+    """
+    engine_prefix = 'threat'
+    required_operation = 'account:threats:read'
+
+    def post(self, request):
+        try:
+            path = intel_ingest.spool_upload(request)
+        except intel_ingest.IngestTooLarge as exc:
+            return _err(str(exc), 413)
+
+        headers = self._build_forward_headers(request)
+        headers.pop('Content-Type', None)
+        job = intel_ingest.start_ingest(path, headers, request.auth_context.get('user_id'))
+        if job is None:
+            return _err("Too many feed ingests in progress, retry shortly.", 503)
+
+        return JsonResponse(
+            {"success": True, "message": "Feed ingest started", "data": job, "pagination": None},
+            status=202,
+        )
+
+
+class IntelFeedIngestStatusView(EngineProxyView):
+    """GET /api/engines/intel/feed/ingest/{job_id}/ — ingest progress."""
+    engine_prefix = 'threat'
+    required_operation = 'account:threats:read'
+
+    def get(self, request, job_id):
+        job = intel_ingest.ingest_jobs.get(job_id)
+        if job is None or job['user_id'] != request.auth_context.get('user_id'):
+            return _err("Ingest job not found.", 404)
+        return JsonResponse(
+            {"success": True, "message": "Ingest job fetched", "data": job, "pagination": None}
+        )
+
+
 class IntelListView(EngineProxyView):
     engine_prefix = 'threat'
     required_operation = 'account:threats:read'
@@ -225,7 +281,22 @@ class HuntPredefinedView(EngineProxyView):
     required_operation = 'account:threats:read'
 
     def get(self, request):
-        return self.proxy(request, 'api/v1/hunt/predefined')
+        scan_run_id = request.GET.get('scan_run_id')
+        if not scan_run_id:
+            return self.proxy(request, 'api/v1/hunt/predefined')
+
+        # Results against a finished scan run don't change — cache per (query, scan run, scope)
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        scope = gateway_cache.scope_for(request.auth_context)
+        key = f"hunt:predefined:{hunt_jobs.query_hash({'q': query})}:{scan_run_id}:{scope}"
+        cached = cache.get(key)
+        if cached is None:
+            response = self.proxy(request, 'api/v1/hunt/predefined')
+            if response.status_code != 200:
+                return response
+            cached = {'content': response.content, 'content_type': response['Content-Type']}
+            cache.set(key, cached, settings.HUNT_RESULT_TTL_SECONDS)
+        return HttpResponse(cached['content'], content_type=cached['content_type'])
 
 
 class HuntExecuteView(EngineProxyView):
@@ -256,6 +327,123 @@ class HuntResultsView(EngineProxyView):
         return self.proxy(request, 'api/v1/hunt/results')
 
 
+class HuntJobMixin:
+    """Loads a hunt job owned by the requesting user."""
+
+    def get_job(self, request, job_id):
+        job = hunt_jobs.hunt_jobs.get(job_id)
+        if job is None or job['user_id'] != request.auth_context.get('user_id'):
+            return None
+        return job
+
+
+class HuntJobCreateView(EngineProxyView):
+    """POST /api/engines/hunt/jobs/ — start a hunt as a background job (202)."""
+    engine_prefix = 'threat'
+    required_operation = 'account:threats:read'
+
+    def post(self, request):
+        try:
+            query = json.loads(request.body or b'{}')
+        except ValueError:
+            return _err("Invalid JSON body.")
+        if not isinstance(query, dict):
+            return _err("Hunt query must be a JSON object.")
+
+        headers = self._build_forward_headers(request)
+        headers['Content-Type'] = 'application/json'
+        job = hunt_jobs.start_hunt(
+            query, headers, request.auth_context.get('user_id'),
+            gateway_cache.scope_for(request.auth_context),
+        )
+        if job is None:
+            return _err("Too many hunts in progress, retry shortly.", 503)
+
+        return JsonResponse(
+            {"success": True, "message": "Hunt started", "data": job, "pagination": None},
+            status=200 if job['cached'] else 202,
+        )
+
+
+class HuntJobDetailView(HuntJobMixin, EngineProxyView):
+    """
+    GET /api/engines/hunt/jobs/{job_id}/?cursor=0&limit=500
+    Job status plus a page of rows; pass next_cursor back to continue.
+    """
+    engine_prefix = 'threat'
+    required_operation = 'account:threats:read'
+
+    def get(self, request, job_id):
+        job = self.get_job(request, job_id)
+        if job is None:
+            return _err("Hunt job not found.", 404)
+
+        try:
+            cursor = max(int(request.GET.get('cursor', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', 500)), 1), 5000)
+        except ValueError:
+            return _err("cursor and limit must be integers.")
+
+        rows, next_cursor = hunt_jobs.read_rows(job, cursor, limit)
+        done = job['status'] in ('completed', 'failed') and next_cursor >= job['rows']
+        return JsonResponse({
+            "success": True,
+            "message": "Hunt job fetched",
+            "data": {
+                "job": job,
+                "rows": rows,
+                "next_cursor": None if done else next_cursor,
+            },
+            "pagination": None,
+        })
+
+
+class HuntJobStreamView(HuntJobMixin, EngineProxyView):
+    """GET /api/engines/hunt/jobs/{job_id}/stream/ — rows as NDJSON, as they arrive."""
+    engine_prefix = 'threat'
+    required_operation = 'account:threats:read'
+
+    POLL_INTERVAL = 0.5
+    MAX_STREAM_SECONDS = 600
+
+    def get(self, request, job_id):
+        job = self.get_job(request, job_id)
+        if job is None:
+            return _err("Hunt job not found.", 404)
+        return StreamingHttpResponse(self._stream(job_id), content_type='application/x-ndjson')
+
+    @staticmethod
+    def _poll(job_id, cursor):
+        job = hunt_jobs.hunt_jobs.get(job_id)
+        if job is None:
+            return None, [], cursor
+        rows, cursor = hunt_jobs.read_rows(job, cursor, 5000)
+        return job, rows, cursor
+
+    async def _stream(self, job_id):
+        # Async so the ASGI server flushes each row as it is yielded and the
+        # wait between polls doesn't hold a worker thread
+        cursor = 0
+        deadline = time.monotonic() + self.MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            job, rows, cursor = await sync_to_async(self._poll, thread_sensitive=False)(job_id, cursor)
+            if job is None:
+                yield json.dumps({"_error": "Hunt job expired."}) + "\n"
+                return
+            for row in rows:
+                yield json.dumps(row) + "\n"
+            if job['status'] in ('completed', 'failed') and cursor >= job['rows']:
+                if job['status'] == 'failed':
+                    yield json.dumps({"_error": job['error']}) + "\n"
+                return
+            if job['status'] in ('completed', 'failed') and not rows:
+                # Finished, but the remaining chunks have expired
+                yield json.dumps({"_error": "Hunt results expired."}) + "\n"
+                return
+            if not rows:
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+
 # ── Maps & Analytics ──────────────────────────────────────────────────────────
 
 class ThreatMapGeographicView(EngineProxyView):
@@ -301,6 +489,7 @@ class ThreatAnalyticsPatternsView(EngineProxyView):
 class ThreatAnalyticsDistributionView(EngineProxyView):
     engine_prefix = 'threat'
     required_operation = 'account:threats:read'
+    cache_response = True
 
     def get(self, request):
         return self.proxy(request, 'api/v1/threat/analytics/distribution')
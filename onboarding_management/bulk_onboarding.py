@@ -0,0 +1,240 @@
+"""
+Bulk cloud-account onboarding.
+
+POST /api/onboarding/cloud-accounts/bulk/ takes a list of accounts (JSON body
+or CSV upload) and runs each one through the same three engine calls the UI
+makes one by one:
+
+    create account -> store credentials -> validate credentials
+
+Accounts go through the pipeline concurrently, at most
+BULK_ONBOARDING_CONCURRENCY at a time, in a background job. Per-account stage,
+status and error are published to the job (throttled to one write per
+PUBLISH_INTERVAL) and read back from GET .../cloud-accounts/bulk/{job_id}/.
+
+CSV columns: account_id, tenant_id, account_name, provider, credential_type,
+and one ``credentials.<field>`` column per credential field
+(e.g. credentials.role_arn, credentials.external_id).
+"""
+import csv
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from utils.jobs import JobStore, BoundedExecutor
+from .engine_client import engine_client, EngineError
+from . import validation_cache
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("account_id", "tenant_id", "account_name", "provider")
+# Fields sent in engine paths / compared across rows; must be plain strings
+STRING_FIELDS = REQUIRED_FIELDS + ("credential_type",)
+CREDENTIAL_PREFIX = "credentials."
+PUBLISH_INTERVAL = 1.0
+
+bulk_jobs = JobStore("bulk-onboarding", ttl=24 * 3600)
+_executor = BoundedExecutor(max_workers=2, max_pending=8, name="bulk-onboarding")
+
+
+class BulkInputError(Exception):
+    pass
+
+
+def parse_csv(fileobj):
+    """Read accounts from a CSV upload, folding credentials.* columns into a dict."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    accounts = []
+    for row in csv.DictReader(text):
+        account = {}
+        credentials = {}
+        for column, value in row.items():
+            if column is None or value in (None, ""):
+                continue
+            column = column.strip()
+            if column.startswith(CREDENTIAL_PREFIX):
+                credentials[column[len(CREDENTIAL_PREFIX):]] = value.strip()
+            else:
+                account[column] = value.strip()
+        if credentials:
+            account["credentials"] = credentials
+        accounts.append(account)
+    return accounts
+
+
+def prepare(accounts, defaults=None):
+    """
+    Validate the submitted accounts. Returns the per-account result list;
+    rows that fail validation are already marked failed at the 'input' stage.
+    """
+    if not isinstance(accounts, list) or not accounts:
+        raise BulkInputError("No accounts supplied")
+    if len(accounts) > settings.BULK_ONBOARDING_MAX_ACCOUNTS:
+        raise BulkInputError(
+            f"At most {settings.BULK_ONBOARDING_MAX_ACCOUNTS} accounts per bulk request"
+        )
+
+    seen = set()
+    results = []
+    for index, account in enumerate(accounts):
+        if not isinstance(account, dict):
+            results.append(_result(index, None, "failed", "input", "Row is not an object"))
+            continue
+        account = dict(defaults or {}, **account)
+        error = _type_error(account)
+        if error:
+            account_id = account.get("account_id")
+            results.append(_result(index, account_id if isinstance(account_id, str) else None, "failed", "input", error))
+            continue
+        missing = [f for f in REQUIRED_FIELDS if not account.get(f)]
+        if missing:
+            error = f"Missing required fields: {', '.join(missing)}"
+            results.append(_result(index, account.get("account_id"), "failed", "input", error))
+            continue
+        if account["account_id"] in seen:
+            results.append(_result(index, account["account_id"], "failed", "input", "Duplicate account_id"))
+            continue
+        if account.get("credentials") and not account.get("credential_type"):
+            results.append(_result(index, account["account_id"], "failed", "input", "credential_type is required with credentials"))
+            continue
+        seen.add(account["account_id"])
+        result = _result(index, account["account_id"], "pending", None, None)
+        result["account"] = account
+        results.append(result)
+    return results
+
+
+def _type_error(account):
+    """Why a row's fields have the wrong types, or None. Numeric ids are turned into strings."""
+    for field in STRING_FIELDS:
+        value = account.get(field)
+        if isinstance(value, int) and not isinstance(value, bool):
+            account[field] = value = str(value)
+        if value is not None and not isinstance(value, str):
+            return f"{field} must be a string"
+    credentials = account.get("credentials")
+    if credentials is not None and not isinstance(credentials, dict):
+        return "credentials must be an object"
+    return None
+
+
+def _result(index, account_id, status, stage, error):
+    return {"row": index, "account_id": account_id, "status": status, "stage": stage, "error": error}
+
+
+def start_bulk(results, validate=True):
+    """Create the job and queue the pipeline. Returns None if the queue is full."""
+    accounts = [r.pop("account") for r in results if "account" in r]
+    job = bulk_jobs.create(
+        total=len(results),
+        processed=len(results) - len(accounts),
+        succeeded=0,
+        failed=len(results) - len(accounts),
+        results=results,
+    )
+    if not accounts:
+        return bulk_jobs.update(job["job_id"], status="completed")
+    if not _executor.submit(_run_bulk, job["job_id"], results, accounts, validate):
+        bulk_jobs.update(job["job_id"], status="failed", error="Bulk onboarding queue is full, retry later.")
+        return None
+    return job
+
+
+def _check(data, status_code, stage):
+    if status_code >= 400:
+        message = (data.get("detail") or data.get("message")) if isinstance(data, dict) else None
+        raise EngineError(message or f"{stage} failed ({status_code})", status_code, stage, data)
+    return data
+
+
+def onboard_account(account, validate=True, on_stage=None):
+    """Run one account through create -> credentials -> validate."""
+    on_stage = on_stage or (lambda stage: None)
+    account_id = account["account_id"]
+    credentials = account.get("credentials")
+    body = {k: v for k, v in account.items() if k not in ("credentials", "credential_type")}
+
+    on_stage("create")
+    data, status_code = engine_client.post("/onboarding/api/v1/cloud-accounts", data=body)
+    if status_code != 409:
+        # 409: already onboarded — carry on with its credentials
+        _check(data, status_code, "create")
+
+    if not credentials:
+        return
+    on_stage("credentials")
+    data, status_code = engine_client.post(
+        f"/onboarding/api/v1/accounts/{account_id}/credentials",
+        data={"credential_type": account["credential_type"], "credentials": credentials},
+        timeout=60,
+    )
+    validation_cache.bump_version(account_id)
+    _check(data, status_code, "credentials")
+
+    if not validate:
+        return
+    on_stage("validate")
+    data, status_code = engine_client.post(
+        f"/onboarding/api/v1/cloud-accounts/{account_id}/validate-credentials",
+    )
+    _check(data, status_code, "validate")
+
+
+def _run_bulk(job_id, results, accounts, validate):
+    try:
+        _bulk(job_id, results, accounts, validate)
+    except Exception as e:
+        logger.exception("Bulk onboarding job %s failed", job_id)
+        bulk_jobs.update(job_id, status="failed", error=f"Bulk onboarding failed: {e}")
+
+
+def _bulk(job_id, results, accounts, validate):
+    bulk_jobs.update(job_id, status="running")
+    by_id = {r["account_id"]: r for r in results if r["status"] == "pending"}
+    counts = {"processed": len(results) - len(accounts), "succeeded": 0, "failed": len(results) - len(accounts)}
+    lock = threading.Lock()
+    last_publish = [0.0]
+
+    def publish(force=False):
+        now = time.monotonic()
+        if force or now - last_publish[0] >= PUBLISH_INTERVAL:
+            last_publish[0] = now
+            bulk_jobs.update(job_id, results=results, **counts)
+
+    def run(account):
+        result = by_id[account["account_id"]]
+        result["status"] = "running"
+
+        def on_stage(stage):
+            result["stage"] = stage
+
+        try:
+            onboard_account(account, validate, on_stage)
+            outcome = "succeeded"
+        except EngineError as e:
+            result["error"] = str(e)
+            outcome = "failed"
+        except Exception as e:
+            logger.exception("Bulk onboarding of %s failed", account["account_id"])
+            result["error"] = str(e)
+            outcome = "failed"
+
+        with lock:
+            result["status"] = outcome
+            counts["processed"] += 1
+            counts[outcome] += 1
+            publish()
+
+    with ThreadPoolExecutor(
+        max_workers=settings.BULK_ONBOARDING_CONCURRENCY,
+        thread_name_prefix="bulk-onboarding",
+    ) as pool:
+        list(pool.map(run, accounts))
+
+    with lock:
+        publish(force=True)
+    bulk_jobs.update(job_id, status="completed")
@@ -0,0 +1,61 @@
+"""
+Post-scan cache warming for tenant dashboards.
+
+When an orchestrated scan completes, the tenant's cached engine responses are
+invalidated and the tenant's dashboard snapshot is rebuilt in the background,
+so the first dashboard load after a scan is served from a fresh snapshot
+instead of paying every cold engine call.
+
+Only the snapshot is warmed. Warm-up requests carry no user context, so
+anything they fetch is stored under gateway_cache.SERVICE_SCOPE, which
+proxied user requests never read; pre-fetching the proxied endpoints would
+be dead work.
+"""
+import logging
+
+from django.core.cache import cache
+
+from engines import gateway_cache
+from utils.jobs import BoundedExecutor
+from . import dashboard_snapshot
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUSES = {'completed', 'complete', 'done', 'success', 'succeeded', 'finished'}
+FAILED_STATUSES = {'failed', 'error', 'cancelled', 'canceled', 'aborted'}
+
+_executor = BoundedExecutor(max_workers=2, max_pending=64, name='cache-warm')
+
+
+def scan_status(payload) -> str:
+    """Lower-cased status from an orchestration status payload ('' if absent)."""
+    if not isinstance(payload, dict):
+        return ""
+    status = payload.get("status")
+    if status is None and isinstance(payload.get("data"), dict):
+        status = payload["data"].get("status")
+    return str(status or "").lower()
+
+
+def scan_completed(payload) -> bool:
+    """Whether an orchestration status payload describes a finished scan."""
+    return scan_status(payload) in COMPLETED_STATUSES
+
+
+def schedule_warm(tenant_id, orchestration_id=None) -> bool:
+    """
+    Queue a warm-up for tenant_id. With an orchestration_id the warm-up runs
+    at most once per scan, however many status polls observe completion.
+    """
+    if not tenant_id:
+        return False
+    if orchestration_id and not cache.add(f"scan:warmed:{orchestration_id}", True, 24 * 3600):
+        return False
+    return _executor.submit(warm_tenant, tenant_id)
+
+
+def warm_tenant(tenant_id):
+    """Invalidate the tenant's cached engine responses and rebuild its dashboard snapshot."""
+    gateway_cache.invalidate_tenant(tenant_id)
+    dashboard_snapshot.refresh(tenant_id)
+    logger.info("Rebuilt dashboard snapshot for tenant %s", tenant_id)
@@ -0,0 +1,100 @@
+"""
+Minimal 5-field cron expressions for scan schedules.
+
+    minute hour day-of-month month day-of-week
+
+Each field accepts ``*``, numbers, ranges (``1-5``), steps (``*/15``,
+``0-30/10``) and comma-separated lists of those. Day-of-week is 0-6 with
+Sunday as 0 (7 is accepted as Sunday too). As in classic cron, when both
+day-of-month and day-of-week are restricted a day matching either runs.
+"""
+from datetime import datetime, timedelta
+
+FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+# Upper bound on the search for the next run (covers Feb 29 schedules)
+MAX_SEARCH_DAYS = 366 * 5
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"Invalid step '{step_text}'")
+            step = int(step_text)
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            if not (start_text.isdigit() and end_text.isdigit()):
+                raise CronError(f"Invalid range '{part}'")
+            start, end = int(start_text), int(end_text)
+        elif part.isdigit():
+            start = end = int(part)
+            if step != 1:
+                end = high
+        else:
+            raise CronError(f"Invalid value '{part}'")
+
+        if start < low or end > high or start > end:
+            raise CronError(f"'{part}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise CronError("Cron expression must have 5 fields: minute hour day month weekday")
+        self.expression = expression
+        parsed = [_parse_field(text, low, high) for text, (_, low, high) in zip(parts, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        # datetime: Monday=0 … Sunday=6; cron: Sunday=0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return in_days or in_weekdays
+        if self.day_restricted:
+            return in_days
+        if self.weekday_restricted:
+            return in_weekdays
+        return True
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after` (naive or aware, kept as-is)."""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+
+        for _ in range(MAX_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+
+        raise CronError(f"'{self.expression}' never matches")
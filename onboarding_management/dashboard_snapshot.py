@@ -0,0 +1,175 @@
+"""
+Per-tenant dashboard snapshots with stale-while-revalidate.
+
+DashboardSummaryView reads a snapshot of its four sections from the cache and
+returns it immediately. Each section records when it was fetched; sections
+older than DASHBOARD_SNAPSHOT_TTL_SECONDS (or fetched before the tenant's last
+completed scan) are still served, but a background refresh is queued for them.
+Only sections that have never been fetched are loaded inline, so after the
+first visit the dashboard's latency no longer depends on the slowest engine.
+
+A failed refresh keeps the section's last good data and records the error.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from engines import gateway_cache
+from utils.jobs import BoundedExecutor
+from .engine_client import engine_client, async_engine_client, EngineError
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 10
+
+_executor = BoundedExecutor(max_workers=2, max_pending=128, name='dashboard-refresh')
+
+
+def _sections(tenant_id, scan_run_id):
+    """section -> (engine path, params)"""
+    threat_params = {"tenant_id": tenant_id}
+    if scan_run_id:
+        threat_params["scan_run_id"] = scan_run_id
+    return {
+        "inventory": ("/inventory/api/v1/inventory/runs/latest/summary", {"tenant_id": tenant_id}),
+        "threats": ("/threat/api/v1/threat/analytics/distribution", threat_params),
+        "compliance": ("/compliance/api/v1/compliance/reports", {"tenant_id": tenant_id, "limit": 1}),
+        "accounts": ("/onboarding/api/v1/cloud-accounts", None),
+    }
+
+
+def _key(tenant_id, scan_run_id):
+    return f"dashboard:snapshot:{tenant_id}:{scan_run_id}"
+
+
+def load(tenant_id, scan_run_id=""):
+    return cache.get(_key(tenant_id, scan_run_id)) or {}
+
+
+async def aload(tenant_id, scan_run_id=""):
+    return await cache.aget(_key(tenant_id, scan_run_id)) or {}
+
+
+def _save(tenant_id, scan_run_id, updates):
+    snapshot = load(tenant_id, scan_run_id)
+    snapshot.update(updates)
+    cache.set(_key(tenant_id, scan_run_id), snapshot, settings.DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS)
+    return snapshot
+
+
+async def _asave(tenant_id, scan_run_id, updates):
+    snapshot = await aload(tenant_id, scan_run_id)
+    snapshot.update(updates)
+    await cache.aset(_key(tenant_id, scan_run_id), snapshot, settings.DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS)
+    return snapshot
+
+
+def _entry(previous, data=None, error=None, generation=0):
+    now = time.time()
+    if error is not None:
+        # Keep serving the last good data; retry after the normal TTL
+        entry = dict(previous or {"data": None, "fetched_at": None})
+        entry.update(error=error, fetched_ts=now, generation=generation)
+        return entry
+    return {
+        "data": data,
+        "fetched_at": timezone.now().isoformat(),
+        "fetched_ts": now,
+        "generation": generation,
+        "error": None,
+    }
+
+
+def is_stale(entry, generation):
+    # A bumped cache generation means a scan completed since this was fetched
+    if entry.get("generation") != generation:
+        return True
+    return time.time() - entry["fetched_ts"] > settings.DASHBOARD_SNAPSHOT_TTL_SECONDS
+
+
+def _fetch(path, params):
+    data, status_code = engine_client.get(path, params=params, timeout=FETCH_TIMEOUT)
+    if status_code != 200:
+        raise EngineError(f"Engine returned {status_code}", status_code, path)
+    if params:
+        gateway_cache.put_json(path, params, gateway_cache.SERVICE_SCOPE, data)
+    return data
+
+
+async def _afetch(path, params):
+    data = await gateway_cache.aget_json(path, params, gateway_cache.SERVICE_SCOPE) if params else None
+    if data is not None:
+        return data
+    data, status_code = await async_engine_client.get(path, params=params, timeout=FETCH_TIMEOUT)
+    if status_code != 200:
+        raise EngineError(f"Engine returned {status_code}", status_code, path)
+    if params:
+        await gateway_cache.aput_json(path, params, gateway_cache.SERVICE_SCOPE, data)
+    return data
+
+
+async def get_snapshot(tenant_id, scan_run_id=""):
+    """
+    Return (snapshot, generation, refreshing). Missing sections are fetched
+    inline; stale ones are served as-is and refreshed in the background.
+    """
+    sections = _sections(tenant_id, scan_run_id)
+    generation = await gateway_cache.ageneration(tenant_id)
+    snapshot = await aload(tenant_id, scan_run_id)
+
+    missing = [name for name in sections if name not in snapshot]
+    if missing:
+        async def fetch(name):
+            path, params = sections[name]
+            try:
+                return name, _entry(None, data=await _afetch(path, params), generation=generation)
+            except EngineError as e:
+                return name, _entry(None, error=str(e), generation=generation)
+
+        snapshot = await _asave(tenant_id, scan_run_id, dict(await asyncio.gather(*(fetch(n) for n in missing))))
+
+    stale = [name for name in sections if is_stale(snapshot[name], generation)]
+    refreshing = bool(stale) and await sync_to_async(schedule_refresh, thread_sensitive=False)(
+        tenant_id, scan_run_id, stale,
+    )
+    return snapshot, generation, refreshing
+
+
+def schedule_refresh(tenant_id, scan_run_id="", names=None) -> bool:
+    """Queue a background refresh, at most one in flight per snapshot."""
+    lock = f"dashboard:refreshing:{tenant_id}:{scan_run_id}"
+    if not cache.add(lock, True, 2 * FETCH_TIMEOUT):
+        return True
+    if not _executor.submit(refresh, tenant_id, scan_run_id, names):
+        cache.delete(lock)
+        return False
+    return True
+
+
+def refresh(tenant_id, scan_run_id="", names=None):
+    """Re-fetch sections (all by default) and store them."""
+    sections = _sections(tenant_id, scan_run_id)
+    names = names or list(sections)
+    generation = gateway_cache.generation(tenant_id)
+    previous = load(tenant_id, scan_run_id)
+
+    def fetch(name):
+        path, params = sections[name]
+        try:
+            return name, _entry(None, data=_fetch(path, params), generation=generation)
+        except EngineError as e:
+            logger.warning("Dashboard refresh of %s failed (tenant %s): %s", name, tenant_id, e)
+            return name, _entry(previous.get(name), error=str(e), generation=generation)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            updates = dict(executor.map(fetch, names))
+        _save(tenant_id, scan_run_id, updates)
+    finally:
+        cache.delete(f"dashboard:refreshing:{tenant_id}:{scan_run_id}")
@@ -1,7 +1,12 @@
-
 import os
+import asyncio
 import logging
+import threading
+import weakref
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout, ConnectionError
 
 logger = logging.getLogger(__name__)
@@ -12,6 +17,12 @@ ENGINE_BASE_URL = os.getenv(
 
 DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
 
+# Connection pool sizing. All engines sit behind one load balancer host, so
+# POOL_MAXSIZE is effectively the number of concurrent engine calls per worker.
+POOL_CONNECTIONS = int(os.getenv("ENGINE_POOL_CONNECTIONS", 4))
+POOL_MAXSIZE = int(os.getenv("ENGINE_POOL_MAXSIZE", 50))
+CONNECT_TIMEOUT = float(os.getenv("ENGINE_CONNECT_TIMEOUT", 3.05))
+
 HEALTH_PATHS = {
     "onboarding":   "/onboarding/api/v1/health",
     "discoveries":  "/discoveries/api/v1/health/live",
@@ -25,6 +36,11 @@ HEALTH_PATHS = {
     "gateway":      "/gateway/gateway/health",
 }
 
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
 
 class EngineError(Exception):
 
@@ -35,17 +51,57 @@ class EngineError(Exception):
         self.detail = detail
 
 
+def _split_timeout(timeout, default):
+    """
+    Normalize a timeout to (connect, read). A bare number is the read timeout;
+    a (connect, read) tuple is used as-is.
+    """
+    if isinstance(timeout, (tuple, list)):
+        return tuple(timeout)
+    return (CONNECT_TIMEOUT, timeout or default)
+
+
+def _unhealthy(engine_name, status):
+    return {
+        "engine": engine_name,
+        "status": status,
+        "healthy": False,
+        "details": None,
+    }
+
+
 class EngineClient:
+    """
+    Blocking client for engine calls.
+
+    requests.Session is not safe to share between threads, so each thread gets
+    its own Session; all of them mount one explicitly sized HTTPAdapter, whose
+    urllib3 pool is thread-safe and shared. Timeouts are (connect, read).
 
+    A timed-out GET/POST raises EngineError with status 504; PUT/PATCH/DELETE
+    have always reported every transport failure, timeouts included, as 502.
+    """
 
-    def __init__(self, base_url=None, default_timeout=30):
+    def __init__(self, base_url=None, default_timeout=30,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
         self.base_url = (base_url or ENGINE_BASE_URL).rstrip("/")
         self.default_timeout = default_timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        })
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            self._local.session = session
+        return session
 
     def _debug(self, message):
         logger.info(message)
@@ -55,106 +111,177 @@ class EngineClient:
     def _build_url(self, path):
         return f"{self.base_url}{path}"
 
-    def _handle_response(self, response, engine_path):
-        try:
-            data = response.json()
-        except Exception:
-            data = {"raw": response.text}
-
-        if response.status_code >= 500:
-            self._debug(f"Engine 5xx error {response.status_code} at {engine_path}")
+    def _handle_response(self, status_code, data, engine_path):
+        if status_code >= 500:
+            self._debug(f"Engine 5xx error {status_code} at {engine_path}")
             raise EngineError(
                 message=f"Engine error at {engine_path}",
-                status_code=response.status_code,
+                status_code=status_code,
                 engine=engine_path,
                 detail=data,
             )
 
-        self._debug(f"Response {response.status_code} from {engine_path}")
-        return data, response.status_code
+        self._debug(f"Response {status_code} from {engine_path}")
+        return data, status_code
 
-    def get(self, engine_path, params=None, timeout=None):
+    def _request(self, method, engine_path, timeout, timeout_status=504, **kwargs):
         url = self._build_url(engine_path)
-        timeout = timeout or self.default_timeout
 
         try:
-            self._debug(f"GET {url} params={params}")
-            response = self.session.get(url, params=params, timeout=timeout)
-            return self._handle_response(response, engine_path)
-
+            self._debug(f"{method} {url} {kwargs.get('params') or kwargs.get('json') or ''}")
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
         except Timeout:
             self._debug(f"Timeout at {engine_path}")
-            raise EngineError("Engine timeout", 504, engine_path)
-
+            raise EngineError("Engine timeout", timeout_status, engine_path)
         except ConnectionError:
             self._debug(f"Connection error at {engine_path}")
             raise EngineError("Engine unreachable", 502, engine_path)
-
         except RequestException as e:
             self._debug(f"RequestException at {engine_path}: {str(e)}")
             raise EngineError(str(e), 502, engine_path)
 
+        try:
+            data = response.json()
+        except Exception:
+            data = {"raw": response.text}
+        return self._handle_response(response.status_code, data, engine_path)
+
+    def get(self, engine_path, params=None, timeout=None):
+        return self._request(
+            "GET", engine_path, _split_timeout(timeout, self.default_timeout), params=params
+        )
+
     def post(self, engine_path, data=None, timeout=None):
-        url = self._build_url(engine_path)
-        timeout = timeout or 60
+        return self._request("POST", engine_path, _split_timeout(timeout, 60), json=data)
+
+    def put(self, engine_path, data=None, timeout=None):
+        return self._request(
+            "PUT", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502, json=data
+        )
+
+    def patch(self, engine_path, data=None, timeout=None):
+        return self._request(
+            "PATCH", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502, json=data
+        )
+
+    def delete(self, engine_path, timeout=None):
+        return self._request(
+            "DELETE", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502
+        )
+
+    def check_health(self, engine_name):
+        path = HEALTH_PATHS.get(engine_name)
+        if not path:
+            return {
+                "engine": engine_name,
+                "status": "unknown",
+                "error": "Unknown engine"
+            }
 
         try:
-            self._debug(f"POST {url} body={data}")
-            response = self.session.post(url, json=data, timeout=timeout)
-            return self._handle_response(response, engine_path)
+            data, status_code = self.get(path, timeout=5)
+            return {
+                "engine": engine_name,
+                "status": data.get("status", "unknown"),
+                "healthy": status_code == 200,
+                "details": data,
+            }
 
-        except Timeout:
-            self._debug(f"Timeout at {engine_path}")
-            raise EngineError("Engine timeout", 504, engine_path)
+        except EngineError:
+            return _unhealthy(engine_name, "unreachable")
 
-        except ConnectionError:
-            self._debug(f"Connection error at {engine_path}")
-            raise EngineError("Engine unreachable", 502, engine_path)
+    def check_all_health(self):
+        results = []
+        for engine_name in HEALTH_PATHS:
+            results.append(self.check_health(engine_name))
+        return results
 
-        except RequestException as e:
-            self._debug(f"RequestException at {engine_path}: {str(e)}")
-            raise EngineError(str(e), 502, engine_path)
 
-    def put(self, engine_path, data=None, timeout=None):
+class AsyncEngineClient(EngineClient):
+    """
+    asyncio counterpart of EngineClient with the same get/post/put/patch/delete/
+    check_health API (all coroutines). Async views can fan out engine calls with
+    asyncio.gather instead of a thread pool.
+
+    httpx.AsyncClient is bound to the event loop it was first used on, so one
+    client (and connection pool) is kept per running loop. Each client is
+    closed when its loop shuts down (asyncio.run and async_to_sync loops both
+    finalize async generators on the way out), so the short-lived loops
+    async_to_sync creates don't leak connections.
+    """
+
+    def __init__(self, base_url=None, default_timeout=30,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.base_url = (base_url or ENGINE_BASE_URL).rstrip("/")
+        self.default_timeout = default_timeout
+        self.limits = httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize,
+        )
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def _client(self):
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(headers=DEFAULT_HEADERS, limits=self.limits)
+            closer = _close_on_shutdown(client)
+            # Starting the generator registers it with the loop, whose
+            # shutdown_asyncgens() then runs its finally block
+            await closer.asend(None)
+            entry = self._clients[loop] = (client, closer)
+        return entry[0]
+
+    async def _request(self, method, engine_path, timeout, timeout_status=504, **kwargs):
         url = self._build_url(engine_path)
-        timeout = timeout or self.default_timeout
+        connect, read = timeout
 
         try:
-            self._debug(f"PUT {url} body={data}")
-            response = self.session.put(url, json=data, timeout=timeout)
-            return self._handle_response(response, engine_path)
-
-        except (Timeout, ConnectionError, RequestException) as e:
-            self._debug(f"Request failed at {engine_path}: {str(e)}")
+            self._debug(f"{method} {url} {kwargs.get('params') or kwargs.get('json') or ''}")
+            client = await self._client()
+            response = await client.request(
+                method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs
+            )
+        except httpx.TimeoutException:
+            self._debug(f"Timeout at {engine_path}")
+            raise EngineError("Engine timeout", timeout_status, engine_path)
+        except httpx.TransportError:
+            self._debug(f"Connection error at {engine_path}")
+            raise EngineError("Engine unreachable", 502, engine_path)
+        except httpx.HTTPError as e:
+            self._debug(f"HTTPError at {engine_path}: {str(e)}")
             raise EngineError(str(e), 502, engine_path)
 
-    def patch(self, engine_path, data=None, timeout=None):
-        url = self._build_url(engine_path)
-        timeout = timeout or self.default_timeout
-
         try:
-            self._debug(f"PATCH {url} body={data}")
-            response = self.session.patch(url, json=data, timeout=timeout)
-            return self._handle_response(response, engine_path)
+            data = response.json()
+        except Exception:
+            data = {"raw": response.text}
+        return self._handle_response(response.status_code, data, engine_path)
 
-        except (Timeout, ConnectionError, RequestException) as e:
-            self._debug(f"Request failed at {engine_path}: {str(e)}")
-            raise EngineError(str(e), 502, engine_path)
+    async def get(self, engine_path, params=None, timeout=None):
+        return await self._request(
+            "GET", engine_path, _split_timeout(timeout, self.default_timeout), params=params
+        )
 
-    def delete(self, engine_path, timeout=None):
-        url = self._build_url(engine_path)
-        timeout = timeout or self.default_timeout
+    async def post(self, engine_path, data=None, timeout=None):
+        return await self._request("POST", engine_path, _split_timeout(timeout, 60), json=data)
 
-        try:
-            self._debug(f"DELETE {url}")
-            response = self.session.delete(url, timeout=timeout)
-            return self._handle_response(response, engine_path)
+    async def put(self, engine_path, data=None, timeout=None):
+        return await self._request(
+            "PUT", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502, json=data
+        )
 
-        except (Timeout, ConnectionError, RequestException) as e:
-            self._debug(f"Request failed at {engine_path}: {str(e)}")
-            raise EngineError(str(e), 502, engine_path)
+    async def patch(self, engine_path, data=None, timeout=None):
+        return await self._request(
+            "PATCH", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502, json=data
+        )
 
-    def check_health(self, engine_name):
+    async def delete(self, engine_path, timeout=None):
+        return await self._request(
+            "DELETE", engine_path, _split_timeout(timeout, self.default_timeout), timeout_status=502
+        )
+
+    async def check_health(self, engine_name):
         path = HEALTH_PATHS.get(engine_name)
         if not path:
             return {
@@ -164,7 +291,7 @@ class EngineClient:
             }
 
         try:
-            data, status_code = self.get(path, timeout=5)
+            data, status_code = await self.get(path, timeout=5)
             return {
                 "engine": engine_name,
                 "status": data.get("status", "unknown"),
@@ -173,18 +300,20 @@ class EngineClient:
             }
 
         except EngineError:
-            return {
-                "engine": engine_name,
-                "status": "unreachable",
-                "healthy": False,
-                "details": None,
-            }
+            return _unhealthy(engine_name, "unreachable")
 
-    def check_all_health(self):
-        results = []
-        for engine_name in HEALTH_PATHS:
-            results.append(self.check_health(engine_name))
-        return results
+    async def check_all_health(self):
+        return list(await asyncio.gather(
+            *(self.check_health(engine_name) for engine_name in HEALTH_PATHS)
+        ))
+
+
+async def _close_on_shutdown(client):
+    try:
+        yield
+    finally:
+        await client.aclose()
 
 
-engine_client = EngineClient()
\ No newline at end of file
+engine_client = EngineClient()
+async_engine_client = AsyncEngineClient()
@@ -0,0 +1,230 @@
+"""
+Push-based job state events from the engines.
+
+Engines and the orchestrator POST job state changes to /api/internal/events/,
+signed with ENGINE_WEBHOOK_SECRET:
+
+    X-Gateway-Timestamp: <unix seconds>
+    X-Gateway-Signature: sha256=<hex HMAC-SHA256 of "<timestamp>.<raw body>">
+
+    {"event_id": "...", "source": "orchestrator", "kind": "orchestration",
+     "job_id": "...", "tenant_id": "...", "status": "completed", "data": {...}}
+
+Each event is recorded in engine_job_states (a terminal status is never
+overwritten by a late non-terminal one) and then fanned out:
+
+  - completed scans: tenant cache invalidation + dashboard warm-up
+  - any terminal state: release of the running-scan dedupe entry, and of
+    the orchestration's scan_queue slot
+  - every event: the tenant's SSE event log (see ScanEventStreamView)
+
+The event log lives in the Django cache (a per-tenant sequence counter plus
+one entry per event), so SSE subscribers on any worker see events received by
+any other worker when the cache is shared.
+"""
+import hashlib
+import hmac
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_warming import COMPLETED_STATUSES, FAILED_STATUSES, schedule_warm
+from .idempotency import release_job
+from . import scan_queue
+from .models import EngineJobState
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Gateway-Signature'
+TIMESTAMP_HEADER = 'X-Gateway-Timestamp'
+MAX_CLOCK_SKEW = 300
+TERMINAL_STATUSES = COMPLETED_STATUSES | FAILED_STATUSES
+SCAN_KINDS = {'orchestration', 'scan', 'job'}
+# Event log entries outlive any reasonable SSE reconnect gap
+EVENT_LOG_TTL = 3600
+# Most events read_since() replays for one reconnect; older ones are skipped
+MAX_REPLAY = 1000
+
+
+class InvalidEvent(Exception):
+    pass
+
+
+def verify_signature(body: bytes, timestamp: str, signature: str) -> bool:
+    secret = settings.ENGINE_WEBHOOK_SECRET
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > MAX_CLOCK_SKEW:
+            return False
+    except ValueError:
+        return False
+    expected = hmac.new(secret.encode(), timestamp.encode() + b'.' + body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def parse_event(payload):
+    if not isinstance(payload, dict):
+        raise InvalidEvent("Event must be a JSON object")
+    missing = [f for f in ('source', 'job_id', 'status') if not payload.get(f)]
+    if missing:
+        raise InvalidEvent(f"Missing required fields: {', '.join(missing)}")
+    data = payload.get('data') or {}
+    if not isinstance(data, dict):
+        raise InvalidEvent("data must be an object")
+    return {
+        'event_id': str(payload.get('event_id') or ''),
+        'source': str(payload['source']),
+        'kind': str(payload.get('kind') or 'job'),
+        'job_id': str(payload['job_id']),
+        'tenant_id': str(payload['tenant_id']) if payload.get('tenant_id') else None,
+        'status': str(payload['status']).lower(),
+        'data': data,
+    }
+
+
+def record(event, pushed=True):
+    """
+    Store the event's state. Returns (state, changed); changed is False for
+    duplicates, repeats of the current state, and late non-terminal events
+    after a terminal one (which leave the row as it was).
+    pushed=False records a state the gateway polled itself.
+    """
+    seen_key = f"events:seen:{event['event_id']}" if event['event_id'] else None
+    if seen_key and cache.get(seen_key):
+        return None, False
+    pushed_at = timezone.now() if pushed else None
+    data = {k: v for k, v in event['data'].items() if k != 'status'}
+
+    with transaction.atomic():
+        if seen_key:
+            # Marked only once the state is committed, so a failed write
+            # leaves the engine's retry of this event free to be recorded
+            transaction.on_commit(lambda: cache.set(seen_key, True, 24 * 3600))
+        state, created = EngineJobState.objects.select_for_update().get_or_create(
+            source=event['source'],
+            job_id=event['job_id'],
+            defaults={
+                'kind': event['kind'],
+                'tenant_id': event['tenant_id'],
+                'status': event['status'],
+                'payload': data,
+                'last_event_id': event['event_id'] or None,
+                'pushed_at': pushed_at,
+            },
+        )
+        if created:
+            return state, True
+        if seen_key and state.last_event_id == event['event_id']:
+            # A concurrent delivery of the same event got here first
+            return state, False
+        if state.status in TERMINAL_STATUSES and event['status'] not in TERMINAL_STATUSES:
+            return state, False
+
+        payload = dict(state.payload or {}, **data)
+        changed = state.status != event['status'] or state.payload != payload
+        state.kind = event['kind']
+        state.tenant_id = event['tenant_id'] or state.tenant_id
+        state.status = event['status']
+        state.payload = payload
+        state.last_event_id = event['event_id'] or state.last_event_id
+        state.pushed_at = pushed_at or state.pushed_at
+        state.save()
+    return state, changed
+
+
+def observe(source, kind, job_id, tenant_id, status, data):
+    """Record a polled status and fan it out if it is news."""
+    state, changed = record({
+        'event_id': '',
+        'source': source,
+        'kind': kind,
+        'job_id': job_id,
+        'tenant_id': tenant_id or None,
+        'status': status,
+        'data': data if isinstance(data, dict) else {},
+    }, pushed=False)
+    if changed:
+        fan_out(state)
+    return state
+
+
+def is_current(state):
+    """
+    Whether a recorded state can be served without asking the engine: terminal
+    states always, others while the engine has pushed recently.
+    """
+    if state.status in TERMINAL_STATUSES:
+        return True
+    if state.pushed_at is None:
+        return False
+    age = (timezone.now() - state.pushed_at).total_seconds()
+    return age < settings.ENGINE_EVENT_TRUST_SECONDS
+
+
+def fan_out(state):
+    """Side effects of a state change."""
+    status = state.status
+    if status in TERMINAL_STATUSES:
+        release_job(state.job_id)
+        if state.kind == 'orchestration':
+            scan_queue.finish(state.job_id, status)
+    if status in COMPLETED_STATUSES:
+        if state.kind in SCAN_KINDS and state.tenant_id:
+            schedule_warm(state.tenant_id, state.job_id)
+    if state.tenant_id:
+        publish(state.tenant_id, {
+            'source': state.source,
+            'kind': state.kind,
+            'job_id': state.job_id,
+            'status': status,
+            'data': state.payload,
+            'updated_at': state.updated_at.isoformat(),
+        })
+
+
+def _seq_key(tenant_id):
+    return f"events:seq:{tenant_id}"
+
+
+def publish(tenant_id, event):
+    key = _seq_key(tenant_id)
+    cache.add(key, 0, None)
+    try:
+        seq = cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+        seq = 1
+    cache.set(f"events:{tenant_id}:{seq}", event, EVENT_LOG_TTL)
+    return seq
+
+
+def latest_seq(tenant_id):
+    return cache.get(_seq_key(tenant_id), 0)
+
+
+def read_since(tenant_id, after_seq):
+    """
+    Events with seq > after_seq, as [(seq, event)], skipping expired ones and
+    anything older than the last MAX_REPLAY.
+    """
+    last = latest_seq(tenant_id)
+    start = max(after_seq, last - MAX_REPLAY, 0)
+    if last <= start:
+        return []
+    seqs = range(start + 1, last + 1)
+    keys = [f"events:{tenant_id}:{seq}" for seq in seqs]
+    found = cache.get_many(keys)
+    return [(seq, found[key]) for seq, key in zip(seqs, keys) if key in found]
+
+
+def local_state(job_id, source=None):
+    """Most recent recorded state for a job id, or None."""
+    queryset = EngineJobState.objects.filter(job_id=job_id)
+    if source:
+        queryset = queryset.filter(source=source)
+    return queryset.order_by('-updated_at').first()
@@ -0,0 +1,157 @@
+"""
+Background engine health monitor.
+
+Each worker runs one daemon thread that wakes every
+ENGINE_HEALTH_INTERVAL_SECONDS (plus random jitter, so replicas don't probe in
+lockstep). Probing is leader-elected through the Django cache: time is cut
+into interval-long slots and the first worker to cache.add() a slot's leader
+key probes every engine in HEALTH_PATHS concurrently and publishes a snapshot;
+the others just pick that snapshot up. A new leader continues the rolling
+window of the last published snapshot. With a per-process cache (LocMemCache)
+every worker is its own leader.
+
+The snapshot keeps a rolling window of the last ENGINE_HEALTH_HISTORY probes
+per engine, with uptime and latency percentiles, so EngineHealthView can answer
+from memory instead of probing ten engines on every request.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .engine_client import async_engine_client, HEALTH_PATHS
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "engine-health:leader"
+SNAPSHOT_KEY = "engine-health:snapshot"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class HealthMonitor:
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.interval = settings.ENGINE_HEALTH_INTERVAL_SECONDS
+        self.jitter = settings.ENGINE_HEALTH_JITTER_SECONDS
+        self.history = {name: deque(maxlen=settings.ENGINE_HEALTH_HISTORY) for name in HEALTH_PATHS}
+        self._snapshot = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._loop = None
+
+    def start(self):
+        """Start the monitor thread for this worker (idempotent)."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="engine-health", daemon=True)
+            self._thread.start()
+
+    def snapshot(self):
+        """
+        Latest snapshot, or None if there is none or it is older than three
+        intervals (the leader died and nobody has taken over yet).
+        """
+        return self._fresh(cache.get(SNAPSHOT_KEY) or self._snapshot)
+
+    async def asnapshot(self):
+        """snapshot() for async views."""
+        return self._fresh(await cache.aget(SNAPSHOT_KEY) or self._snapshot)
+
+    def _fresh(self, snapshot):
+        if snapshot is None:
+            return None
+        if time.time() - snapshot["checked_ts"] > 3 * self.interval + self.jitter:
+            return None
+        return snapshot
+
+    async def probe(self):
+        """Probe every engine concurrently; returns [(result, latency_ms), ...]."""
+        async def timed(name):
+            started = time.monotonic()
+            result = await async_engine_client.check_health(name)
+            return result, round((time.monotonic() - started) * 1000, 1)
+
+        return await asyncio.gather(*(timed(name) for name in HEALTH_PATHS))
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        while True:
+            try:
+                if self._is_leader():
+                    self._probe_and_publish()
+                else:
+                    self._snapshot = cache.get(SNAPSHOT_KEY) or self._snapshot
+            except Exception:
+                logger.exception("Engine health monitor cycle failed")
+            time.sleep(self.interval + random.uniform(0, self.jitter))
+
+    def _is_leader(self):
+        # cache.add is atomic, so exactly one worker wins each slot; there is
+        # no lock to renew and hence no get-then-set race between replicas
+        slot = int(time.time() // max(self.interval, 1))
+        if not cache.add(f"{LEADER_KEY}:{slot}", self.worker_id, 2 * self.interval + self.jitter):
+            return False
+        self._adopt_history()
+        return True
+
+    def _adopt_history(self):
+        # Continue the last published rolling window, unless it is our own
+        previous = cache.get(SNAPSHOT_KEY)
+        if not previous or previous.get("checked_by") == self.worker_id:
+            return
+        for engine in previous["engines"]:
+            window = self.history.get(engine["engine"])
+            if window is not None:
+                window.clear()
+                window.extend(tuple(s) for s in engine.get("history", {}).get("samples") or [])
+
+    def _probe_and_publish(self):
+        results = self._loop.run_until_complete(self.probe())
+        now = time.time()
+        engines = []
+
+        for result, latency_ms in results:
+            window = self.history[result["engine"]]
+            window.append((now, bool(result.get("healthy")), latency_ms))
+            latencies = [s[2] for s in window if s[1]]
+            engines.append(dict(
+                result,
+                latency_ms=latency_ms,
+                history={
+                    "samples": [list(s) for s in window],
+                    "uptime": round(sum(1 for s in window if s[1]) / len(window), 4),
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "p99_ms": percentile(latencies, 99),
+                },
+            ))
+
+        self._snapshot = {
+            "engines": engines,
+            "checked_at": timezone.now().isoformat(),
+            "checked_ts": now,
+            "checked_by": self.worker_id,
+        }
+        cache.set(SNAPSHOT_KEY, self._snapshot, 3 * self.interval + self.jitter)
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,243 @@
+"""
+Duplicate protection for scan triggers.
+
+Two independent layers, both used by the scan-trigger endpoints:
+
+idempotent()
+    Honours an ``Idempotency-Key`` request header. The first request with a key
+    runs and its response is stored in the idempotency_keys table for
+    IDEMPOTENCY_KEY_TTL_SECONDS; retries with the same key and body replay it
+    (with ``Idempotent-Replayed: true``), a retry while the first is still
+    running gets 409, and reusing a key with a different body gets 422.
+    5xx responses are not stored, so the client can retry them. A running
+    request holds its key for IDEMPOTENCY_LEASE_SECONDS; a retry after that
+    (the first worker died mid-request) takes the key over and runs again.
+
+deduplicated_scan()
+    Works without any client cooperation: a scan for the same
+    (engine, tenant, provider, hierarchy/account) as one that is still running
+    returns the running scan's original response (``X-Scan-Deduplicated:
+    true``) instead of starting a second one. Running scans are tracked in the
+    cache; liveness is re-checked against the engine's job status endpoint, and
+    ScanStatusView releases an orchestration as soon as it sees it finish.
+"""
+import hashlib
+import json
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .cache_warming import scan_status, COMPLETED_STATUSES, FAILED_STATUSES
+from .engine_client import engine_client, EngineError
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a scan may take to be accepted by the engine before its claim lapses
+STARTING_TTL = 300
+# Body fields naming what a scan targets, in order of preference
+PROVIDER_FIELDS = ('provider', 'provider_type', 'csp')
+TARGET_FIELDS = ('hierarchy_id', 'account_id', 'account_ids')
+
+
+def _error(message, status):
+    return JsonResponse(
+        {"success": False, "message": message, "data": None, "pagination": None},
+        status=status,
+    )
+
+
+def _replay(status, content_type, body, header):
+    response = HttpResponse(content=bytes(body), status=status, content_type=content_type)
+    response[header] = 'true'
+    return response
+
+
+def idempotent(request, scope, owner, execute):
+    """Run execute() at most once per (scope, owner, Idempotency-Key)."""
+    key = request.headers.get(HEADER, '').strip()
+    if not key:
+        return execute()
+    if len(key) > MAX_KEY_LENGTH:
+        return _error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+
+    request_hash = hashlib.sha256(request.body).hexdigest()
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    lookup = {'scope': scope, 'owner': owner or '', 'key': key}
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                request_hash=request_hash,
+                lease_expires_at=lease,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                **lookup,
+            )
+    except IntegrityError:
+        existing = IdempotencyKey.objects.filter(**lookup).first()
+        if existing is None or existing.expires_at <= now:
+            # Expired (or just released after a failure) — claim it afresh
+            IdempotencyKey.objects.filter(**lookup, expires_at__lte=now).delete()
+            return idempotent(request, scope, owner, execute)
+        if existing.request_hash != request_hash:
+            return _error(f"{HEADER} was already used with a different request body", 422)
+        if existing.status == 'completed':
+            return _replay(
+                existing.response_status, existing.response_content_type,
+                existing.response_body, 'Idempotent-Replayed',
+            )
+        if not _take_over(existing, now, lease):
+            return _error(f"A request with this {HEADER} is still in progress", 409)
+        logger.info("Taking over stale %s request %s", HEADER, existing)
+        record = existing
+
+    if random.random() < 0.01:
+        IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+
+    # Only while this request still holds the lease: after a takeover the key is the new owner's
+    held = IdempotencyKey.objects.filter(pk=record.pk, status='in_progress', lease_expires_at=lease)
+    try:
+        response = execute()
+    except Exception:
+        held.delete()
+        raise
+
+    if response.status_code >= 500 or getattr(response, 'streaming', False):
+        held.delete()
+        return response
+
+    held.update(
+        status='completed',
+        response_status=response.status_code,
+        response_content_type=response.get('Content-Type', 'application/json'),
+        response_body=response.content,
+    )
+    return response
+
+
+def _take_over(record, now, lease):
+    """Claim an in_progress key whose lease ran out; False if it is live or someone else won."""
+    stale = Q(lease_expires_at__lte=now) | Q(
+        lease_expires_at__isnull=True,
+        created_at__lte=now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+    )
+    claimed = IdempotencyKey.objects.filter(stale, pk=record.pk, status='in_progress').update(
+        lease_expires_at=lease,
+    )
+    return claimed == 1
+
+
+def scan_fingerprint(kind, body):
+    """Identity of a scan request, or None when the body doesn't name a tenant."""
+    if not isinstance(body, dict) or not body.get('tenant_id'):
+        return None
+    provider = next((body[f] for f in PROVIDER_FIELDS if body.get(f)), None)
+    target = next((body[f] for f in TARGET_FIELDS if body.get(f)), None)
+    raw = json.dumps([kind, str(body['tenant_id']), provider, target], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _inflight_key(fingerprint):
+    return f"scan:inflight:{fingerprint}"
+
+
+def _job_key(job_id):
+    return f"scan:inflight-job:{job_id}"
+
+
+def _find_id(content, id_fields):
+    try:
+        payload = json.loads(content)
+    except (TypeError, ValueError):
+        return None
+    for candidate in (payload, payload.get('data') if isinstance(payload, dict) else None):
+        if isinstance(candidate, dict):
+            for field in id_fields:
+                if candidate.get(field):
+                    return str(candidate[field])
+    return None
+
+
+def _still_running(entry):
+    try:
+        data, status_code = engine_client.get(entry['status_path'], timeout=5)
+    except EngineError:
+        # Can't tell; keep treating it as running until the entry expires
+        return True
+    if status_code == 404:
+        return False
+    return scan_status(data) not in COMPLETED_STATUSES | FAILED_STATUSES
+
+
+def deduplicated_scan(kind, body, execute, status_path=None, id_fields=('job_id',)):
+    """
+    Start a scan unless an identical one is already running.
+
+    status_path: engine path template with {job_id} for checking the scan's
+    status. Without it the scan is treated as synchronous and is only guarded
+    while execute() runs.
+    """
+    fingerprint = scan_fingerprint(kind, body)
+    if fingerprint is None:
+        return execute()
+    key = _inflight_key(fingerprint)
+
+    if not cache.add(key, {'state': 'starting'}, STARTING_TTL):
+        existing = cache.get(key) or {'state': 'starting'}
+        if existing['state'] == 'starting':
+            return _error("An identical scan is already being started", 409)
+        if _still_running(existing):
+            logger.info("Returning running %s scan %s instead of starting a duplicate", kind, existing['job_id'])
+            return _replay(
+                existing['status'], existing['content_type'], existing['body'], 'X-Scan-Deduplicated',
+            )
+        release(fingerprint)
+        if not cache.add(key, {'state': 'starting'}, STARTING_TTL):
+            return _error("An identical scan is already being started", 409)
+
+    try:
+        response = execute()
+    except Exception:
+        cache.delete(key)
+        raise
+
+    job_id = _find_id(response.content, id_fields) if response.status_code < 400 else None
+    if not (status_path and job_id):
+        cache.delete(key)
+        return response
+
+    ttl = settings.SCAN_INFLIGHT_TTL_SECONDS
+    cache.set(key, {
+        'state': 'running',
+        'job_id': job_id,
+        'status_path': status_path.format(job_id=job_id),
+        'status': response.status_code,
+        'content_type': response.get('Content-Type', 'application/json'),
+        'body': response.content,
+    }, ttl)
+    cache.set(_job_key(job_id), fingerprint, ttl)
+    return response
+
+
+def release(fingerprint):
+    entry = cache.get(_inflight_key(fingerprint))
+    if entry and entry.get('job_id'):
+        cache.delete(_job_key(entry['job_id']))
+    cache.delete(_inflight_key(fingerprint))
+
+
+def release_job(job_id):
+    """Forget a finished scan (e.g. once its orchestration reports completion)."""
+    fingerprint = cache.get(_job_key(job_id))
+    if fingerprint:
+        release(fingerprint)
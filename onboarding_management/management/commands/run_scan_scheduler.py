@@ -0,0 +1,47 @@
+"""
+Management command: run_scan_scheduler
+
+Queues due ScanSchedule rows and runs the scan dispatch queue (see
+onboarding_management.scheduler and onboarding_management.scan_queue for
+jitter, priority and fair-queuing rules).
+
+Usage:
+    python manage.py run_scan_scheduler          # run forever
+    python manage.py run_scan_scheduler --once   # single pass (e.g. from cron)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Queue scheduled scans and dispatch queued scans within the in-flight limits, fairly per tenant.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single scheduler pass and exit')
+        parser.add_argument(
+            '--interval', type=int, default=settings.SCAN_SCHEDULER_TICK_SECONDS,
+            help='Seconds between scheduler passes',
+        )
+
+    def handle(self, *args, **options):
+        from onboarding_management.scheduler import run_tick
+
+        self.stdout.write(
+            f"Scan scheduler started (max {settings.SCAN_DISPATCH_MAX_IN_FLIGHT} scans in flight, "
+            f"{settings.SCAN_SCHEDULER_MAX_CONCURRENT} scheduled)"
+        )
+        while True:
+            close_old_connections()
+            try:
+                queued, started = run_tick()
+                if queued or started:
+                    self.stdout.write(f"Queued {queued} scheduled scan(s), started {started} scan(s)")
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"Scheduler pass failed: {exc}"))
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:03
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tenant_management', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanSchedule',
+            fields=[
+                ('id', models.TextField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('account_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('provider', models.CharField(max_length=50)),
+                ('hierarchy_id', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('cron', models.CharField(max_length=100)),
+                ('timezone', models.CharField(default='UTC', max_length=64)),
+                ('jitter_seconds', models.PositiveIntegerField(default=900)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('is_enabled', models.BooleanField(default=True)),
+                ('next_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('last_orchestration_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scan_schedules_created', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_schedules', to='tenant_management.tenants')),
+            ],
+            options={
+                'db_table': 'scan_schedules',
+                'indexes': [models.Index(fields=['tenant'], name='scan_schedu_tenant__f299eb_idx'), models.Index(fields=['is_enabled', 'next_run_at'], name='scan_schedu_is_enab_a38eb8_idx'), models.Index(fields=['last_status'], name='scan_schedu_last_st_de7671_idx')],
+            },
+        ),
+    ]
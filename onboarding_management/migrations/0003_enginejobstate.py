@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:09
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onboarding_management', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngineJobState',
+            fields=[
+                ('id', models.TextField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source', models.CharField(max_length=50)),
+                ('job_id', models.CharField(max_length=255)),
+                ('kind', models.CharField(default='job', max_length=50)),
+                ('tenant_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('last_event_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'engine_job_states',
+                'indexes': [models.Index(fields=['job_id'], name='engine_job__job_id_57e487_idx'), models.Index(fields=['tenant_id', 'updated_at'], name='engine_job__tenant__7d8049_idx')],
+                'unique_together': {('source', 'job_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onboarding_management', '0003_enginejobstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanDispatch',
+            fields=[
+                ('id', models.TextField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tenant_id', models.CharField(max_length=255)),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'manual'), (1, 'scheduled'), (2, 'bulk')], default=0)),
+                ('fingerprint', models.CharField(blank=True, max_length=64, null=True)),
+                ('body', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(default='queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('orchestration_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dispatches', to='onboarding_management.scanschedule')),
+            ],
+            options={
+                'db_table': 'scan_dispatches',
+                'indexes': [models.Index(fields=['status', 'priority', 'created_at'], name='scan_dispat_status_07db7e_idx'), models.Index(fields=['tenant_id', 'status'], name='scan_dispat_tenant__8f9b83_idx'), models.Index(fields=['orchestration_id'], name='scan_dispat_orchest_9eb2e5_idx'), models.Index(fields=['fingerprint', 'status'], name='scan_dispat_fingerp_6d2609_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:47
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onboarding_management', '0005_idempotency_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CredentialVersion',
+            fields=[
+                ('id', models.TextField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('account_id', models.CharField(max_length=255, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'credential_versions',
+            },
+        ),
+    ]
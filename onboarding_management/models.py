@@ -0,0 +1,205 @@
+import uuid
+from django.db import models
+from django.conf import settings
+from tenant_management.models import Tenants
+
+
+class ScanSchedule(models.Model):
+    """
+    Cron-style recurring scan for a tenant (or a single account in it).
+    Dispatched by the run_scan_scheduler command.
+    """
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    tenant = models.ForeignKey(
+        Tenants,
+        on_delete=models.CASCADE,
+        related_name='scan_schedules'
+    )
+    account_id = models.CharField(max_length=255, blank=True, null=True)
+    provider = models.CharField(max_length=50)
+    hierarchy_id = models.CharField(max_length=255)
+
+    name = models.CharField(max_length=255)
+    cron = models.CharField(max_length=100)
+    timezone = models.CharField(max_length=64, default='UTC')
+    # Runs start up to this many seconds after the cron time (fixed per schedule)
+    jitter_seconds = models.PositiveIntegerField(default=900)
+    # Extra fields merged into the orchestrate request body
+    payload = models.JSONField(default=dict, blank=True)
+    is_enabled = models.BooleanField(default=True)
+
+    next_run_at = models.DateTimeField(blank=True, null=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_status = models.CharField(max_length=50, blank=True, null=True)
+    last_orchestration_id = models.CharField(max_length=255, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='scan_schedules_created'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'scan_schedules'
+        indexes = [
+            models.Index(fields=['tenant']),
+            models.Index(fields=['is_enabled', 'next_run_at']),
+            models.Index(fields=['last_status']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.cron})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for a request sent with an Idempotency-Key header, so a
+    retried scan trigger replays the first response instead of starting again.
+    """
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    key = models.CharField(max_length=255)
+    # Endpoint the key was used on, e.g. 'scan-trigger', 'check-scan'
+    scope = models.CharField(max_length=100)
+    # user_id (or tenant_id for unauthenticated onboarding calls)
+    owner = models.CharField(max_length=255, blank=True, default='')
+    request_hash = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=20, default='in_progress')
+    # Until when the in_progress request owns the key; a retry after that takes it over
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_content_type = models.CharField(max_length=255, blank=True, null=True)
+    response_body = models.BinaryField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        unique_together = ('scope', 'owner', 'key')
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+class CredentialVersion(models.Model):
+    """
+    Version of an account's stored credentials, bumped whenever they are
+    stored or deleted. Cached validation results are keyed on it (see
+    validation_cache), so results for old credentials are never served by
+    any worker.
+    """
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    account_id = models.CharField(max_length=255, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'credential_versions'
+
+    def __str__(self):
+        return f"{self.account_id} v{self.version}"
+
+
+class EngineJobState(models.Model):
+    """
+    Last known state of an engine job/orchestration, as pushed by the engines
+    to /api/internal/events/. Lets status endpoints answer without polling.
+    """
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    # Emitting engine, e.g. 'orchestrator', 'inventory', 'threat', 'compliance'
+    source = models.CharField(max_length=50)
+    job_id = models.CharField(max_length=255)
+    # 'orchestration', 'scan', 'job' or 'report'
+    kind = models.CharField(max_length=50, default='job')
+    tenant_id = models.CharField(max_length=255, blank=True, null=True)
+
+    status = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    last_event_id = models.CharField(max_length=255, blank=True, null=True)
+    # Last time the engine pushed an event (null when only ever polled)
+    pushed_at = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'engine_job_states'
+        unique_together = ('source', 'job_id')
+        indexes = [
+            models.Index(fields=['job_id']),
+            models.Index(fields=['tenant_id', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.source}:{self.job_id} {self.status}"
+
+
+class ScanDispatch(models.Model):
+    """
+    Orchestrate request waiting for (or holding) one of the gateway's scan
+    slots. Dispatched by onboarding_management.scan_queue in priority and
+    per-tenant fair-share order.
+    """
+    PRIORITY_MANUAL = 0
+    PRIORITY_SCHEDULED = 1
+    PRIORITY_BULK = 2
+    PRIORITY_CHOICES = [
+        (PRIORITY_MANUAL, 'manual'),
+        (PRIORITY_SCHEDULED, 'scheduled'),
+        (PRIORITY_BULK, 'bulk'),
+    ]
+
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    tenant_id = models.CharField(max_length=255)
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_MANUAL)
+    schedule = models.ForeignKey(
+        ScanSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dispatches'
+    )
+    # Same tenant/provider/target as another queued or running scan
+    fingerprint = models.CharField(max_length=64, blank=True, null=True)
+    body = models.JSONField(default=dict, blank=True)
+
+    # queued -> dispatching -> running -> completed / failed / timed_out
+    status = models.CharField(max_length=20, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    orchestration_id = models.CharField(max_length=255, blank=True, null=True)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    dispatched_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'scan_dispatches'
+        indexes = [
+            models.Index(fields=['status', 'priority', 'created_at']),
+            models.Index(fields=['tenant_id', 'status']),
+            models.Index(fields=['orchestration_id']),
+            models.Index(fields=['fingerprint', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} {self.get_priority_display()} {self.status}"
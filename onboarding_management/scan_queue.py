@@ -0,0 +1,470 @@
+"""
+Gateway-side dispatch queue for orchestrated scans.
+
+Scan triggers, scheduled scans and bulk scans are enqueued as ScanDispatch rows
+and sent to the orchestrator only while fewer than
+SCAN_DISPATCH_MAX_IN_FLIGHT scans are running, so one tenant starting scans
+for hundreds of accounts can't occupy the discovery/check/threat pipelines
+for hours while everyone else waits.
+
+Dispatch order:
+
+  - priority classes are strict: manual before scheduled before bulk. Since
+    scans run for a long time and can't be pre-empted, the lower classes are
+    also capped (SCAN_SCHEDULER_MAX_CONCURRENT for scheduled,
+    SCAN_DISPATCH_BULK_MAX_IN_FLIGHT for bulk) so some slots are always left
+    for manual scans;
+  - within a class, tenants share slots by weighted fair queuing: the next
+    scan comes from the tenant with the fewest in-flight scans per unit of
+    weight (SCAN_DISPATCH_TENANT_WEIGHTS, default 1), oldest first on ties;
+  - each tenant's own scans go out in the order they were queued.
+
+pump() is run inline by a trigger (so an idle gateway still starts scans
+immediately), in the background when a scan finishes, and on every
+run_scan_scheduler tick, which also polls running scans that haven't pushed
+a state change recently and times out the ones that never finish. Web
+workers do the same every SCAN_DISPATCH_POLL_SECONDS from a daemon thread
+(started by the first trigger or status lookup), so slots are freed even
+without the scheduler process, webhooks or a client watching the scan.
+
+Claims are serialised across workers and replicas by a transaction-scoped
+PostgreSQL advisory lock held while the in-flight scans are counted and the
+next ones marked. A pump waits for the lock rather than giving up, so a
+trigger is never left queued just because another pump was running.
+"""
+import heapq
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from utils.jobs import BoundedExecutor
+from .cache_warming import COMPLETED_STATUSES, FAILED_STATUSES, scan_status
+from .engine_client import engine_client, EngineError
+from .idempotency import scan_fingerprint
+from .models import ScanDispatch, ScanSchedule
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {label: value for value, label in ScanDispatch.PRIORITY_CHOICES}
+IN_FLIGHT_STATUSES = ('dispatching', 'running')
+# Statuses that make a new trigger for the same target a duplicate
+ACTIVE_STATUSES = ('queued',) + IN_FLIGHT_STATUSES
+# A claim older than this was left by a process that died mid-dispatch
+DISPATCH_STALE_AFTER = timedelta(minutes=5)
+# Engine errors worth retrying later rather than failing the scan
+RETRY_STATUS_CODES = {502, 503, 504}
+MAX_ATTEMPTS = 3
+# pg_advisory_xact_lock key for claims ("SCAN")
+PUMP_LOCK_ID = 0x5343414E
+# pg_advisory_xact_lock(SUBMIT_LOCK_ID, hashtext(fingerprint)) key space for submits ("SUBM")
+SUBMIT_LOCK_ID = 0x5355424D
+MONITOR_LOCK_KEY = 'scan-queue:monitor:lock'
+POSITIONS_KEY = 'scan-queue:positions'
+POSITIONS_TTL = 5
+RUN_ESTIMATE_KEY = 'scan-queue:run-seconds'
+
+_executor = BoundedExecutor(max_workers=4, max_pending=64, name='scan-dispatch')
+
+
+def tenant_weight(tenant_id):
+    return max(settings.SCAN_DISPATCH_TENANT_WEIGHTS.get(str(tenant_id), 1), 1)
+
+
+def class_limit(priority):
+    """In-flight cap for a priority class (None = only the global limit)."""
+    if priority == ScanDispatch.PRIORITY_SCHEDULED:
+        return settings.SCAN_SCHEDULER_MAX_CONCURRENT
+    if priority == ScanDispatch.PRIORITY_BULK:
+        return settings.SCAN_DISPATCH_BULK_MAX_IN_FLIGHT
+    return None
+
+
+def dispatch_order(queued, loads):
+    """
+    Yield queued dispatches in the order they should be started.
+    loads: tenant_id -> scans already in flight (not modified).
+    """
+    loads = Counter(loads)
+    by_class = OrderedDict()
+    for item in sorted(queued, key=lambda d: (d.priority, d.created_at)):
+        by_class.setdefault(item.priority, OrderedDict()).setdefault(item.tenant_id, deque()).append(item)
+
+    for queues in by_class.values():
+        heap = [
+            (loads[tenant_id] / tenant_weight(tenant_id), items[0].created_at, tenant_id)
+            for tenant_id, items in queues.items()
+        ]
+        heapq.heapify(heap)
+        while heap:
+            _, _, tenant_id = heapq.heappop(heap)
+            items = queues[tenant_id]
+            yield items.popleft()
+            loads[tenant_id] += 1
+            if items:
+                heapq.heappush(heap, (loads[tenant_id] / tenant_weight(tenant_id), items[0].created_at, tenant_id))
+
+
+def submit(tenant_id, body, priority=ScanDispatch.PRIORITY_MANUAL, schedule=None, dispatch_now=True):
+    """
+    Queue an orchestrate request. Returns (dispatch, created); an identical
+    scan that is already queued or running is returned instead of a new one.
+    With dispatch_now the queue is pumped and, if this scan gets a slot, it is
+    sent to the orchestrator before returning.
+    """
+    queue_monitor.start()
+    fingerprint = scan_fingerprint('orchestrate', body)
+    with transaction.atomic(), _submit_lock(fingerprint):
+        if fingerprint:
+            existing = ScanDispatch.objects.filter(
+                fingerprint=fingerprint, status__in=ACTIVE_STATUSES,
+            ).order_by('created_at').first()
+            if existing is not None:
+                return existing, False
+
+        dispatch = ScanDispatch.objects.create(
+            tenant_id=str(tenant_id),
+            priority=priority,
+            schedule=schedule,
+            fingerprint=fingerprint,
+            body=body,
+        )
+    cache.delete(POSITIONS_KEY)
+    if dispatch_now:
+        pump(inline_id=dispatch.id)
+        dispatch.refresh_from_db()
+    return dispatch, True
+
+
+_local_submit_lock = threading.Lock()
+
+
+@contextmanager
+def _submit_lock(fingerprint):
+    """
+    Serialise submits of the same scan until the surrounding transaction
+    ends, so the duplicate check and the insert can't interleave. PostgreSQL
+    takes an advisory lock (seen by every worker and replica); other
+    backends, which run a single process, a process-wide lock.
+    """
+    if not fingerprint:
+        yield
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [SUBMIT_LOCK_ID, fingerprint])
+        yield
+    else:
+        with _local_submit_lock:
+            yield
+
+
+def _claim(now):
+    """
+    Mark the next dispatches that fit in the free slots as 'dispatching'.
+    On PostgreSQL the count and the claim run under an advisory lock that
+    blocks other claims until the transaction ends; other backends (SQLite
+    in development) run a single process.
+    """
+    if connection.vendor != 'postgresql':
+        return _claim_slots(now)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [PUMP_LOCK_ID])
+        return _claim_slots(now)
+
+
+def _claim_slots(now):
+    in_flight = list(
+        ScanDispatch.objects.filter(status__in=IN_FLIGHT_STATUSES).values_list('tenant_id', 'priority')
+    )
+    free = settings.SCAN_DISPATCH_MAX_IN_FLIGHT - len(in_flight)
+    if free <= 0:
+        return []
+
+    # Only the first `free` queued scans of each tenant/class can be picked this
+    # round, so a tenant with thousands queued doesn't crowd the others out of
+    # the candidate set.
+    candidates = ScanDispatch.objects.filter(status='queued').annotate(
+        rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('tenant_id'), F('priority')],
+            order_by=F('created_at').asc(),
+        ),
+    ).filter(rank__lte=free)
+
+    class_counts = Counter(priority for _, priority in in_flight)
+    claimed = []
+    for item in dispatch_order(candidates, Counter(tenant_id for tenant_id, _ in in_flight)):
+        if len(claimed) >= free:
+            break
+        limit = class_limit(item.priority)
+        if limit is not None and class_counts[item.priority] >= limit:
+            continue
+        class_counts[item.priority] += 1
+        claimed.append(item.id)
+
+    if not claimed:
+        return []
+    with transaction.atomic():
+        rows = list(ScanDispatch.objects.select_for_update().filter(id__in=claimed, status='queued'))
+        for item in rows:
+            item.status = 'dispatching'
+            item.dispatched_at = now
+            item.attempts += 1
+            item.save(update_fields=['status', 'dispatched_at', 'attempts', 'updated_at'])
+    return rows
+
+
+def pump(inline_id=None, wait=False):
+    """
+    Start as many queued scans as the limits allow. The scan with id
+    inline_id (or all of them, with wait=True) is dispatched in the calling
+    thread; the rest in the background. Returns the number started.
+    """
+    claimed = _claim(timezone.now())
+    if claimed:
+        cache.delete(POSITIONS_KEY)
+
+    for item in claimed:
+        if wait or item.id == str(inline_id):
+            _dispatch(item)
+        elif not _executor.submit(_dispatch, item):
+            ScanDispatch.objects.filter(id=item.id, status='dispatching').update(
+                status='queued', attempts=F('attempts') - 1,
+            )
+    return len(claimed)
+
+
+def schedule_pump():
+    """Pump in the background (e.g. after a scan frees its slot)."""
+    return _executor.submit(pump)
+
+
+def _dispatch(item):
+    try:
+        data, status_code = engine_client.post(
+            "/gateway/gateway/orchestrate",
+            data=item.body,
+            timeout=120,
+        )
+        error = None
+    except EngineError as e:
+        data, status_code, error = {"engine": e.engine, "detail": e.detail}, e.status_code, str(e)
+
+    orchestration_id = None
+    if isinstance(data, dict):
+        nested = data.get('data') if isinstance(data.get('data'), dict) else {}
+        orchestration_id = data.get('orchestration_id') or nested.get('orchestration_id')
+
+    item.response_status = status_code
+    item.response = data
+    if status_code < 400 and orchestration_id:
+        item.status = 'running'
+        item.orchestration_id = str(orchestration_id)
+        item.error = None
+    elif status_code < 400:
+        # Accepted without an id to follow: nothing could free the slot, and a
+        # retry might start the scan twice
+        item.status = 'failed'
+        item.finished_at = timezone.now()
+        item.response_status = 502
+        item.error = "Orchestrator response has no orchestration_id"
+        logger.warning("Scan dispatch %s failed: %s", item.id, item.error)
+    elif status_code in RETRY_STATUS_CODES and item.attempts < MAX_ATTEMPTS:
+        logger.warning("Scan dispatch %s failed (%s), requeueing", item.id, status_code)
+        item.status = 'queued'
+        item.error = error or f"Orchestrate returned {status_code}"
+    else:
+        item.status = 'failed'
+        item.finished_at = timezone.now()
+        item.error = error or f"Orchestrate returned {status_code}: {str(data)[:500]}"
+        logger.warning("Scan dispatch %s failed: %s", item.id, item.error)
+    item.save(update_fields=[
+        'status', 'orchestration_id', 'response_status', 'response', 'error', 'finished_at', 'updated_at',
+    ])
+    _sync_schedule(item)
+
+
+def _sync_schedule(item):
+    if not item.schedule_id:
+        return
+    fields = {'last_status': item.status, 'last_error': item.error}
+    if item.orchestration_id:
+        fields['last_orchestration_id'] = item.orchestration_id
+    ScanSchedule.objects.filter(id=item.schedule_id).update(updated_at=timezone.now(), **fields)
+
+
+def finish(orchestration_id, status, error=None):
+    """Free the slot of a finished orchestration and start the next scan."""
+    if status in COMPLETED_STATUSES:
+        outcome = 'completed'
+    elif status == 'timed_out':
+        outcome = 'timed_out'
+    else:
+        outcome = 'failed'
+    with transaction.atomic():
+        rows = list(ScanDispatch.objects.select_for_update().filter(
+            orchestration_id=orchestration_id, status='running',
+        ))
+        for item in rows:
+            item.status = outcome
+            item.finished_at = timezone.now()
+            item.error = error or (None if outcome == 'completed' else f"Scan {status}")
+            item.save(update_fields=['status', 'finished_at', 'error', 'updated_at'])
+    for item in rows:
+        _sync_schedule(item)
+    if rows and not schedule_pump():
+        # No scheduler process may be running to catch up later
+        pump()
+    return len(rows)
+
+
+def poll_running(now):
+    """
+    Check running scans that haven't pushed a recent state change, and expire
+    interrupted dispatches and scans past SCAN_DISPATCH_RUN_TIMEOUT_SECONDS.
+    """
+    from . import events
+
+    timeout = timedelta(seconds=settings.SCAN_DISPATCH_RUN_TIMEOUT_SECONDS)
+    for item in ScanDispatch.objects.filter(status__in=IN_FLIGHT_STATUSES):
+        if item.status == 'dispatching':
+            if item.dispatched_at and now - item.dispatched_at > DISPATCH_STALE_AFTER:
+                item.status = 'failed'
+                item.finished_at = now
+                item.error = 'Dispatch interrupted'
+                item.save(update_fields=['status', 'finished_at', 'error', 'updated_at'])
+                _sync_schedule(item)
+            continue
+        if item.dispatched_at and now - item.dispatched_at > timeout:
+            finish(item.orchestration_id, 'timed_out', error='Scan timed out')
+            continue
+
+        state = events.local_state(item.orchestration_id, source='orchestrator')
+        if state is None or not events.is_current(state):
+            try:
+                data, _ = engine_client.get(
+                    f"/onboarding/api/v1/scan/orchestration/{item.orchestration_id}",
+                    params={"tenant_id": item.tenant_id},
+                    timeout=10,
+                )
+            except EngineError:
+                continue
+            status = scan_status(data)
+            if not status or status == 'unknown':
+                continue
+            record = data.get('data') if isinstance(data.get('data'), dict) else data
+            state = events.observe(
+                'orchestrator', 'orchestration', item.orchestration_id, item.tenant_id, status, record,
+            )
+        if state.status in COMPLETED_STATUSES | FAILED_STATUSES:
+            finish(item.orchestration_id, state.status)
+
+
+def average_run_seconds():
+    """Mean duration of recently completed scans (for queue ETAs)."""
+    estimate = cache.get(RUN_ESTIMATE_KEY)
+    if estimate is None:
+        recent = ScanDispatch.objects.filter(
+            status='completed', dispatched_at__isnull=False, finished_at__isnull=False,
+        ).order_by('-finished_at').values_list('dispatched_at', 'finished_at')[:50]
+        durations = [(end - start).total_seconds() for start, end in recent]
+        estimate = sum(durations) / len(durations) if durations else settings.SCAN_DISPATCH_DEFAULT_RUN_SECONDS
+        cache.set(RUN_ESTIMATE_KEY, estimate, 60)
+    return estimate
+
+
+def queue_positions():
+    """dispatch id -> 1-based position in dispatch order (cached briefly)."""
+    positions = cache.get(POSITIONS_KEY)
+    if positions is None:
+        queued = ScanDispatch.objects.filter(status='queued').only('id', 'tenant_id', 'priority', 'created_at')
+        loads = Counter(
+            ScanDispatch.objects.filter(status__in=IN_FLIGHT_STATUSES).values_list('tenant_id', flat=True)
+        )
+        positions = {item.id: index for index, item in enumerate(dispatch_order(queued, loads), start=1)}
+        cache.set(POSITIONS_KEY, positions, POSITIONS_TTL)
+    return positions
+
+
+def describe(item):
+    """Queue view of a dispatch for API responses."""
+    info = {
+        "dispatch_id": item.id,
+        "status": item.status,
+        "priority": item.get_priority_display(),
+        "orchestration_id": item.orchestration_id,
+        "queued_at": item.created_at.isoformat(),
+        "dispatched_at": item.dispatched_at.isoformat() if item.dispatched_at else None,
+        "error": item.error,
+    }
+    if item.status == 'queued':
+        position = queue_positions().get(item.id)
+        info["position"] = position
+        if position is not None:
+            waves = math.ceil(position / max(settings.SCAN_DISPATCH_MAX_IN_FLIGHT, 1))
+            info["eta_seconds"] = int(waves * average_run_seconds())
+    return info
+
+
+def lookup(identifier):
+    """The dispatch with this dispatch id or orchestration id, if any."""
+    queue_monitor.start()
+    return (
+        ScanDispatch.objects.filter(id=identifier).first()
+        or ScanDispatch.objects.filter(orchestration_id=identifier).order_by('-created_at').first()
+    )
+
+
+class QueueMonitor:
+    """
+    Per-worker daemon thread that runs poll_running() and pump() every
+    SCAN_DISPATCH_POLL_SECONDS. A lock in the Django cache lets one worker
+    sharing the cache do it per interval.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the monitor thread for this worker (idempotent, no-op when disabled)."""
+        if settings.SCAN_DISPATCH_POLL_SECONDS <= 0 or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="scan-queue-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = settings.SCAN_DISPATCH_POLL_SECONDS
+        # Workers started together shouldn't all try the lock at once
+        time.sleep(random.uniform(0, min(interval, 30)))
+        while True:
+            try:
+                if cache.add(MONITOR_LOCK_KEY, self.worker_id, interval):
+                    poll_running(timezone.now())
+                    pump()
+            except Exception:
+                logger.exception("Scan queue monitor pass failed")
+            finally:
+                close_old_connections()
+            time.sleep(interval)
+
+
+queue_monitor = QueueMonitor()
@@ -0,0 +1,133 @@
+"""
+Scan scheduler: turns ScanSchedule rows into orchestrate calls.
+
+Run by ``manage.py run_scan_scheduler``. Every tick it:
+
+  1. refreshes the scans in the dispatch queue (onboarding_management.scan_queue),
+     freeing the slots of finished or timed-out scans;
+  2. queues due schedules as 'scheduled' priority scans, taking one schedule
+     per tenant per round (tenants that have waited longest first);
+  3. pumps the queue, which starts scans within the global in-flight limit,
+     with at most SCAN_SCHEDULER_MAX_CONCURRENT scheduled scans at a time.
+
+Each schedule starts a fixed, deterministic offset (0..jitter_seconds) after
+its cron time, derived from its id, so schedules that all say "0 9 * * *" are
+spread over the jitter window instead of hitting the engines together.
+A schedule isn't queued again while its previous run is still queued or
+running; queued runs live in the database, so the queue survives restarts.
+Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so running more than
+one scheduler is safe.
+"""
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import scan_queue
+from .cron import CronSchedule
+from .models import ScanDispatch, ScanSchedule
+
+logger = logging.getLogger(__name__)
+
+# last_status values of a run that hasn't finished yet
+IN_FLIGHT_STATUSES = ('queued', 'dispatching', 'running')
+
+
+def jitter_offset(schedule) -> timedelta:
+    """Stable per-schedule delay in [0, jitter_seconds]."""
+    if not schedule.jitter_seconds:
+        return timedelta(0)
+    digest = hashlib.sha256(str(schedule.id).encode()).digest()
+    return timedelta(seconds=int.from_bytes(digest[:4], 'big') % (schedule.jitter_seconds + 1))
+
+
+def compute_next_run(schedule, after=None):
+    """Next jittered run time strictly after `after` (default: now)."""
+    after = after or timezone.now()
+    offset = jitter_offset(schedule)
+    tz = ZoneInfo(schedule.timezone or 'UTC')
+    # Step back by the offset so a run at cron time + offset maps to that cron time
+    local = (after - offset).astimezone(tz).replace(tzinfo=None)
+    base = CronSchedule(schedule.cron).next_after(local).replace(tzinfo=tz)
+    return base + offset
+
+
+def orchestrate_body(schedule):
+    body = dict(schedule.payload or {})
+    body.update(
+        tenant_id=str(schedule.tenant_id),
+        provider=schedule.provider,
+        hierarchy_id=schedule.hierarchy_id,
+    )
+    if schedule.account_id:
+        body['account_id'] = schedule.account_id
+    return body
+
+
+def fair_order(schedules):
+    """Round-robin across tenants; tenants whose oldest due run is earliest go first."""
+    queues = OrderedDict()
+    for schedule in sorted(schedules, key=lambda s: s.next_run_at):
+        queues.setdefault(schedule.tenant_id, deque()).append(schedule)
+
+    ordered = []
+    while queues:
+        for tenant_id in list(queues):
+            ordered.append(queues[tenant_id].popleft())
+            if not queues[tenant_id]:
+                del queues[tenant_id]
+    return ordered
+
+
+def claim_due(now, limit):
+    """
+    Lock up to `limit` due schedules in fair order, queue a scan for each and
+    advance their next_run_at. Returns the claimed rows.
+    """
+    if limit <= 0:
+        return []
+    # A run still unfinished after the run timeout was lost (e.g. queued before
+    # the dispatch queue existed); don't let it block the schedule forever.
+    lost = now - timedelta(seconds=settings.SCAN_DISPATCH_RUN_TIMEOUT_SECONDS)
+    with transaction.atomic():
+        due = list(
+            ScanSchedule.objects.select_for_update(skip_locked=True).filter(
+                is_enabled=True,
+                next_run_at__lte=now,
+            ).exclude(
+                last_status__in=IN_FLIGHT_STATUSES,
+                last_run_at__gt=lost,
+            ).order_by('next_run_at')[:settings.SCAN_SCHEDULER_SCAN_BATCH]
+        )
+        claimed = fair_order(due)[:limit]
+        for schedule in claimed:
+            schedule.last_status = 'queued'
+            schedule.last_run_at = now
+            schedule.last_error = None
+            schedule.next_run_at = compute_next_run(schedule, now)
+            schedule.save(update_fields=[
+                'last_status', 'last_run_at', 'last_error', 'next_run_at', 'updated_at',
+            ])
+            _, created = scan_queue.submit(
+                schedule.tenant_id, orchestrate_body(schedule),
+                priority=ScanDispatch.PRIORITY_SCHEDULED, schedule=schedule, dispatch_now=False,
+            )
+            if not created:
+                schedule.last_status = 'skipped'
+                schedule.last_error = 'An identical scan was already queued or running'
+                schedule.save(update_fields=['last_status', 'last_error', 'updated_at'])
+    return claimed
+
+
+def run_tick():
+    """One scheduler pass. Returns (schedules queued, scans started)."""
+    now = timezone.now()
+    scan_queue.poll_running(now)
+    claimed = claim_due(now, settings.SCAN_SCHEDULER_SCAN_BATCH)
+    started = scan_queue.pump(wait=True)
+    return len(claimed), started
@@ -0,0 +1,45 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from rest_framework import serializers
+
+from .cron import CronSchedule, CronError
+from .models import ScanSchedule
+
+
+class ScanScheduleSerializer(serializers.ModelSerializer):
+    created_by_email = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ScanSchedule
+        fields = [
+            "id", "tenant", "account_id", "provider", "hierarchy_id",
+            "name", "cron", "timezone", "jitter_seconds", "payload", "is_enabled",
+            "next_run_at", "last_run_at", "last_status", "last_orchestration_id", "last_error",
+            "created_by_email", "created_at", "updated_at",
+        ]
+        read_only_fields = [
+            "id", "next_run_at", "last_run_at", "last_status", "last_orchestration_id",
+            "last_error", "created_by_email", "created_at", "updated_at",
+        ]
+
+    def get_created_by_email(self, obj):
+        return obj.created_by.email if obj.created_by else None
+
+    def validate_cron(self, value):
+        try:
+            CronSchedule(value)
+        except CronError as e:
+            raise serializers.ValidationError(str(e))
+        return value.strip()
+
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f"Unknown timezone '{value}'")
+        return value
+
+    def validate_jitter_seconds(self, value):
+        if value > 6 * 3600:
+            raise serializers.ValidationError("Jitter can be at most 6 hours")
+        return value
@@ -1,3 +1,471 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from . import bulk_onboarding, cache_warming, dashboard_snapshot, events, idempotency, scan_queue, validation_cache
+from .cron import CronError, CronSchedule
+from .engine_client import AsyncEngineClient, EngineClient, EngineError
+from .models import IdempotencyKey, ScanDispatch
+from .views import CloudAccountValidateView, ScanEventStreamView
+
+
+class CronScheduleTests(TestCase):
+
+    def test_every_fifteen_minutes(self):
+        cron = CronSchedule("*/15 * * * *")
+        self.assertEqual(cron.next_after(datetime(2026, 1, 1, 10, 7)), datetime(2026, 1, 1, 10, 15))
+        self.assertEqual(cron.next_after(datetime(2026, 1, 1, 10, 45)), datetime(2026, 1, 1, 11, 0))
+
+    def test_next_run_is_strictly_after(self):
+        cron = CronSchedule("30 2 * * *")
+        self.assertEqual(cron.next_after(datetime(2026, 1, 1, 2, 30, 0)), datetime(2026, 1, 2, 2, 30))
+
+    def test_ranges_lists_and_weekdays(self):
+        cron = CronSchedule("0 9-17/4 * * 1-5")
+        # Saturday 2026-01-03 -> Monday 2026-01-05 09:00
+        self.assertEqual(cron.next_after(datetime(2026, 1, 3, 12, 0)), datetime(2026, 1, 5, 9, 0))
+        self.assertEqual(cron.next_after(datetime(2026, 1, 5, 9, 0)), datetime(2026, 1, 5, 13, 0))
+
+    def test_sunday_as_seven(self):
+        self.assertEqual(
+            CronSchedule("0 0 * * 7").next_after(datetime(2026, 1, 1)),
+            CronSchedule("0 0 * * 0").next_after(datetime(2026, 1, 1)),
+        )
+
+    def test_day_of_month_or_weekday(self):
+        # Restricting both matches either: the 15th, or any Monday
+        cron = CronSchedule("0 0 15 * 1")
+        self.assertEqual(cron.next_after(datetime(2026, 1, 1)), datetime(2026, 1, 5))
+        self.assertEqual(cron.next_after(datetime(2026, 1, 13)), datetime(2026, 1, 15))
+
+    def test_leap_day(self):
+        self.assertEqual(CronSchedule("0 0 29 2 *").next_after(datetime(2026, 3, 1)), datetime(2028, 2, 29))
+
+    def test_keeps_timezone(self):
+        after = timezone.make_aware(datetime(2026, 1, 1, 0, 0))
+        self.assertEqual(CronSchedule("5 * * * *").next_after(after).tzinfo, after.tzinfo)
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-1 * * * *", "a * * * *", "0 0 31 2 *"):
+            with self.subTest(expression=expression), self.assertRaises(CronError):
+                CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+
+class BulkPrepareTests(TestCase):
+
+    def _row(self, **fields):
+        row = {"account_id": "a1", "tenant_id": "t1", "account_name": "Prod", "provider": "aws"}
+        row.update(fields)
+        return row
+
+    def test_valid_rows_are_pending(self):
+        results = bulk_onboarding.prepare([self._row(), self._row(account_id="a2")])
+        self.assertEqual([r["status"] for r in results], ["pending", "pending"])
+        self.assertEqual(results[0]["account"]["account_id"], "a1")
+
+    def test_defaults_fill_missing_fields(self):
+        row = self._row()
+        del row["tenant_id"]
+        results = bulk_onboarding.prepare([row], {"tenant_id": "t9"})
+        self.assertEqual(results[0]["account"]["tenant_id"], "t9")
+
+    def test_row_errors(self):
+        results = bulk_onboarding.prepare([
+            "not an object",
+            self._row(account_name=""),
+            self._row(account_id=["a1"]),
+            self._row(account_id={"id": 1}),
+            self._row(credentials="secret", credential_type="access_key"),
+            self._row(credentials={"role_arn": "arn"}),
+            self._row(),
+            self._row(),
+        ])
+        self.assertEqual([r["error"] for r in results], [
+            "Row is not an object",
+            "Missing required fields: account_name",
+            "account_id must be a string",
+            "account_id must be a string",
+            "credentials must be an object",
+            "credential_type is required with credentials",
+            None,
+            "Duplicate account_id",
+        ])
+        self.assertEqual([r["status"] for r in results], ["failed"] * 6 + ["pending", "failed"])
+        self.assertIsNone(results[2]["account_id"])
+
+    def test_numeric_ids_become_strings(self):
+        results = bulk_onboarding.prepare([self._row(account_id=123456789012), self._row(account_id="123456789012")])
+        self.assertEqual(results[0]["account_id"], "123456789012")
+        self.assertEqual(results[1]["error"], "Duplicate account_id")
+
+    def test_request_limits(self):
+        with self.assertRaises(bulk_onboarding.BulkInputError):
+            bulk_onboarding.prepare([])
+        with override_settings(BULK_ONBOARDING_MAX_ACCOUNTS=1), self.assertRaises(bulk_onboarding.BulkInputError):
+            bulk_onboarding.prepare([self._row(), self._row(account_id="a2")])
+
+    def test_csv_credentials_columns(self):
+        csv_text = b"account_id,account_name,provider,credential_type,credentials.role_arn\na1,Prod,aws,role,arn:1\n"
+        accounts = bulk_onboarding.parse_csv(io.BytesIO(csv_text))
+        self.assertEqual(accounts, [{
+            "account_id": "a1", "account_name": "Prod", "provider": "aws",
+            "credential_type": "role", "credentials": {"role_arn": "arn:1"},
+        }])
+
+    def test_unexpected_error_fails_the_job(self):
+        results = bulk_onboarding.prepare([self._row()])
+        accounts = [r.pop("account") for r in results]
+        job = bulk_onboarding.bulk_jobs.create(total=1, results=results)
+        with mock.patch.object(bulk_onboarding, "ThreadPoolExecutor", side_effect=RuntimeError("boom")), \
+                self.assertLogs(bulk_onboarding.logger, "ERROR"):
+            bulk_onboarding._run_bulk(job["job_id"], results, accounts, True)
+        job = bulk_onboarding.bulk_jobs.get(job["job_id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "Bulk onboarding failed: boom")
+
+
+class CacheWarmTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_rebuilds_only_the_dashboard_snapshot(self):
+        with mock.patch.object(dashboard_snapshot.engine_client, "get", return_value=({"ok": True}, 200)) as get:
+            cache_warming.warm_tenant("t1")
+        paths = sorted({call.args[0] for call in get.call_args_list})
+        self.assertEqual(paths, sorted(path for path, _ in dashboard_snapshot._sections("t1", "").values()))
+        snapshot = dashboard_snapshot.load("t1")
+        self.assertEqual(set(snapshot), {"inventory", "threats", "compliance", "accounts"})
+        self.assertEqual(snapshot["threats"]["data"], {"ok": True})
+
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.calls = 0
+
+    def _request(self, body=b'{"tenant_id": "t1"}', key="key-1"):
+        return self.factory.post("/", data=body, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def _execute(self):
+        self.calls += 1
+        return JsonResponse({"run": self.calls}, status=201)
+
+    def test_retry_replays_first_response(self):
+        first = idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        again = idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+
+    def test_keys_are_per_owner(self):
+        idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        idempotency.idempotent(self._request(), "scan-trigger", "u2", self._execute)
+        self.assertEqual(self.calls, 2)
+
+    def test_different_body_is_rejected(self):
+        idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        response = idempotency.idempotent(self._request(body=b'{"tenant_id": "t2"}'), "scan-trigger", "u1", self._execute)
+        self.assertEqual(response.status_code, 422)
+
+    def test_retry_while_running_conflicts(self):
+        def execute():
+            nested = idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+            self.assertEqual(nested.status_code, 409)
+            return self._execute()
+
+        idempotency.idempotent(self._request(), "scan-trigger", "u1", execute)
+        self.assertEqual(self.calls, 1)
+
+    def test_server_errors_are_not_stored(self):
+        idempotency.idempotent(self._request(), "scan-trigger", "u1", lambda: JsonResponse({}, status=503))
+        self.assertFalse(IdempotencyKey.objects.exists())
+        idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_request_is_taken_over(self):
+        now = timezone.now()
+        IdempotencyKey.objects.create(
+            scope="scan-trigger", owner="u1", key="key-1",
+            request_hash=hashlib.sha256(b'{"tenant_id": "t1"}').hexdigest(),
+            lease_expires_at=now - timedelta(seconds=1), expires_at=now + timedelta(hours=1),
+        )
+        response = idempotency.idempotent(self._request(), "scan-trigger", "u1", self._execute)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(IdempotencyKey.objects.get().status, "completed")
+
+
+class ScanDedupeTests(TestCase):
+
+    BODY = {"tenant_id": "t1", "provider": "aws", "hierarchy_id": "h1"}
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def _execute(self):
+        self.calls += 1
+        return JsonResponse({"job_id": f"job-{self.calls}"}, status=202)
+
+    def _scan(self, body=None):
+        return idempotency.deduplicated_scan(
+            "scan", body or self.BODY, self._execute, status_path="api/v1/jobs/{job_id}",
+        )
+
+    def test_running_scan_is_returned_instead_of_a_duplicate(self):
+        self._scan()
+        with mock.patch.object(idempotency.engine_client, "get", return_value=({"status": "running"}, 200)):
+            response = self._scan()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(response["X-Scan-Deduplicated"], "true")
+        self.assertEqual(json.loads(response.content)["job_id"], "job-1")
+
+    def test_finished_scan_allows_a_new_one(self):
+        self._scan()
+        with mock.patch.object(idempotency.engine_client, "get", return_value=({"status": "completed"}, 200)):
+            response = self._scan()
+        self.assertEqual(self.calls, 2)
+        self.assertFalse(response.has_header("X-Scan-Deduplicated"))
+
+    def test_released_job_allows_a_new_one(self):
+        self._scan()
+        idempotency.release_job("job-1")
+        self._scan()
+        self.assertEqual(self.calls, 2)
+
+    def test_other_targets_are_independent(self):
+        self._scan()
+        self._scan(dict(self.BODY, hierarchy_id="h2"))
+        self.assertEqual(self.calls, 2)
+
+
+class _Item:
+
+    def __init__(self, tenant_id, priority, created_at):
+        self.id = f"{tenant_id}-{created_at}"
+        self.tenant_id = tenant_id
+        self.priority = priority
+        self.created_at = created_at
+
+
+@override_settings(SCAN_DISPATCH_TENANT_WEIGHTS={})
+class DispatchOrderTests(TestCase):
+
+    def _order(self, items, loads=None):
+        return [item.id for item in scan_queue.dispatch_order(items, loads or {})]
+
+    def test_tenants_take_turns(self):
+        items = [_Item("big", 2, i) for i in range(4)] + [_Item("small", 2, 10)]
+        self.assertEqual(self._order(items), ["big-0", "small-10", "big-1", "big-2", "big-3"])
+
+    def test_in_flight_scans_count(self):
+        items = [_Item("a", 2, 0), _Item("b", 2, 1)]
+        self.assertEqual(self._order(items, {"a": 2}), ["b-1", "a-0"])
+
+    def test_priority_classes_are_strict(self):
+        items = [_Item("a", 2, 0), _Item("b", 1, 5), _Item("c", 0, 9)]
+        self.assertEqual(self._order(items), ["c-9", "b-5", "a-0"])
+
+    def test_weights(self):
+        items = [_Item("a", 2, i) for i in range(4)] + [_Item("heavy", 2, 10 + i) for i in range(4)]
+        with override_settings(SCAN_DISPATCH_TENANT_WEIGHTS={"heavy": 2}):
+            order = self._order(items)
+        self.assertEqual(order[:3], ["a-0", "heavy-10", "heavy-11"])
+
+
+@override_settings(
+    SCAN_DISPATCH_MAX_IN_FLIGHT=3, SCAN_DISPATCH_BULK_MAX_IN_FLIGHT=2, SCAN_DISPATCH_TENANT_WEIGHTS={},
+)
+class ScanQueueClaimTests(TestCase):
+
+    def _queue(self, tenant_id, priority=ScanDispatch.PRIORITY_BULK, count=1):
+        for _ in range(count):
+            ScanDispatch.objects.create(tenant_id=tenant_id, priority=priority, body={"tenant_id": tenant_id})
+
+    def test_claims_respect_global_and_class_limits(self):
+        self._queue("a", count=5)
+        self._queue("b", count=5)
+        self._queue("c", priority=ScanDispatch.PRIORITY_MANUAL)
+        claimed = scan_queue._claim(timezone.now())
+        self.assertEqual(len(claimed), 3)
+        self.assertEqual(sum(1 for item in claimed if item.priority == ScanDispatch.PRIORITY_BULK), 2)
+        self.assertEqual({item.tenant_id for item in claimed}, {"a", "b", "c"})
+        self.assertEqual(scan_queue._claim(timezone.now()), [])
+
+    def test_busy_tenant_waits_for_others(self):
+        manual = ScanDispatch.PRIORITY_MANUAL
+        self._queue("a", priority=manual, count=3)
+        ScanDispatch.objects.filter(tenant_id="a").update(status="running")
+        self._queue("a", priority=manual)
+        self._queue("b", priority=manual)
+        claimed = scan_queue._claim(timezone.now())
+        self.assertEqual([item.tenant_id for item in claimed], [])
+        ScanDispatch.objects.filter(tenant_id="a", status="running").first().delete()
+        claimed = scan_queue._claim(timezone.now())
+        self.assertEqual([item.tenant_id for item in claimed], ["b"])
+
+
+@override_settings(SCAN_DISPATCH_POLL_SECONDS=0, SCAN_DISPATCH_TENANT_WEIGHTS={})
+class ScanQueueLifecycleTests(TestCase):
+
+    BODY = {"tenant_id": "t1", "provider": "aws", "hierarchy_id": "h1"}
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(scan_queue, "schedule_pump", return_value=True))
+        self.enterContext(mock.patch("onboarding_management.events.schedule_warm"))
+
+    def _running(self, **fields):
+        return ScanDispatch.objects.create(
+            tenant_id="t1", body=self.BODY, status="running", orchestration_id="orch-1",
+            dispatched_at=timezone.now(), **fields,
+        )
+
+    def test_duplicate_submit_returns_the_queued_scan(self):
+        first, created = scan_queue.submit("t1", dict(self.BODY), dispatch_now=False)
+        again, created_again = scan_queue.submit("t1", dict(self.BODY), dispatch_now=False)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, str(first.pk))
+        self.assertEqual(ScanDispatch.objects.count(), 1)
+
+    def test_dispatch_tracks_the_orchestration(self):
+        dispatch, _ = scan_queue.submit("t1", dict(self.BODY), dispatch_now=False)
+        with mock.patch.object(scan_queue.engine_client, "post", return_value=({"orchestration_id": "orch-9"}, 200)):
+            scan_queue.pump(wait=True)
+        dispatch.refresh_from_db()
+        self.assertEqual((dispatch.status, dispatch.orchestration_id), ("running", "orch-9"))
+
+    def test_dispatch_without_orchestration_id_fails_as_bad_gateway(self):
+        dispatch, _ = scan_queue.submit("t1", dict(self.BODY), dispatch_now=False)
+        with mock.patch.object(scan_queue.engine_client, "post", return_value=({"ok": True}, 200)) as post:
+            scan_queue.pump(wait=True)
+        dispatch.refresh_from_db()
+        self.assertEqual(dispatch.status, "failed")
+        self.assertEqual(dispatch.response_status, 502)
+        self.assertEqual(post.call_count, 1)
+
+    def test_poll_frees_the_slot_of_a_finished_scan(self):
+        item = self._running()
+        with mock.patch.object(scan_queue.engine_client, "get", return_value=({"status": "completed"}, 200)):
+            scan_queue.poll_running(timezone.now())
+        item.refresh_from_db()
+        self.assertEqual(item.status, "completed")
+
+    def test_poll_times_out_scans_that_never_finish(self):
+        item = self._running()
+        later = timezone.now() + timedelta(seconds=settings.SCAN_DISPATCH_RUN_TIMEOUT_SECONDS + 1)
+        scan_queue.poll_running(later)
+        item.refresh_from_db()
+        self.assertEqual(item.status, "timed_out")
+
+    def test_poll_fails_interrupted_dispatches(self):
+        item = ScanDispatch.objects.create(
+            tenant_id="t1", body=self.BODY, status="dispatching",
+            dispatched_at=timezone.now() - scan_queue.DISPATCH_STALE_AFTER - timedelta(seconds=1),
+        )
+        scan_queue.poll_running(timezone.now())
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.error), ("failed", "Dispatch interrupted"))
+
+    def test_monitor_is_off_when_disabled(self):
+        monitor = scan_queue.QueueMonitor()
+        monitor.start()
+        self.assertIsNone(monitor._thread)
+
+
+class EventLogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for n in range(5):
+            events.publish("t1", {"n": n})
+
+    def test_read_since(self):
+        self.assertEqual([seq for seq, _ in events.read_since("t1", 0)], [1, 2, 3, 4, 5])
+        self.assertEqual(events.read_since("t1", 3), [(4, {"n": 3}), (5, {"n": 4})])
+        self.assertEqual(events.read_since("t1", 5), [])
+        self.assertEqual(events.read_since("t2", 0), [])
+
+    def test_replay_is_bounded(self):
+        with mock.patch.object(events, "MAX_REPLAY", 2):
+            self.assertEqual([seq for seq, _ in events.read_since("t1", 0)], [4, 5])
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            events.read_since("t1", -10 ** 12)
+        self.assertEqual(len(get_many.call_args.args[0]), 5)
+
+    def test_stream_rejects_bad_last_event_id(self):
+        def authenticate(request):
+            request.auth_context = {"scope": None}
+            return object()
+
+        view = ScanEventStreamView.as_view()
+        with mock.patch.object(ScanEventStreamView._auth_backend, "authenticate", side_effect=authenticate):
+            for last_id in ("-1", "abc"):
+                request = RequestFactory().get("/", {"tenant_id": "t1"}, HTTP_LAST_EVENT_ID=last_id)
+                self.assertEqual(view(request).status_code, 400)
+
+
+class ValidationCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_result_is_kept_per_credential_version(self):
+        key = validation_cache.result_key("validate", "a1")
+        validation_cache.put(key, {"valid": True}, 200)
+        self.assertEqual(validation_cache.get(validation_cache.result_key("validate", "a1")), ({"valid": True}, 200))
+        self.assertIsNone(validation_cache.get(validation_cache.result_key("validate", "a2")))
+        self.assertIsNone(validation_cache.get(validation_cache.result_key("activate", "a1", b'{"x": 1}')))
+
+        validation_cache.bump_version("a1")
+        self.assertIsNone(validation_cache.get(validation_cache.result_key("validate", "a1")))
+        validation_cache.bump_version("a1")
+        self.assertEqual(validation_cache.credential_version("a1"), 2)
+
+    def test_result_for_replaced_credentials_is_not_served(self):
+        def validate(path, **kwargs):
+            # Credentials are replaced while the engine is validating the old ones
+            validation_cache.bump_version("a1")
+            return {"valid": True}, 200
+
+        view = CloudAccountValidateView.as_view()
+        with mock.patch("onboarding_management.views.engine_client.post", side_effect=validate) as post:
+            first = view(RequestFactory().post("/"), account_id="a1")
+            second = view(RequestFactory().post("/"), account_id="a1")
+        self.assertEqual(first["X-Validation-Cache"], "MISS")
+        self.assertEqual(second["X-Validation-Cache"], "MISS")
+        self.assertEqual(post.call_count, 2)
+
+
+class EngineClientTests(TestCase):
+
+    def test_async_clients_close_with_their_loop(self):
+        engines = AsyncEngineClient(base_url="http://engine")
+        first = asyncio.run(engines._client())
+        second = async_to_sync(engines._client)()
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertTrue(second.is_closed)
+
+    def test_write_timeouts_stay_502(self):
+        engines = EngineClient(base_url="http://engine")
+        with mock.patch.object(requests.Session, "request", side_effect=requests.Timeout):
+            for method, status in ((engines.get, 504), (engines.put, 502), (engines.patch, 502), (engines.delete, 502)):
+                with self.subTest(method.__name__), self.assertRaises(EngineError) as ctx:
+                    method("/x")
+                self.assertEqual(ctx.exception.status_code, status)
@@ -1,9 +1,16 @@
 
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
 from . import views
 
+router = DefaultRouter()
+router.register(r"schedules", views.ScanScheduleViewSet, basename="scan-schedule")
+
 urlpatterns = [
     path("cloud-accounts/", views.CloudAccountListView.as_view(), name="cloud-account-list"),
+    path("cloud-accounts/bulk/", views.CloudAccountBulkView.as_view(), name="cloud-account-bulk"),
+    path("cloud-accounts/bulk/<str:job_id>/", views.CloudAccountBulkStatusView.as_view(), name="cloud-account-bulk-status"),
+    path("cloud-accounts/status/batch/", views.AccountStatusBatchView.as_view(), name="cloud-account-status-batch"),
     path("cloud-accounts/<str:account_id>/", views.CloudAccountDetailView.as_view(), name="cloud-account-detail"),
     path("cloud-accounts/<str:account_id>/validate/", views.CloudAccountValidateView.as_view(), name="cloud-account-validate"),
     path("cloud-accounts/<str:account_id>/credentials/", views.CredentialStoreView.as_view(), name="cloud-account-credentials"),
@@ -16,4 +23,8 @@ urlpatterns = [
     path("engine-health/", views.EngineHealthView.as_view(), name="engine-health"),
 
     path("dashboard-summary/", views.DashboardSummaryView.as_view(), name="dashboard-summary"),
+
+    path("events/stream/", views.ScanEventStreamView.as_view(), name="scan-event-stream"),
+
+    path("", include(router.urls)),
 ]
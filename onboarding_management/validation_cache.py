@@ -0,0 +1,56 @@
+"""
+Cache of credential validation results.
+
+Validating an account makes live cloud API calls, so the onboarding engine's
+validate responses are cached per (account, credential version) for
+CREDENTIAL_VALIDATION_TTL_SECONDS. Every account has a credential version in
+the credential_versions table; storing or deleting its credentials bumps it,
+which orphans every cached result for the old credentials at once. The
+version lives in the database rather than the cache, so a bump is seen by
+every worker and can't be lost to eviction.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CredentialVersion
+
+
+def credential_version(account_id):
+    version = CredentialVersion.objects.filter(account_id=str(account_id)).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_version(account_id):
+    """Invalidate every cached validation for an account (credentials changed)."""
+    account_id = str(account_id)
+    if CredentialVersion.objects.filter(account_id=account_id).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            CredentialVersion.objects.create(account_id=account_id, version=1)
+    except IntegrityError:
+        # Created concurrently; bump that row instead
+        CredentialVersion.objects.filter(account_id=account_id).update(version=F('version') + 1)
+
+
+def result_key(kind, account_id, body=b""):
+    """
+    Cache key of a validation call under the account's current credential
+    version. Take it before calling the engine and pass it to put(), so a
+    result for credentials replaced meanwhile lands under the old version.
+    """
+    digest = hashlib.sha256(body or b"").hexdigest()[:16]
+    return f"validation:{kind}:{account_id}:{credential_version(account_id)}:{digest}"
+
+
+def get(key):
+    """Cached (data, status_code) for a result_key(), or None."""
+    return cache.get(key)
+
+
+def put(key, data, status_code):
+    cache.set(key, (data, status_code), settings.CREDENTIAL_VALIDATION_TTL_SECONDS)
@@ -1,11 +1,33 @@
 
+import asyncio
+import csv
+import io
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-from django.http import JsonResponse
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import View
-from .engine_client import engine_client, EngineError
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status, viewsets
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from user_auth.authentication import CookieTokenAuthentication
+from user_auth.permissions import IsCSPMAuthenticated, require_operation
+from user_auth.scopes import scope_allows, scope_values
+from .engine_client import engine_client, async_engine_client, EngineError
+from .cache_warming import scan_status
+from .health_monitor import health_monitor
+from .idempotency import idempotent, deduplicated_scan
+from . import dashboard_snapshot, bulk_onboarding, validation_cache, events, scan_queue
+from .models import ScanSchedule
+from .scheduler import compute_next_run
+from .serializers import ScanScheduleSerializer
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +71,10 @@ def error_response(message, status=400, data=None):
     )
 
 
+def _wants_refresh(request):
+    return request.GET.get("refresh", "").lower() in ("1", "true")
+
+
 class CloudAccountListView(View):
 
 
@@ -96,6 +122,74 @@ class CloudAccountListView(View):
             return engine_error_response(e)
 
 
+class CloudAccountBulkView(View):
+    """
+    POST /cloud-accounts/bulk/ — onboard many accounts in one request.
+
+    Body is JSON ({"accounts": [...], "tenant_id": ..., "validate": true} or a
+    bare list), a CSV file upload in the "file" field (tenant_id / validate as
+    form fields) or a text/csv body (tenant_id / validate as query
+    parameters). Returns 202 with a job; progress is read from
+    CloudAccountBulkStatusView.
+    """
+
+    def post(self, request):
+        defaults = {}
+        validate = True
+        try:
+            if "file" in request.FILES:
+                accounts = bulk_onboarding.parse_csv(request.FILES["file"])
+                if request.POST.get("tenant_id"):
+                    defaults["tenant_id"] = request.POST["tenant_id"]
+                validate = request.POST.get("validate", "true").lower() != "false"
+            elif request.content_type == "text/csv":
+                accounts = bulk_onboarding.parse_csv(io.BytesIO(request.body))
+                if request.GET.get("tenant_id"):
+                    defaults["tenant_id"] = request.GET["tenant_id"]
+                validate = request.GET.get("validate", "true").lower() != "false"
+            else:
+                body = json.loads(request.body)
+                if isinstance(body, dict):
+                    accounts = body.get("accounts")
+                    if body.get("tenant_id"):
+                        defaults["tenant_id"] = body["tenant_id"]
+                    validate = body.get("validate", True) is not False
+                else:
+                    accounts = body
+        except (json.JSONDecodeError, UnicodeDecodeError, csv.Error):
+            return error_response("Invalid JSON or CSV body")
+
+        try:
+            results = bulk_onboarding.prepare(accounts, defaults)
+        except bulk_onboarding.BulkInputError as e:
+            return error_response(str(e))
+
+        job = bulk_onboarding.start_bulk(results, validate=validate)
+        if job is None:
+            return error_response("Too many bulk onboardings in progress, retry shortly.", status=503)
+
+        return success_response(
+            data=job,
+            message=f"Bulk onboarding of {job['total']} accounts started",
+            status=202,
+        )
+
+
+class CloudAccountBulkStatusView(View):
+    """GET /cloud-accounts/bulk/{job_id}/ — progress and per-account results (?status= filters)."""
+
+    def get(self, request, job_id):
+        job = bulk_onboarding.bulk_jobs.get(job_id)
+        if job is None:
+            return error_response("Bulk onboarding job not found", status=404)
+
+        status = request.GET.get("status")
+        if status:
+            job["results"] = [r for r in job["results"] if r["status"] == status]
+
+        return success_response(data=job, message="Bulk onboarding job fetched")
+
+
 class CloudAccountDetailView(View):
 
     def get(self, request, account_id):
@@ -133,6 +227,7 @@ class CloudAccountDetailView(View):
             data, status_code = engine_client.delete(
                 f"/onboarding/api/v1/cloud-accounts/{account_id}",
             )
+            validation_cache.bump_version(account_id)
             return success_response(
                 data=data,
                 message="Cloud account deleted successfully",
@@ -162,16 +257,27 @@ class CloudAccountDetailView(View):
 class CloudAccountValidateView(View):
 
     def post(self, request, account_id):
-        try:
-            data, status_code = engine_client.post(
-                f"/onboarding/api/v1/cloud-accounts/{account_id}/validate-credentials",
-            )
-            return success_response(
-                data=data,
-                message="Credential validation completed",
-            )
-        except EngineError as e:
-            return engine_error_response(e)
+        # Results are cached per credential version; ?refresh=1 forces a live check
+        key = validation_cache.result_key("validate", account_id)
+        cached = None if _wants_refresh(request) else validation_cache.get(key)
+        if cached is not None:
+            data, status_code = cached
+        else:
+            try:
+                data, status_code = engine_client.post(
+                    f"/onboarding/api/v1/cloud-accounts/{account_id}/validate-credentials",
+                )
+            except EngineError as e:
+                return engine_error_response(e)
+            if status_code < 400:
+                validation_cache.put(key, data, status_code)
+
+        response = success_response(
+            data=data,
+            message="Credential validation completed",
+        )
+        response["X-Validation-Cache"] = "HIT" if cached is not None else "MISS"
+        return response
 
 
 class CredentialStoreView(View):
@@ -197,6 +303,8 @@ class CredentialStoreView(View):
             )
         except EngineError as e:
             return engine_error_response(e)
+        finally:
+            validation_cache.bump_version(account_id)
 
     def delete(self, request, account_id):
         try:
@@ -209,6 +317,8 @@ class CredentialStoreView(View):
             )
         except EngineError as e:
             return engine_error_response(e)
+        finally:
+            validation_cache.bump_version(account_id)
 
 
 class AccountStatusView(View):
@@ -227,6 +337,61 @@ class AccountStatusView(View):
             return engine_error_response(e)
 
 
+class AccountStatusBatchView(View):
+    """
+    POST /cloud-accounts/status/batch/ {"account_ids": [...]} — statuses for many
+    accounts in one call. Engine lookups run concurrently (bounded) and are
+    cached briefly; a failing account is reported under "errors" without
+    affecting the others.
+    """
+
+    async def post(self, request):
+        try:
+            body = json.loads(request.body)
+        except (json.JSONDecodeError, Exception):
+            return error_response("Invalid JSON body")
+
+        account_ids = body.get("account_ids") if isinstance(body, dict) else None
+        if not isinstance(account_ids, list) or not account_ids:
+            return error_response("account_ids must be a non-empty list")
+        account_ids = list(dict.fromkeys(str(a) for a in account_ids))
+        if len(account_ids) > settings.ACCOUNT_STATUS_BATCH_MAX:
+            return error_response(f"At most {settings.ACCOUNT_STATUS_BATCH_MAX} account_ids per request")
+
+        keys = {account_id: f"account-status:{account_id}" for account_id in account_ids}
+        cached = await cache.aget_many(keys.values())
+        statuses = {a: cached[k] for a, k in keys.items() if k in cached}
+        errors = {}
+        semaphore = asyncio.Semaphore(settings.ACCOUNT_STATUS_BATCH_CONCURRENCY)
+
+        async def fetch(account_id):
+            async with semaphore:
+                try:
+                    data, status_code = await async_engine_client.get(
+                        f"/onboarding/api/v1/cloud-accounts/{account_id}/status",
+                        timeout=10,
+                    )
+                except EngineError as e:
+                    errors[account_id] = {"message": str(e), "status_code": e.status_code}
+                    return
+            if status_code >= 400:
+                errors[account_id] = {"message": f"Engine returned {status_code}", "status_code": status_code}
+            else:
+                statuses[account_id] = data
+
+        missing = [a for a in account_ids if a not in statuses]
+        await asyncio.gather(*(fetch(a) for a in missing))
+        await cache.aset_many(
+            {keys[a]: statuses[a] for a in missing if a in statuses},
+            settings.ACCOUNT_STATUS_CACHE_TTL_SECONDS,
+        )
+
+        return success_response(
+            data={"statuses": statuses, "errors": errors},
+            message=f"Fetched status for {len(statuses)}/{len(account_ids)} accounts",
+        )
+
+
 class AccountActivateView(View):
 
     def post(self, request, account_id):
@@ -235,19 +400,29 @@ class AccountActivateView(View):
         except (json.JSONDecodeError, Exception):
             body = {}
 
-        try:
-            data, status_code = engine_client.post(
-                f"/onboarding/api/v1/cloud-accounts/{account_id}/validate",
-                data=body,
-                timeout=60,
-            )
-            return success_response(
-                data=data,
-                message="Account activated successfully",
-                status=status_code,
-            )
-        except EngineError as e:
-            return engine_error_response(e)
+        key = validation_cache.result_key("activate", account_id, request.body)
+        cached = None if _wants_refresh(request) else validation_cache.get(key)
+        if cached is not None:
+            data, status_code = cached
+        else:
+            try:
+                data, status_code = engine_client.post(
+                    f"/onboarding/api/v1/cloud-accounts/{account_id}/validate",
+                    data=body,
+                    timeout=60,
+                )
+            except EngineError as e:
+                return engine_error_response(e)
+            if status_code < 400:
+                validation_cache.put(key, data, status_code)
+
+        response = success_response(
+            data=data,
+            message="Account activated successfully",
+            status=status_code,
+        )
+        response["X-Validation-Cache"] = "HIT" if cached is not None else "MISS"
+        return response
 
 
 class ScanTriggerView(View):
@@ -264,26 +439,91 @@ class ScanTriggerView(View):
         if missing:
             return error_response(f"Missing required fields: {', '.join(missing)}")
 
-        try:
-            data, status_code = engine_client.post(
-                "/gateway/gateway/orchestrate",
-                data=body,
-                timeout=120,
-            )
-            return success_response(
-                data=data,
-                message="Scan pipeline triggered successfully",
-                status=status_code,
+        priority = body.pop("priority", "manual")
+        if priority not in ("manual", "bulk"):
+            return error_response("priority must be 'manual' or 'bulk'")
+
+        def trigger():
+            # Queued behind the in-flight limit; starts immediately when a slot is free
+            dispatch, created = scan_queue.submit(
+                body["tenant_id"], body, priority=scan_queue.PRIORITIES[priority],
             )
-        except EngineError as e:
-            return engine_error_response(e)
+            if dispatch.status in ("queued", "dispatching"):
+                response = success_response(
+                    data=scan_queue.describe(dispatch),
+                    message="Scan queued",
+                    status=202,
+                )
+            elif dispatch.status == "failed" and not dispatch.orchestration_id:
+                detail = dispatch.response or {}
+                response = engine_error_response(EngineError(
+                    dispatch.error, dispatch.response_status or 502,
+                    engine=detail.get("engine"), detail=detail.get("detail"),
+                ))
+            else:
+                data = dispatch.response
+                if isinstance(data, dict):
+                    data = dict(data, dispatch_id=dispatch.id)
+                response = success_response(
+                    data=data,
+                    message="Scan pipeline triggered successfully",
+                    status=dispatch.response_status or 200,
+                )
+            if not created:
+                response["X-Scan-Deduplicated"] = "true"
+            return response
+
+        # Retries with the same Idempotency-Key, and triggers for a tenant/provider/
+        # hierarchy that is already scanning, get the existing orchestration back
+        return idempotent(
+            request, "scan-trigger", str(body["tenant_id"]),
+            lambda: deduplicated_scan(
+                "orchestrate", body, trigger,
+                status_path="/onboarding/api/v1/scan/orchestration/{job_id}",
+                id_fields=("orchestration_id",),
+            ),
+        )
 
 
 class ScanStatusView(View):
+    """
+    Served from the state the orchestrator pushes to /api/internal/events/
+    when it is terminal or recent; otherwise the engine is polled and the
+    result recorded.
+    """
 
     def get(self, request, orchestration_id):
         tenant_id = request.GET.get("tenant_id", "")
-        
+
+        # Accepts the dispatch_id of a queued trigger as well as an orchestration id
+        dispatch = scan_queue.lookup(orchestration_id)
+        queue = scan_queue.describe(dispatch) if dispatch is not None else None
+        if dispatch is not None:
+            if not dispatch.orchestration_id:
+                return success_response(
+                    data={
+                        "orchestration_id": None,
+                        "engines": {},
+                        "queue": queue,
+                        "source": "queue",
+                    },
+                    message="Scan status fetched",
+                )
+            orchestration_id = dispatch.orchestration_id
+
+        state = events.local_state(orchestration_id, source="orchestrator")
+        if state is not None and events.is_current(state):
+            return success_response(
+                data={
+                    "orchestration_id": orchestration_id,
+                    "engines": {"orchestration": dict(state.payload, status=state.status)},
+                    "queue": queue,
+                    "source": "event",
+                    "updated_at": state.updated_at.isoformat(),
+                },
+                message="Scan status fetched",
+            )
+
         status_endpoints = {
             "orchestration": f"/onboarding/api/v1/scan/orchestration/{orchestration_id}",
         }
@@ -296,30 +536,141 @@ class ScanStatusView(View):
             except EngineError:
                 results[engine_name] = {"status": "unknown", "error": "Engine unreachable"}
 
+        orchestration = results.get("orchestration")
+        current = scan_status(orchestration)
+        if current and current != "unknown":
+            # Warms the dashboard cache / releases the dedupe entry on completion.
+            # The tenant comes from what we stored or the engine's reply, never
+            # from the (unauthenticated) query string.
+            record = orchestration.get("data") if isinstance(orchestration.get("data"), dict) else orchestration
+            if dispatch is not None:
+                owner = dispatch.tenant_id
+            elif state is not None and state.tenant_id:
+                owner = state.tenant_id
+            else:
+                owner = record.get("tenant_id")
+            events.observe("orchestrator", "orchestration", orchestration_id, owner, current, record)
+
         return success_response(
             data={
                 "orchestration_id": orchestration_id,
                 "engines": results,
+                "queue": queue,
+                "source": "engine",
             },
             message="Scan status fetched",
         )
 
 
-class EngineHealthView(View):
+@method_decorator(csrf_exempt, name="dispatch")
+class EngineEventView(View):
+    """
+    POST /api/internal/events/ — job state changes pushed by the engines.
+    Authenticated by an HMAC-SHA256 signature (see events.py), not by user
+    session; the route is meant to be reachable from the internal network only.
+    """
+
+    def post(self, request):
+        if not settings.ENGINE_WEBHOOK_SECRET:
+            return error_response("Engine webhooks are not configured", 503)
+        if not events.verify_signature(
+            request.body,
+            request.headers.get(events.TIMESTAMP_HEADER, ""),
+            request.headers.get(events.SIGNATURE_HEADER, ""),
+        ):
+            return error_response("Invalid or expired signature", 401)
+
+        try:
+            event = events.parse_event(json.loads(request.body))
+        except ValueError:
+            return error_response("Invalid JSON body", 400)
+        except events.InvalidEvent as e:
+            return error_response(str(e), 400)
+
+        state, changed = events.record(event)
+        if changed:
+            events.fan_out(state)
+        return success_response(
+            data={"job_id": event["job_id"], "recorded": changed},
+            message="Event received",
+            status=202,
+        )
+
+
+class ScanEventStreamView(View):
+    """
+    GET /api/onboarding/events/stream/?tenant_id= — the tenant's job state
+    events as Server-Sent Events. Reconnects resume from Last-Event-ID.
+    """
+    POLL_INTERVAL = 1.0
+    KEEPALIVE_SECONDS = 15
+    MAX_STREAM_SECONDS = 600
+
+    _auth_backend = CookieTokenAuthentication()
 
     def get(self, request):
-        results = []
-        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_engine = {
-                executor.submit(engine_client.check_health, name): name
-                for name in [
-                    "onboarding", "discoveries", "check", "inventory",
-                    "compliance", "threat", "iam", "datasec", "secops", "gateway",
-                ]
-            }
-            for future in as_completed(future_to_engine):
-                results.append(future.result())
+        if not self._auth_backend.authenticate(request):
+            return error_response("Authentication required.", 401)
+        tenant_id = request.GET.get("tenant_id", "")
+        if not tenant_id:
+            return error_response("tenant_id is required", 400)
+        if not scope_allows(request.auth_context, "tenant_ids", tenant_id):
+            return error_response("Permission denied for this tenant", 403)
+
+        last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        try:
+            cursor = int(last_id) if last_id else events.latest_seq(tenant_id)
+        except ValueError:
+            cursor = -1
+        if cursor < 0:
+            return error_response("Last-Event-ID must be a non-negative integer", 400)
+
+        response = StreamingHttpResponse(self._stream(tenant_id, cursor), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def _stream(self, tenant_id, cursor):
+        # Async so an idle subscriber waits in asyncio.sleep instead of
+        # holding a worker thread for up to MAX_STREAM_SECONDS
+        read_since = sync_to_async(events.read_since, thread_sensitive=False)
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + self.MAX_STREAM_SECONDS
+        last_write = time.monotonic()
+        while time.monotonic() < deadline:
+            for seq, event in await read_since(tenant_id, cursor):
+                cursor = seq
+                yield f"id: {seq}\nevent: job\ndata: {json.dumps(event)}\n\n"
+                last_write = time.monotonic()
+            if time.monotonic() - last_write >= self.KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_write = time.monotonic()
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+
+class EngineHealthView(View):
+    """
+    Served from the background health monitor's snapshot; ?live=1 (or a
+    missing/stale snapshot) probes the engines directly.
+    """
+
+    async def get(self, request):
+        health_monitor.start()
+        live = request.GET.get("live", "").lower() in ("1", "true")
+        snapshot = None if live else await health_monitor.asnapshot()
+
+        if snapshot is None:
+            results = [
+                dict(result, latency_ms=latency_ms)
+                for result, latency_ms in await health_monitor.probe()
+            ]
+            source, checked_at = "live", timezone.now().isoformat()
+        else:
+            results = [
+                dict(engine, history={k: v for k, v in engine["history"].items() if k != "samples"})
+                for engine in snapshot["engines"]
+            ]
+            source, checked_at = "snapshot", snapshot["checked_at"]
 
         results.sort(key=lambda x: x["engine"])
         
@@ -335,88 +686,141 @@ class EngineHealthView(View):
                     "unhealthy": total_count - healthy_count,
                     "all_healthy": healthy_count == total_count,
                 },
+                "source": source,
+                "checked_at": checked_at,
             },
             message=f"{healthy_count}/{total_count} engines healthy",
         )
 
 class DashboardSummaryView(View):
+    """
+    Served from the tenant's dashboard snapshot (stale-while-revalidate):
+    stale sections are returned immediately and refreshed in the background.
+    """
 
-    def get(self, request):
+    async def get(self, request):
         tenant_id = request.GET.get("tenant_id", "")
         scan_run_id = request.GET.get("scan_run_id", "")
 
         if not tenant_id:
             return error_response("tenant_id is required")
 
+        snapshot, generation, refreshing = await dashboard_snapshot.get_snapshot(tenant_id, scan_run_id)
+
         summary = {}
+        freshness = {}
         errors = []
-
-        def fetch_inventory():
-            try:
-                data, _ = engine_client.get(
-                    "/inventory/api/v1/inventory/runs/latest/summary",
-                    params={"tenant_id": tenant_id},
-                    timeout=10,
-                )
-                return "inventory", data
-            except EngineError:
-                return "inventory", None
-
-        def fetch_threats():
-            try:
-                params = {"tenant_id": tenant_id}
-                if scan_run_id:
-                    params["scan_run_id"] = scan_run_id
-                data, _ = engine_client.get(
-                    "/threat/api/v1/threat/analytics/distribution",
-                    params=params,
-                    timeout=10,
-                )
-                return "threats", data
-            except EngineError:
-                return "threats", None
-
-        def fetch_compliance():
-            try:
-                data, _ = engine_client.get(
-                    "/compliance/api/v1/compliance/reports",
-                    params={"tenant_id": tenant_id, "limit": 1},
-                    timeout=10,
-                )
-                return "compliance", data
-            except EngineError:
-                return "compliance", None
-
-        def fetch_accounts():
-            try:
-                data, _ = engine_client.get(
-                    "/onboarding/api/v1/cloud-accounts",
-                    timeout=10,
-                )
-                return "accounts", data
-            except EngineError:
-                return "accounts", None
-
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [
-                executor.submit(fetch_inventory),
-                executor.submit(fetch_threats),
-                executor.submit(fetch_compliance),
-                executor.submit(fetch_accounts),
-            ]
-            for future in as_completed(futures):
-                key, data = future.result()
-                if data is not None:
-                    summary[key] = data
-                else:
-                    errors.append(key)
-                    summary[key] = None
+        for key, entry in snapshot.items():
+            summary[key] = entry["data"]
+            if entry["data"] is None:
+                errors.append(key)
+            freshness[key] = {
+                "fetched_at": entry["fetched_at"],
+                "stale": dashboard_snapshot.is_stale(entry, generation),
+                "error": entry["error"],
+            }
 
         return success_response(
             data={
                 "tenant_id": tenant_id,
                 "summary": summary,
                 "unavailable_engines": errors,
+                "freshness": freshness,
+                "refreshing": refreshing,
             },
             message="Dashboard summary fetched",
         )
+
+
+class ScanScheduleViewSet(viewsets.ModelViewSet):
+    """
+    CRUD for scheduled scans. next_run_at is recomputed whenever the cron,
+    timezone, jitter or enabled flag changes; run_scan_scheduler dispatches them.
+    """
+    serializer_class = ScanScheduleSerializer
+    authentication_classes = [CookieTokenAuthentication]
+
+    def get_permissions(self):
+        if self.action in ('list', 'retrieve'):
+            return [IsCSPMAuthenticated(), require_operation('tenant:schedules:read')()]
+        return [IsCSPMAuthenticated(), require_operation('tenant:schedules:write')()]
+
+    def get_queryset(self):
+        queryset = ScanSchedule.objects.select_related('created_by').order_by('-created_at')
+        allowed = scope_values(self.request.auth_context, 'tenant_ids')
+        if allowed is not None:
+            queryset = queryset.filter(tenant_id__in=allowed)
+        if self.request.query_params.get('tenant_id'):
+            queryset = queryset.filter(tenant_id=self.request.query_params['tenant_id'])
+        if self.request.query_params.get('account_id'):
+            queryset = queryset.filter(account_id=self.request.query_params['account_id'])
+        return queryset
+
+    def _check_tenant(self, serializer):
+        tenant = serializer.validated_data.get('tenant')
+        if tenant is not None and not scope_allows(self.request.auth_context, 'tenant_ids', tenant.id):
+            raise PermissionDenied('Access to this tenant is not permitted.')
+
+    def _schedule_next_run(self, schedule):
+        schedule.next_run_at = compute_next_run(schedule) if schedule.is_enabled else None
+        schedule.save(update_fields=['next_run_at', 'updated_at'])
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response({
+            "success": True,
+            "message": "Scan schedules fetched successfully",
+            "data": serializer.data,
+            "pagination": None,
+        })
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response({
+            "success": True,
+            "message": "Scan schedule fetched successfully",
+            "data": self.get_serializer(self.get_object()).data,
+            "pagination": None,
+        })
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self._check_tenant(serializer)
+        schedule = serializer.save(created_by=request.user)
+        self._schedule_next_run(schedule)
+
+        return Response(
+            {
+                "success": True,
+                "message": "Scan schedule created successfully",
+                "data": self.get_serializer(schedule).data,
+                "pagination": None,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self._check_tenant(serializer)
+        schedule = serializer.save()
+        timing = {'cron', 'timezone', 'jitter_seconds', 'is_enabled'}
+        if timing & set(serializer.validated_data):
+            self._schedule_next_run(schedule)
+
+        return Response({
+            "success": True,
+            "message": "Scan schedule updated successfully",
+            "data": self.get_serializer(schedule).data,
+            "pagination": None,
+        })
+
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        return Response(
+            {"success": True, "message": f"Scan schedule '{instance.name}' deleted successfully"},
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,299 @@
+"""
+Signed access tokens (AUTH_TOKEN_MODE = "jwt").
+
+In this mode the access_token cookie holds a short-lived HS256 JWT instead of
+an opaque token, so CookieTokenAuthentication can verify it without touching
+user_sessions:
+
+    {"sub": <user id>, "sid": <session id>, "email", "fn", "ln", "lm",
+     "grt": <grant reference>, "iat", "exp"}
+
+"grt" is a content hash of the session's permissions_cache + scope_cache. The
+grant itself is stored once in the Django cache (and memoised per process),
+so tokens stay small and users with identical roles share one entry. A grant
+that was evicted is re-read from the session row the token names.
+
+UserSessions stays the source of truth: tokens are only minted at login,
+invitation acceptance, SAML sign-in and refresh, and never outlive their
+session. Deleted sessions, and sessions whose permissions changed, are added
+to the revoked_access_tokens table; a row rejects that session's tokens issued
+before it and expires once every such token has expired (session_reaper
+deletes it then). Each process mirrors the live rows and pulls new ones by id
+at most every JWT_REVOCATION_SYNC_SECONDS. The table, unlike a per-process
+cache, is shared by every replica and never evicts an entry early.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from . import operation_catalog
+from .scopes import UNRESTRICTED, unpack_scope
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = 'HS256'
+LEEWAY_SECONDS = 5
+# Ids skipped by a sync are re-read this long, in case their insert was still uncommitted
+REVOCATION_GAP_SECONDS = 60
+MAX_LOCAL_GRANTS = 1024
+
+_lock = threading.Lock()
+_grants = OrderedDict()
+_revoked = {}
+_synced_seq = 0
+_gaps = {}  # id below _synced_seq not seen yet -> monotonic time it was first missed
+_next_sync = 0.0
+
+
+def enabled():
+    return settings.AUTH_TOKEN_MODE == 'jwt'
+
+
+def looks_like_jwt(token):
+    # Opaque tokens are urlsafe base64 and never contain dots
+    return token.count('.') == 2
+
+
+def lifetime():
+    """Lifetime of the access token handed to the client in the current mode."""
+    if enabled():
+        return timedelta(minutes=settings.JWT_ACCESS_TOKEN_LIFETIME_MINUTES)
+    return timedelta(minutes=getattr(settings, 'ACCESS_TOKEN_LIFETIME_MINUTES', 60))
+
+
+def expires_in():
+    return f"{int(lifetime().total_seconds() // 60)}m"
+
+
+def _signing_key():
+    return settings.JWT_SIGNING_KEY or settings.SECRET_KEY
+
+
+def _revocation_ttl():
+    return int(timedelta(minutes=settings.JWT_ACCESS_TOKEN_LIFETIME_MINUTES).total_seconds()) + LEEWAY_SECONDS
+
+
+# ── Grants ───────────────────────────────────────────────────────────────────
+
+def _grant_key(reference):
+    return f"auth:grant:{reference}"
+
+
+def grant_reference(permissions, scope):
+    payload = json.dumps({'permissions': permissions, 'scope': scope}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _remember_grant(reference, grant):
+    with _lock:
+        _grants[reference] = grant
+        _grants.move_to_end(reference)
+        while len(_grants) > MAX_LOCAL_GRANTS:
+            _grants.popitem(last=False)
+
+
+def store_grant(permissions, scope):
+    """Publish a session's grant and return its reference."""
+    permissions = permissions or operation_catalog.pack([])
+    scope = scope or UNRESTRICTED
+    reference = grant_reference(permissions, scope)
+    grant = {'permissions': permissions, 'scope': scope}
+    # Outlives every token minted now; refreshed on each issue
+    cache.set(_grant_key(reference), grant, _revocation_ttl() * 2)
+    _remember_grant(reference, grant)
+    return reference
+
+
+def load_grant(reference, session_id):
+    """Grant for a reference: process memo, then the cache, then the session row."""
+    with _lock:
+        grant = _grants.get(reference)
+        if grant is not None:
+            _grants.move_to_end(reference)
+            return grant
+
+    grant = cache.get(_grant_key(reference))
+    if grant is None:
+        from .models import UserSessions
+        row = UserSessions.objects.filter(
+            pk=session_id, revoked=False, expires_at__gt=timezone.now()
+        ).values('permissions_cache', 'scope_cache').first()
+        if row is None:
+            return None
+        # The session was refreshed with different grants since this token was minted
+        if store_grant(row['permissions_cache'], row['scope_cache']) != reference:
+            return None
+        with _lock:
+            return _grants.get(reference)
+    _remember_grant(reference, grant)
+    return grant
+
+
+# ── Tokens ───────────────────────────────────────────────────────────────────
+
+def issue(session):
+    """Signed access token for a session (its user must be loaded)."""
+    user = session.user
+    now = timezone.now()
+    expires = min(now + lifetime(), session.expires_at)
+    claims = {
+        'sub': str(user.id),
+        'sid': str(session.id),
+        'email': user.email,
+        'fn': user.first_name,
+        'ln': user.last_name,
+        'lm': session.login_method,
+        'grt': store_grant(session.permissions_cache, session.scope_cache),
+        # Millisecond precision, so a token minted right after revoke() is told apart
+        'iat': round(now.timestamp(), 3),
+        'exp': int(expires.timestamp()),
+    }
+    return jwt.encode(claims, _signing_key(), algorithm=ALGORITHM)
+
+
+def cookie_token(session, opaque_token):
+    """Value for the access_token cookie: a signed token in jwt mode, else the opaque one."""
+    if enabled():
+        return issue(session)
+    return opaque_token
+
+
+def decode(token):
+    """Verified claims, or None for a forged, malformed or expired token."""
+    try:
+        return jwt.decode(
+            token, _signing_key(), algorithms=[ALGORITHM], leeway=LEEWAY_SECONDS,
+            options={'require': ['sub', 'sid', 'grt', 'exp']},
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+
+def authenticate(token):
+    """
+    (user, session, auth_context) for a valid, unrevoked token, or None.
+
+    user and session are built from the claims; any other field is loaded
+    from the database on first access (deferred fields).
+    """
+    from .models import Users, UserSessions
+
+    claims = decode(token)
+    if claims is None or is_revoked(claims['sid'], claims.get('iat', 0)):
+        return None
+    grant = load_grant(claims['grt'], claims['sid'])
+    if grant is None:
+        return None
+    permissions = operation_catalog.unpack(grant['permissions'])
+    if permissions is None:
+        return None
+
+    user = Users.from_db(
+        'default', ['id', 'email', 'first_name', 'last_name'],
+        [claims['sub'], claims.get('email'), claims.get('fn'), claims.get('ln')],
+    )
+    session = UserSessions.from_db(
+        'default', ['id', 'user_id', 'login_method'],
+        [claims['sid'], claims['sub'], claims.get('lm')],
+    )
+    session.user = user
+    auth_context = {
+        'user_id': claims['sub'],
+        'email': claims.get('email'),
+        'first_name': claims.get('fn'),
+        'last_name': claims.get('ln'),
+        'permissions': permissions,
+        'scope': unpack_scope(grant['scope']),
+        'session_id': claims['sid'],
+        'login_method': claims.get('lm'),
+    }
+    return user, session, auth_context
+
+
+# ── Revocation list ──────────────────────────────────────────────────────────
+
+def revoke(session_ids):
+    """
+    Reject access tokens of these sessions issued up to now, everywhere, until
+    they would have expired. Tokens minted afterwards (e.g. on refresh) are valid.
+    """
+    from .models import RevokedAccessTokens
+
+    session_ids = [str(session_id) for session_id in session_ids]
+    if not session_ids:
+        return
+    revoked_at = time.time()
+    expires = revoked_at + _revocation_ttl()
+    expires_at = timezone.now() + timedelta(seconds=_revocation_ttl())
+    RevokedAccessTokens.objects.bulk_create([
+        RevokedAccessTokens(session_id=session_id, revoked_at=revoked_at, expires_at=expires_at)
+        for session_id in session_ids
+    ])
+    with _lock:
+        for session_id in session_ids:
+            _revoked[session_id] = (revoked_at, expires)
+
+
+def _sync():
+    from .models import RevokedAccessTokens
+
+    global _synced_seq, _next_sync
+    now = time.monotonic()
+    with _lock:
+        start = _synced_seq
+        gaps = [seq for seq, missed in _gaps.items() if now - missed < REVOCATION_GAP_SECONDS]
+        _next_sync = now + settings.JWT_REVOCATION_SYNC_SECONDS
+    queryset = RevokedAccessTokens.objects.all()
+    if start == 0:
+        # First sync of this process: only the live rows matter
+        queryset = queryset.filter(expires_at__gt=timezone.now())
+    else:
+        condition = Q(id__gt=start)
+        if gaps:
+            condition |= Q(id__in=gaps)
+        queryset = queryset.filter(condition)
+    rows = list(queryset.values_list('id', 'session_id', 'revoked_at', 'expires_at'))
+
+    wall = time.time()
+    with _lock:
+        last = start
+        found = set()
+        for seq, session_id, revoked_at, expires_at in rows:
+            found.add(seq)
+            last = max(last, seq)
+            known = _revoked.get(session_id)
+            if known is None or revoked_at > known[0]:
+                _revoked[session_id] = (revoked_at, expires_at.timestamp())
+        # Ids are handed out before commit, so a lower one may still show up
+        for seq in found:
+            _gaps.pop(seq, None)
+        if start:
+            for seq in range(start + 1, last):
+                if seq not in found:
+                    _gaps.setdefault(seq, now)
+        for seq in [seq for seq, missed in _gaps.items() if now - missed >= REVOCATION_GAP_SECONDS]:
+            del _gaps[seq]
+        for session_id in [sid for sid, (_, expires) in _revoked.items() if expires <= wall]:
+            del _revoked[session_id]
+        _synced_seq = max(_synced_seq, last)
+
+
+def is_revoked(session_id, issued_at):
+    if time.monotonic() >= _next_sync:
+        try:
+            _sync()
+        except Exception as exc:
+            logger.warning("Access token revocation sync failed: %s", exc)
+    with _lock:
+        entry = _revoked.get(session_id)
+    return entry is not None and issued_at <= entry[0] and entry[1] > time.time()
@@ -3,18 +3,33 @@ CookieTokenAuthentication — DRF authentication backend.
 
 Flow:
 1. Extract access_token from HTTP-only cookie
-2. Use token_hint (first 8 chars) for indexed DB lookup
-3. Verify full token hash (PBKDF2)
-4. Read permissions_cache + scope_cache from session row
-5. Attach auth_context to request (zero extra DB queries at runtime)
+2. Look the session up by the token's HMAC-SHA256 digest (unique index);
+   sessions still holding a legacy PBKDF2 hash are found by token_hint,
+   verified once and upgraded to the digest
+3. Read permissions_cache (a bitset, see operation_catalog) + scope_cache
+   (interned id bitmaps, see scopes) from session row
+4. Attach auth_context to request (zero extra DB queries at runtime)
+5. Note the request in session_activity (written behind in batches); with
+   SESSION_IDLE_TIMEOUT_MINUTES set, idle sessions are rejected
+
+With a shared cache backend, verified sessions are kept briefly in an
+in-process LRU (see session_cache), so repeat requests with the same token
+skip the database entirely.
+
+With AUTH_TOKEN_MODE = "jwt" the cookie holds a signed access token that is
+verified in memory instead (see access_tokens); opaque tokens issued before
+the switch keep working until they expire.
 """
 import logging
+from collections import defaultdict
 from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
+from . import access_tokens, operation_catalog, role_sets, session_activity, session_cache
 from .models import UserSessions
-from .utils.auth_utils import verify_token
+from .scopes import pack_scope, unpack_scope
+from .utils.auth_utils import find_by_token, hash_token
 
 logger = logging.getLogger(__name__)
 
@@ -30,25 +45,46 @@ class CookieTokenAuthentication(BaseAuthentication):
         if not token:
             return None
 
-        token_hint = token[:8]
-
+        if access_tokens.enabled() and access_tokens.looks_like_jwt(token):
+            verified = access_tokens.authenticate(token)
+            if verified is None:
+                return None
+            user, session, auth_context = verified
+            if session_activity.is_idle(session):
+                return None
+            request.auth_context = auth_context
+            session_activity.record(session.pk, request.META.get('REMOTE_ADDR'))
+            return (user, session)
+
+        digest = hash_token(token)
+        cached = session_cache.get(digest)
+        # Idle as far as this process knows: the row may know better
+        if cached is not None and not session_activity.is_idle(cached[1]):
+            user, session, request.auth_context = cached
+            session_activity.record(session.pk, request.META.get('REMOTE_ADDR'))
+            return (user, session)
+
+        active = UserSessions.objects.filter(revoked=False, expires_at__gt=timezone.now())
         try:
-            sessions = UserSessions.objects.filter(
-                token_hint=token_hint,
-                revoked=False,
-                expires_at__gt=timezone.now(),
-            ).select_related('user')
+            session = find_by_token(active.select_related('user'), token)
+            if session is None:
+                return None
+            # Epochs read between two sightings of the session: a revocation
+            # racing with this lookup either fails the re-check or bumps past them
+            epochs = session_cache.current_epochs(session.user_id)
+            if not active.filter(pk=session.pk).exists():
+                return None
         except Exception as exc:
             logger.error("Session DB lookup failed: %s", exc)
             return None
+        if session_activity.is_idle(session):
+            return None
 
-        for session in sessions:
-            if verify_token(token, session.token):
-                auth_context = _build_auth_context(session)
-                request.auth_context = auth_context
-                return (session.user, session)
-
-        return None
+        auth_context = _build_auth_context(session)
+        session_cache.put(digest, session.user, session, auth_context, epochs)
+        request.auth_context = auth_context
+        session_activity.record(session.pk, request.META.get('REMOTE_ADDR'))
+        return (session.user, session)
 
     def authenticate_header(self, request):
         return 'Cookie realm="api"'
@@ -56,47 +92,77 @@ class CookieTokenAuthentication(BaseAuthentication):
 
 def _build_auth_context(session):
     """Build auth context dict from a valid session."""
+    permissions = operation_catalog.unpack(session.permissions_cache)
+    if permissions is None:
+        # Packed under a catalog version nobody remembers any more
+        permissions = operation_catalog.PermissionSet.from_keys(resolve_user_permissions(session.user))
+    packed = permissions.pack()
+    if session.permissions_cache != packed:
+        UserSessions.objects.filter(pk=session.pk).update(permissions_cache=packed)
+        session.permissions_cache = packed
+    scope = unpack_scope(session.scope_cache)
+    if any(isinstance(value, list) for value in (session.scope_cache or {}).values()):
+        # Legacy lists of ids; store them as bitmaps from now on
+        session.scope_cache = pack_scope(scope)
+        UserSessions.objects.filter(pk=session.pk).update(scope_cache=session.scope_cache)
     return {
         'user_id': str(session.user.id),
         'email': session.user.email,
         'first_name': session.user.first_name,
         'last_name': session.user.last_name,
-        'permissions': session.permissions_cache or [],
-        'scope': session.scope_cache or {
-            'org_ids': None,
-            'tenant_ids': None,
-            'account_ids': None,
-        },
+        'permissions': permissions,
+        'scope': scope,
         'session_id': str(session.id),
         'login_method': session.login_method,
     }
 
 
-def resolve_user_permissions(user):
+def resolve_role_permissions(role_ids):
     """
-    Resolve all operation keys for a user across all their roles.
-    Used at login time to populate permissions_cache.
-    Returns a sorted list of unique operation key strings.
+    Operation keys granted by each role, as {role_id: set of keys}.
+    role_ids may be a list or a values_list queryset (used as a subquery).
     """
-    from .models import UserRoles, RoleOperations, RolePermissions
+    from .models import RoleOperations, RolePermissions
 
-    keys = set()
-
-    role_ids = UserRoles.objects.filter(user=user).values_list('role_id', flat=True)
+    grants = defaultdict(set)
 
     # New: RoleOperations
-    op_keys = RoleOperations.objects.filter(
+    for role_id, key in RoleOperations.objects.filter(
         role_id__in=role_ids
-    ).select_related('operation').values_list('operation__key', flat=True)
-    keys.update(op_keys)
+    ).values_list('role_id', 'operation__key'):
+        grants[role_id].add(key)
 
     # Legacy: RolePermissions
-    perm_keys = RolePermissions.objects.filter(
+    for role_id, key in RolePermissions.objects.filter(
         role_id__in=role_ids
-    ).select_related('permission').values_list('permission__key', flat=True)
-    keys.update(perm_keys)
+    ).values_list('role_id', 'permission__key'):
+        grants[role_id].add(key)
+
+    return grants
+
+
+def resolve_user_permissions(user):
+    """
+    Resolve all operation keys for a user across all their roles.
+    Used at login time to populate permissions_cache.
+    Returns a sorted list of unique operation key strings.
+    """
+    from .models import UserRoles
 
-    return sorted(keys)
+    role_ids = UserRoles.objects.filter(user=user).values_list('role_id', flat=True)
+    return role_sets.permissions_for(role_ids)
+
+
+def resolve_user_access(user):
+    """
+    (resolve_user_permissions, resolve_user_scope packed for scope_cache) for
+    login/refresh: one UserRoles query, plus one UserAdminScope query below
+    platform admin.
+    """
+    user_id = str(user.id)
+    role_rows = resolve_role_rows([user_id])
+    permissions = role_sets.permissions_for(role_id for role_id, _, _, _ in role_rows.get(user_id, []))
+    return permissions, pack_scope(resolve_scopes([user_id], role_rows=role_rows)[user_id])
 
 
 def resolve_user_scope(user):
@@ -105,48 +171,74 @@ def resolve_user_scope(user):
     platform_admin has None scope = unrestricted.
     Returns dict: {org_ids, tenant_ids, account_ids}
     """
-    from .models import UserRoles, UserAdminScope
-
-    PLATFORM_ADMIN_LEVEL = 1
-    ORG_ADMIN_LEVEL = 2
-
-    user_role_rows = UserRoles.objects.filter(user=user).select_related('role')
-    min_level = min((ur.role.level for ur in user_role_rows), default=5)
-
-    # Platform admin = unrestricted
-    if min_level <= PLATFORM_ADMIN_LEVEL:
-        return {'org_ids': None, 'tenant_ids': None, 'account_ids': None}
-
-    # Org admin: get their org scope
-    if min_level <= ORG_ADMIN_LEVEL:
-        org_ids = list(
-            UserAdminScope.objects.filter(
-                user=user, scope_type='org'
-            ).values_list('scope_id', flat=True)
-        )
-        return {'org_ids': org_ids or None, 'tenant_ids': None, 'account_ids': None}
-
-    # Tenant/Account admin
-    tenant_ids = list(
-        UserRoles.objects.filter(
-            user=user, role__scope_level='tenant'
-        ).exclude(tenant_id=None).values_list('tenant_id', flat=True)
-    )
-    tenant_scope_ids = list(
-        UserAdminScope.objects.filter(
-            user=user, scope_type='tenant'
-        ).values_list('scope_id', flat=True)
-    )
-    tenant_ids = list(set(tenant_ids + tenant_scope_ids)) or None
-
-    account_ids = list(
-        UserAdminScope.objects.filter(
-            user=user, scope_type='account'
-        ).values_list('scope_id', flat=True)
-    ) or None
+    return resolve_scopes([user.id])[str(user.id)]
 
-    return {
-        'org_ids': None,
-        'tenant_ids': tenant_ids,
-        'account_ids': account_ids,
+
+PLATFORM_ADMIN_LEVEL = 1
+ORG_ADMIN_LEVEL = 2
+
+
+def resolve_role_rows(user_ids):
+    """{user_id: [(role_id, role level, role scope_level, tenant_id)]}"""
+    from .models import UserRoles
+
+    rows = defaultdict(list)
+    for user_id, role_id, level, scope_level, tenant_id in UserRoles.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'role_id', 'role__level', 'role__scope_level', 'tenant_id'):
+        rows[user_id].append((role_id, level, scope_level, tenant_id))
+    return rows
+
+
+def resolve_scopes(user_ids, role_rows=None):
+    """resolve_user_scope for many users in two queries, as {user_id: scope}."""
+    from .models import UserAdminScope
+
+    user_ids = [str(user_id) for user_id in user_ids]
+    if role_rows is None:
+        role_rows = resolve_role_rows(user_ids)
+    min_levels = {
+        user_id: min((level for _, level, _, _ in role_rows.get(user_id, [])), default=5)
+        for user_id in user_ids
     }
+
+    admin_scopes = defaultdict(lambda: defaultdict(list))
+    scoped_users = [user_id for user_id, level in min_levels.items() if level > PLATFORM_ADMIN_LEVEL]
+    if scoped_users:
+        for user_id, scope_type, scope_id in UserAdminScope.objects.filter(
+            user_id__in=scoped_users
+        ).values_list('user_id', 'scope_type', 'scope_id'):
+            admin_scopes[user_id][scope_type].append(scope_id)
+
+    scopes = {}
+    for user_id in user_ids:
+        rows = role_rows.get(user_id, [])
+        user_scopes = admin_scopes.get(user_id, {})
+        min_level = min_levels[user_id]
+
+        # Platform admin = unrestricted
+        if min_level <= PLATFORM_ADMIN_LEVEL:
+            scopes[user_id] = {'org_ids': None, 'tenant_ids': None, 'account_ids': None}
+            continue
+
+        # Org admin: get their org scope
+        if min_level <= ORG_ADMIN_LEVEL:
+            scopes[user_id] = {
+                'org_ids': list(user_scopes.get('org', [])) or None,
+                'tenant_ids': None,
+                'account_ids': None,
+            }
+            continue
+
+        # Tenant/Account admin
+        tenant_ids = [
+            tenant_id for _, _, scope_level, tenant_id in rows
+            if scope_level == 'tenant' and tenant_id is not None
+        ]
+        tenant_ids = list(set(tenant_ids + user_scopes.get('tenant', []))) or None
+        scopes[user_id] = {
+            'org_ids': None,
+            'tenant_ids': tenant_ids,
+            'account_ids': list(user_scopes.get('account', [])) or None,
+        }
+    return scopes
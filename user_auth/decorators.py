@@ -23,6 +23,8 @@ import logging
 from functools import wraps
 from django.http import JsonResponse
 
+from .operation_catalog import has_any_operation, is_platform_admin, missing_operations
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,10 +53,8 @@ def has_operations(*operation_keys, match='all'):
             if not auth_context:
                 return _auth_error('Authentication required.', 401)
 
-            user_perms = set(auth_context.get('permissions', []))
-
             if match == 'all':
-                missing = [k for k in operation_keys if k not in user_perms]
+                missing = missing_operations(auth_context, *operation_keys)
                 if missing:
                     logger.warning(
                         "Access denied for user %s — missing operations: %s",
@@ -65,7 +65,7 @@ def has_operations(*operation_keys, match='all'):
                         403
                     )
             elif match == 'any':
-                if not user_perms.intersection(operation_keys):
+                if not has_any_operation(auth_context, *operation_keys):
                     return _auth_error(
                         f'Permission denied. Requires one of: {", ".join(operation_keys)}',
                         403
@@ -94,8 +94,7 @@ def platform_admin_required(view_func):
         auth_context = getattr(request, 'auth_context', None)
         if not auth_context:
             return _auth_error('Authentication required.', 401)
-        perms = auth_context.get('permissions', [])
-        if not any(p.startswith('platform:') for p in perms):
+        if not is_platform_admin(auth_context):
             return _auth_error('Platform admin access required.', 403)
         return view_func(request, *args, **kwargs)
     return wrapper
@@ -0,0 +1,75 @@
+"""
+Management command: backfill_session_tokens
+
+Sessions and invitations created before tokens were stored as HMAC digests
+still hold PBKDF2 hashes. Access tokens and invitations are upgraded the first
+time they're used (they carry a token_hint), but legacy refresh tokens can
+only be found by trying each one, which RefreshTokenView / LogoutView cap at
+LEGACY_REFRESH_TOKEN_SCAN_LIMIT rows. A hash can't be turned into a digest
+offline, so this command reports what is left and clears it out.
+
+Usage:
+    python manage.py backfill_session_tokens                          # report only
+    python manage.py backfill_session_tokens --purge-expired          # reap expired/revoked sessions now
+    python manage.py backfill_session_tokens --revoke-legacy-refresh  # drop live legacy refresh tokens
+
+With --revoke-legacy-refresh, affected users keep their current access token
+and sign in again once it expires. Set LEGACY_REFRESH_TOKEN_SCAN_LIMIT=0 when
+the report shows no legacy refresh tokens.
+"""
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from user_auth.models import UserSessions, UserInvitations
+from user_auth.utils.auth_utils import DIGEST_PREFIX
+
+
+def _legacy(field):
+    return Q(**{f"{field}__isnull": False}) & ~Q(**{f"{field}__startswith": DIGEST_PREFIX})
+
+
+class Command(BaseCommand):
+    help = 'Report and clean up session/invitation tokens still stored as PBKDF2 hashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge-expired',
+            action='store_true',
+            help='Delete expired or revoked sessions'
+        )
+        parser.add_argument(
+            '--revoke-legacy-refresh',
+            action='store_true',
+            help='Clear PBKDF2 refresh tokens of live sessions (forces sign-in when the access token expires)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        dead = Q(expires_at__lte=now) | Q(revoked=True)
+
+        if options['purge_expired']:
+            call_command('reap_sessions', '--all', stdout=self.stdout)
+
+        if options['revoke_legacy_refresh']:
+            cleared = UserSessions.objects.filter(_legacy('refresh_token')).exclude(dead).update(refresh_token=None)
+            self.stdout.write(f"Cleared {cleared} legacy refresh token(s)")
+
+        live = UserSessions.objects.exclude(dead)
+        report = [
+            ("Live sessions", live.count()),
+            ("  legacy access tokens", live.filter(_legacy('token')).count()),
+            ("  legacy refresh tokens", live.filter(_legacy('refresh_token')).count()),
+            ("Expired/revoked sessions", UserSessions.objects.filter(dead).count()),
+            ("Pending invitations with legacy tokens", UserInvitations.objects.filter(
+                _legacy('token'), status='pending', expires_at__gt=now,
+            ).count()),
+        ]
+        for label, count in report:
+            self.stdout.write(f"{label}: {count}")
+
+        if report[2][1] == 0:
+            self.stdout.write(self.style.SUCCESS(
+                "No legacy refresh tokens left; LEGACY_REFRESH_TOKEN_SCAN_LIMIT can be set to 0."
+            ))
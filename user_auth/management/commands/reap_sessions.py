@@ -0,0 +1,51 @@
+"""
+Management command: reap_sessions
+
+Deletes expired and revoked user_sessions rows, and expired access token
+revocations, in small batches (see user_auth.session_reaper). Workers already
+do this in the background unless SESSION_REAPER_INTERVAL_SECONDS=0; use this
+command from cron in that case, or to clear a large backlog once.
+
+Usage:
+    python manage.py reap_sessions                 # one pass (SESSION_REAPER_MAX_BATCHES batches)
+    python manage.py reap_sessions --all           # keep going until nothing is left
+    python manage.py reap_sessions --dry-run       # count only
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and revoked user sessions in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Repeat passes until no dead session is left')
+        parser.add_argument('--dry-run', action='store_true', help='Count the rows that would be deleted')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SESSION_REAPER_BATCH_SIZE,
+            help='Rows deleted per transaction',
+        )
+        parser.add_argument(
+            '--pause-ms', type=int, default=settings.SESSION_REAPER_PAUSE_MS,
+            help='Pause between batches in milliseconds',
+        )
+
+    def handle(self, *args, **options):
+        from user_auth.session_reaper import reap
+
+        total = {}
+        while True:
+            close_old_connections()
+            deleted = reap(
+                batch_size=options['batch_size'], pause_ms=options['pause_ms'], dry_run=options['dry_run'],
+            )
+            for label, count in deleted.items():
+                total[label] = total.get(label, 0) + count
+            if options['dry_run'] or not options['all'] or not any(deleted.values()):
+                break
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        for label, count in total.items():
+            noun = label if label == 'token revocation' else f"{label} session"
+            self.stdout.write(f"{verb} {count} {noun} row(s)")
@@ -10,6 +10,7 @@ Usage:
 """
 from django.core.management.base import BaseCommand
 from user_auth.models import Operations, Roles, RoleOperations
+from user_auth import operation_catalog, role_sets
 
 
 # 56 operations across 4 scopes
@@ -155,6 +156,8 @@ class Command(BaseCommand):
                 created_ops += 1
 
         self.stdout.write(f'  ✓ {created_ops} new operations, {len(ALL_OPERATIONS) - created_ops} already existed')
+        if created_ops or options['reset']:
+            operation_catalog.invalidate()
 
         # 2. Seed roles + role-operation mappings
         self.stdout.write('Seeding roles...')
@@ -184,6 +187,8 @@ class Command(BaseCommand):
                 f'(level={role.level}, {len(role_data["operations"])} operations, {role_ops_created} new assignments)'
             )
 
+        role_sets.invalidate_all()
+
         self.stdout.write(self.style.SUCCESS('\n[DONE] RBAC seeding complete!'))
         self.stdout.write(f'   Total operations: {Operations.objects.count()}')
         self.stdout.write(f'   Total roles:      {Roles.objects.count()}')
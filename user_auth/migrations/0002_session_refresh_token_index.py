@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersessions',
+            index=models.Index(fields=['refresh_token'], name='user_sessio_refresh_006d95_idx'),
+        ),
+    ]
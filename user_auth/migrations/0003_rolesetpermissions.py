@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:26
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0002_session_refresh_token_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleSetPermissions',
+            fields=[
+                ('id', models.TextField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('operation_keys', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('roles', models.ManyToManyField(db_table='role_set_permission_roles', related_name='role_sets', to='user_auth.roles')),
+            ],
+            options={
+                'db_table': 'role_set_permissions',
+            },
+        ),
+    ]
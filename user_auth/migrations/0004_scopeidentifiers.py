@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0003_rolesetpermissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScopeIdentifiers',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.TextField(unique=True)),
+            ],
+            options={
+                'db_table': 'scope_identifiers',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0004_scopeidentifiers'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usersessions',
+            name='user_sessio_token_h_ff82fd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usersessions',
+            name='user_sessio_user_id_eb20aa_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usersessions',
+            name='user_sessio_refresh_006d95_idx',
+        ),
+        migrations.AlterField(
+            model_name='usersessions',
+            name='token_hint',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='usersessions',
+            index=models.Index(condition=models.Q(('revoked', False)), fields=['token_hint'], name='user_sessions_live_hint_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersessions',
+            index=models.Index(condition=models.Q(('refresh_token__isnull', False), ('revoked', False)), fields=['refresh_token'], name='user_sessions_live_refresh_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersessions',
+            index=models.Index(condition=models.Q(('revoked', False)), fields=['user', 'expires_at'], name='user_sessions_live_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersessions',
+            index=models.Index(fields=['expires_at'], name='user_sessions_expires_idx'),
+        ),
+    ]
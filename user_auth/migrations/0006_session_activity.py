@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0005_session_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersessions',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersessions',
+            name='last_seen_ip',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersessions',
+            name='request_count',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0006_session_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedAccessTokens',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.TextField()),
+                ('revoked_at', models.FloatField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'revoked_access_tokens',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin, Group, Permission
 from django.db import models
+from django.db.models import Q
 import uuid
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
@@ -87,15 +88,25 @@ def assign_default_role(sender, instance, created, **kwargs):
 
 class UserSessions(models.Model):
     """
-    Active sessions. token and refresh_token stored as hashed values.
-    token_hint = first 8 chars of RAW token — indexed for O(1) lookup.
-    permissions_cache = JSON list of operation keys e.g. ["account:threats:read", ...]
-    scope_cache = JSON dict with org_ids, tenant_ids, account_ids lists.
+    Active sessions. token and refresh_token are stored as keyed digests
+    ("hmac_sha256$<hex>", see utils.auth_utils.hash_token), so a token is
+    found by equality on the unique token column. Expired and revoked rows
+    are deleted in batches by session_reaper.
+    token_hint = first 8 chars of RAW token — only set on legacy PBKDF2 rows,
+    which are upgraded to digests on first use. Legacy refresh tokens have no
+    hint; see the backfill_session_tokens command.
+    permissions_cache = packed operation bitset {"v": catalog version, "bits": hex}
+                        (see operation_catalog); older rows hold a list of keys.
+    scope_cache = JSON dict with org_ids, tenant_ids, account_ids, each null
+                  (unrestricted) or an encoded bitmap of interned ids (see
+                  scopes); older rows hold lists of ids.
+    last_seen_at / last_seen_ip / request_count are written behind, in
+    batches (see session_activity), and lag by up to one flush interval.
     """
     id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey('Users', models.DO_NOTHING, related_name='sessions')
     token = models.TextField(unique=True)
-    token_hint = models.CharField(max_length=16, blank=True, null=True, db_index=True)
+    token_hint = models.CharField(max_length=16, blank=True, null=True)
     refresh_token = models.TextField(blank=True, null=True)
     ip_address = models.TextField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
@@ -106,6 +117,9 @@ class UserSessions(models.Model):
     location_city = models.TextField(blank=True, null=True)
     location_region = models.TextField(blank=True, null=True)
     session_index = models.TextField(blank=True, null=True)
+    last_seen_at = models.DateTimeField(blank=True, null=True)
+    last_seen_ip = models.TextField(blank=True, null=True)
+    request_count = models.BigIntegerField(default=0)
     permissions_cache = models.JSONField(default=list, blank=True, null=True)
     scope_cache = models.JSONField(default=dict, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -114,9 +128,16 @@ class UserSessions(models.Model):
     class Meta:
         managed = True
         db_table = 'user_sessions'
+        # Token lookups only ever match live rows, so their indexes leave out
+        # revoked ones; expired rows are deleted by session_reaper via expires_at
         indexes = [
-            models.Index(fields=['token_hint']),
-            models.Index(fields=['user']),
+            models.Index(fields=['token_hint'], condition=Q(revoked=False), name='user_sessions_live_hint_idx'),
+            models.Index(
+                fields=['refresh_token'], condition=Q(revoked=False, refresh_token__isnull=False),
+                name='user_sessions_live_refresh_idx',
+            ),
+            models.Index(fields=['user', 'expires_at'], condition=Q(revoked=False), name='user_sessions_live_user_idx'),
+            models.Index(fields=['expires_at'], name='user_sessions_expires_idx'),
         ]
 
 
@@ -312,6 +333,50 @@ class RoleOperations(models.Model):
         return f"{self.role.name} -> {self.operation.key}"
 
 
+class RoleSetPermissions(models.Model):
+    """
+    Materialized operation keys of a set of roles (see role_sets).
+    fingerprint = hash of the sorted role ids; operation_keys = sorted union of
+    their RoleOperations + legacy RolePermissions keys. Rows are deleted when a
+    member role's grants change and rebuilt on the next lookup.
+    """
+    id = models.TextField(primary_key=True, default=uuid.uuid4, editable=False)
+    fingerprint = models.CharField(max_length=64, unique=True)
+    roles = models.ManyToManyField(Roles, related_name='role_sets', db_table='role_set_permission_roles')
+    operation_keys = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'role_set_permissions'
+
+
+class ScopeIdentifiers(models.Model):
+    """
+    Interned org/tenant/account ids: each scope id string gets a small integer
+    (the auto id), so session scopes can be stored as compressed bitmaps (see
+    scopes). Rows are only ever added.
+    """
+    value = models.TextField(unique=True)
+
+    class Meta:
+        db_table = 'scope_identifiers'
+
+
+class RevokedAccessTokens(models.Model):
+    """
+    Revocation log for signed access tokens (AUTH_TOKEN_MODE = "jwt", see
+    access_tokens): a row rejects the session's tokens issued up to
+    revoked_at (epoch seconds, compared with the token's iat). Workers poll
+    it by id; session_reaper deletes rows once expires_at has passed.
+    """
+    session_id = models.TextField()
+    revoked_at = models.FloatField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'revoked_access_tokens'
+
+
 class UserAdminScope(models.Model):
     """
     For group_admin role: defines which specific resources the user can manage.
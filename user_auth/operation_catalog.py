@@ -0,0 +1,271 @@
+"""
+Operation catalog compiled to bit indexes.
+
+Every operation key (Operations + legacy Permissions) gets a bit: its position
+in the sorted key list. The catalog version is a hash of that list, so any
+process compiling the same keys agrees on the same bits. A user's operations
+are then one integer, stored in user_sessions.permissions_cache as
+
+    {"v": "<catalog version>", "bits": "<hex>"}
+
+and carried in auth_context['permissions'] as a PermissionSet, on which
+membership, any-of and prefix/suffix checks are single bit tests. Rows still
+holding the old list of keys are read as before.
+
+Adding or deleting operations changes the version. Sessions packed under an
+older version are translated through that version's key list (kept in the
+Django cache) on their next request; if it is gone, the session's permissions
+are resolved again. Processes pick up a new catalog within CHECK_SECONDS of
+invalidate().
+
+Permission checks go through has_operation / has_any_operation /
+missing_operations / is_platform_admin rather than touching the keys.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'auth:catalog:version'
+CHECK_SECONDS = 5
+MAX_KNOWN_CATALOGS = 8
+
+_lock = threading.Lock()
+_current = None
+_known = {}
+_next_check = 0.0
+
+
+def _keys_key(version):
+    return f"auth:catalog:{version}"
+
+
+class Catalog:
+    """Immutable key -> bit mapping for one catalog version."""
+
+    def __init__(self, keys):
+        self.keys = tuple(sorted(set(keys)))
+        self.index = {key: bit for bit, key in enumerate(self.keys)}
+        self.version = hashlib.sha256('\n'.join(self.keys).encode()).hexdigest()[:12]
+        self._masks = {}
+
+    def encode(self, keys):
+        bits = 0
+        for key in keys:
+            bit = self.index.get(key)
+            if bit is not None:
+                bits |= 1 << bit
+        return bits
+
+    def decode(self, bits):
+        keys = []
+        bit = 0
+        while bits:
+            if bits & 1:
+                keys.append(self.keys[bit])
+            bits >>= 1
+            bit += 1
+        return keys
+
+    def _mask(self, memo_key, build):
+        mask = self._masks.get(memo_key)
+        if mask is None:
+            mask = build()
+            self._masks[memo_key] = mask
+        return mask
+
+    def mask(self, keys):
+        keys = tuple(keys)
+        return self._mask(('keys', keys), lambda: self.encode(keys))
+
+    def prefix_mask(self, prefix):
+        return self._mask(('prefix', prefix), lambda: self.encode(k for k in self.keys if k.startswith(prefix)))
+
+    def suffix_mask(self, suffix):
+        return self._mask(('suffix', suffix), lambda: self.encode(k for k in self.keys if k.endswith(suffix)))
+
+
+class PermissionSet:
+    """A user's operations as a bitset over a catalog; iterates as keys."""
+    __slots__ = ('bits', 'catalog')
+
+    def __init__(self, bits, catalog):
+        self.bits = bits
+        self.catalog = catalog
+
+    @classmethod
+    def from_keys(cls, keys, catalog=None):
+        catalog = catalog or current()
+        return cls(catalog.encode(keys), catalog)
+
+    def __contains__(self, key):
+        bit = self.catalog.index.get(key)
+        return bit is not None and bool(self.bits >> bit & 1)
+
+    def has_any(self, keys):
+        return bool(self.bits & self.catalog.mask(keys))
+
+    def has_all(self, keys):
+        mask = self.catalog.mask(keys)
+        return self.bits & mask == mask and all(key in self.catalog.index for key in keys)
+
+    def has_prefix(self, prefix):
+        return bool(self.bits & self.catalog.prefix_mask(prefix))
+
+    def has_suffix(self, suffix):
+        return bool(self.bits & self.catalog.suffix_mask(suffix))
+
+    def __iter__(self):
+        return iter(self.catalog.decode(self.bits))
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return bool(self.bits)
+
+    def __eq__(self, other):
+        if isinstance(other, PermissionSet):
+            return self.bits == other.bits and self.catalog.version == other.catalog.version
+        return NotImplemented
+
+    # Catalogs are immutable and shared; copies (e.g. session_cache) keep the reference
+    def __copy__(self):
+        return PermissionSet(self.bits, self.catalog)
+
+    def __deepcopy__(self, memo):
+        return PermissionSet(self.bits, self.catalog)
+
+    def __repr__(self):
+        return f"PermissionSet({list(self)!r})"
+
+    def pack(self):
+        return {'v': self.catalog.version, 'bits': format(self.bits, 'x')}
+
+
+# ── Catalog versions ─────────────────────────────────────────────────────────
+
+def _remember(catalog):
+    with _lock:
+        _known[catalog.version] = catalog
+        while len(_known) > MAX_KNOWN_CATALOGS:
+            _known.pop(next(iter(_known)))
+
+
+def _compile():
+    from .models import Operations, Permissions
+
+    keys = set(Operations.objects.values_list('key', flat=True))
+    keys.update(Permissions.objects.values_list('key', flat=True))
+    catalog = Catalog(keys)
+    cache.set(_keys_key(catalog.version), list(catalog.keys), None)
+    cache.set(VERSION_KEY, catalog.version, None)
+    _remember(catalog)
+    logger.info("Compiled operation catalog %s (%d keys)", catalog.version, len(catalog.keys))
+    return catalog
+
+
+def current():
+    """The catalog to pack new permission sets with; recompiled after invalidate()."""
+    global _current, _next_check
+    now = time.monotonic()
+    if _current is not None and now < _next_check:
+        return _current
+
+    with _lock:
+        _next_check = now + CHECK_SECONDS
+    published = cache.get(VERSION_KEY)
+    if _current is None or published != _current.version:
+        known = by_version(published) if published else None
+        _current = known or _compile()
+    return _current
+
+
+def by_version(version):
+    """Catalog for a version this or another process compiled, or None."""
+    with _lock:
+        catalog = _known.get(version)
+    if catalog is not None:
+        return catalog
+    keys = cache.get(_keys_key(version))
+    if keys is None:
+        return None
+    catalog = Catalog(keys)
+    if catalog.version != version:
+        return None
+    _remember(catalog)
+    return catalog
+
+
+def invalidate():
+    """Call after operation or legacy permission keys were added or removed."""
+    global _current
+    cache.delete(VERSION_KEY)
+    _current = None
+
+
+# ── Session storage ──────────────────────────────────────────────────────────
+
+def pack(keys):
+    """permissions_cache value for a list of operation keys."""
+    return PermissionSet.from_keys(keys).pack()
+
+
+def unpack(stored):
+    """
+    PermissionSet on the current catalog for a permissions_cache value, or
+    None when it was packed under a catalog version that is no longer known.
+    """
+    catalog = current()
+    if not stored:
+        return PermissionSet(0, catalog)
+    if isinstance(stored, PermissionSet):
+        stored = stored.pack()
+    if isinstance(stored, (list, tuple)):
+        return PermissionSet.from_keys(stored, catalog)
+
+    bits = int(stored.get('bits') or '0', 16)
+    if stored.get('v') == catalog.version:
+        return PermissionSet(bits, catalog)
+    packed_with = by_version(stored.get('v'))
+    if packed_with is None:
+        return None
+    return PermissionSet.from_keys(packed_with.decode(bits), catalog)
+
+
+# ── Checks ───────────────────────────────────────────────────────────────────
+
+def permissions_of(auth_context):
+    permissions = (auth_context or {}).get('permissions')
+    if isinstance(permissions, PermissionSet):
+        return permissions
+    unpacked = unpack(permissions)
+    return unpacked if unpacked is not None else PermissionSet(0, current())
+
+
+def has_operation(auth_context, key):
+    return key in permissions_of(auth_context)
+
+
+def has_any_operation(auth_context, *keys):
+    return permissions_of(auth_context).has_any(keys)
+
+
+def missing_operations(auth_context, *keys):
+    permissions = permissions_of(auth_context)
+    if permissions.has_all(keys):
+        return []
+    return [key for key in keys if key not in permissions]
+
+
+def has_operation_suffix(auth_context, suffix):
+    """Any operation ending in suffix, e.g. ':users:write' at any scope."""
+    return permissions_of(auth_context).has_suffix(suffix)
+
+
+def is_platform_admin(auth_context):
+    return permissions_of(auth_context).has_prefix('platform:')
@@ -11,6 +11,9 @@ Usage in DRF views:
 """
 from rest_framework.permissions import BasePermission
 
+from .operation_catalog import has_any_operation, has_operation, is_platform_admin
+from .scopes import scope_allows
+
 
 class IsCSPMAuthenticated(BasePermission):
     """Checks that the request is authenticated (auth_context is set)."""
@@ -38,7 +41,7 @@ def require_operation(operation_key: str):
             auth_context = getattr(request, 'auth_context', None)
             if not auth_context:
                 return False
-            return operation_key in auth_context.get('permissions', [])
+            return has_operation(auth_context, operation_key)
 
     _HasOperation.__name__ = f'HasOperation[{operation_key}]'
     return _HasOperation
@@ -58,8 +61,7 @@ def require_any_operation(*operation_keys: str):
             auth_context = getattr(request, 'auth_context', None)
             if not auth_context:
                 return False
-            user_perms = set(auth_context.get('permissions', []))
-            return bool(user_perms.intersection(operation_keys))
+            return has_any_operation(auth_context, *operation_keys)
 
     _HasAnyOperation.__name__ = f'HasAnyOperation[{"|".join(operation_keys)}]'
     return _HasAnyOperation
@@ -73,8 +75,7 @@ class IsPlatformAdmin(BasePermission):
         auth_context = getattr(request, 'auth_context', None)
         if not auth_context:
             return False
-        perms = auth_context.get('permissions', [])
-        return any(p.startswith('platform:') for p in perms)
+        return is_platform_admin(auth_context)
 
 
 class TenantScopePermission(BasePermission):
@@ -104,8 +105,5 @@ class TenantScopePermission(BasePermission):
         if not tenant_id:
             return True  # No tenant specified — let endpoint validate
 
-        allowed_tenants = scope.get('tenant_ids')
-        if allowed_tenants is None:
-            return True  # All tenants allowed within org scope
-
-        return tenant_id in allowed_tenants
+        # All tenants allowed within org scope when tenant_ids is unrestricted
+        return scope_allows(auth_context, 'tenant_ids', tenant_id)
@@ -0,0 +1,113 @@
+"""
+Propagation of RBAC changes into live sessions.
+
+permissions_cache and scope_cache are computed at login/refresh. When roles
+or role assignments change, the RBAC views call roles_changed() or
+users_changed() so affected sessions see the change on their next request
+instead of at their next login:
+
+  1. live sessions of the affected users (role -> users -> sessions)
+  2. each user's role set; permissions are looked up once per distinct role
+     set (see role_sets; a role edit touching 10k users usually yields a
+     handful)
+  3. batched UPDATEs: one per distinct (role set, scope) and batch of session
+     ids, or a bulk_update when nearly every session gets its own value
+  4. session_cache epochs of the users are bumped; in jwt mode the sessions'
+     current access tokens are revoked so the next request refreshes
+"""
+import json
+import logging
+from collections import defaultdict
+
+from django.utils import timezone
+
+from . import access_tokens, operation_catalog, role_sets, session_cache
+from .authentication import resolve_role_rows, resolve_scopes
+from .models import UserRoles, UserSessions
+from .scopes import pack_scope
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# Per-value UPDATEs are used while each one covers this many sessions on average
+GROUPED_UPDATE_RATIO = 20
+
+
+def _live_sessions():
+    return UserSessions.objects.filter(revoked=False, expires_at__gt=timezone.now())
+
+
+def roles_changed(role_ids, grants=True, scope=False):
+    """
+    Operations of these roles changed (grants) and/or their level or
+    scope_level (scope). Returns the number of sessions updated.
+    """
+    if grants:
+        role_sets.roles_changed(role_ids)
+    user_ids = UserRoles.objects.filter(role_id__in=role_ids).values_list('user_id', flat=True)
+    return _refresh(_live_sessions().filter(user_id__in=user_ids), scope)
+
+
+def users_changed(user_ids):
+    """Role assignments or admin scopes of these users changed."""
+    return _refresh(_live_sessions().filter(user_id__in=list(user_ids)), scope=True)
+
+
+def _refresh(sessions, scope):
+    rows = list(sessions.values_list('id', 'user_id'))
+    if not rows:
+        return 0
+    user_ids = {user_id for _, user_id in rows}
+
+    role_rows = resolve_role_rows(user_ids)
+    role_set_of = {
+        user_id: frozenset(role_id for role_id, _, _, _ in role_rows.get(user_id, []))
+        for user_id in user_ids
+    }
+    packed = {
+        role_set: operation_catalog.pack(role_sets.permissions_for(role_set))
+        for role_set in set(role_set_of.values())
+    }
+
+    scopes = {}
+    if scope:
+        scopes = {
+            user_id: pack_scope(user_scope)
+            for user_id, user_scope in resolve_scopes(user_ids, role_rows=role_rows).items()
+        }
+    groups = defaultdict(list)
+    for session_id, user_id in rows:
+        groups[(role_set_of[user_id], json.dumps(scopes.get(user_id), sort_keys=True))].append(session_id)
+
+    if len(groups) * GROUPED_UPDATE_RATIO <= len(rows):
+        # Few distinct values: one UPDATE ... WHERE id IN (...) per value and batch
+        for (role_set, scope_json), session_ids in groups.items():
+            values = {'permissions_cache': packed[role_set]}
+            if scope:
+                values['scope_cache'] = json.loads(scope_json)
+            for start in range(0, len(session_ids), BATCH_SIZE):
+                UserSessions.objects.filter(id__in=session_ids[start:start + BATCH_SIZE]).update(**values)
+    else:
+        fields = ['permissions_cache', 'scope_cache'] if scope else ['permissions_cache']
+        UserSessions.objects.bulk_update(
+            [
+                UserSessions(
+                    id=session_id,
+                    permissions_cache=packed[role_set_of[user_id]],
+                    scope_cache=scopes.get(user_id),
+                )
+                for session_id, user_id in rows
+            ],
+            fields,
+            batch_size=BATCH_SIZE,
+        )
+
+    session_cache.bump_user_epochs(user_ids)
+    if access_tokens.enabled():
+        access_tokens.revoke([session_id for session_id, _ in rows])
+
+    logger.info(
+        "RBAC change propagated to %d session(s) of %d user(s), %d role set(s)",
+        len(rows), len(user_ids), len(packed),
+    )
+    return len(rows)
@@ -0,0 +1,126 @@
+"""
+Role-set permission lookup.
+
+Users with the same roles have the same operations, and a tenant's users
+share a handful of role combinations. permissions_for(role_ids) resolves a
+role set once, materializes it in role_set_permissions (keyed by a
+fingerprint of the sorted role ids), so login, refresh, SAML sign-in and
+invitation acceptance need one indexed query instead of the RoleOperations /
+RolePermissions joins for a role set seen before.
+
+RBAC writes call roles_changed() (or invalidate_all() for catalog-wide
+changes), which deletes the rows containing the roles. A row materialized
+while grants were changing is checked against a second resolve and dropped
+if they differ, so a stale row can't outlive the change.
+
+With a shared cache backend, rows are also kept in a per-process LRU that is
+invalidated through an epoch in the Django cache. With a per-process one
+(LocMemCache, the default) other workers and replicas would never see the
+epoch change, so the LRU is skipped and the table is read every time.
+"""
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .session_cache import PROCESS_LOCAL_BACKENDS
+
+EPOCH_KEY = 'auth:rolesets:epoch'
+MAX_ENTRIES = 4096
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+
+def fingerprint(role_ids):
+    return hashlib.sha256('\n'.join(sorted({str(r) for r in role_ids})).encode()).hexdigest()
+
+
+def _lru_enabled():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def _epoch():
+    return cache.get(EPOCH_KEY)
+
+
+def _bump():
+    cache.set(EPOCH_KEY, secrets.token_hex(8), None)
+
+
+def _remember(fp, epoch, keys):
+    with _lock:
+        _entries[fp] = (epoch, keys)
+        _entries.move_to_end(fp)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def permissions_for(role_ids):
+    """Sorted operation keys granted by a set of roles."""
+    from .models import RoleSetPermissions
+
+    role_ids = {str(r) for r in role_ids}
+    if not role_ids:
+        return []
+    fp = fingerprint(role_ids)
+    use_lru = _lru_enabled()
+    epoch = _epoch() if use_lru else None
+
+    if use_lru:
+        with _lock:
+            entry = _entries.get(fp)
+            if entry is not None and entry[0] == epoch:
+                _entries.move_to_end(fp)
+                return list(entry[1])
+
+    keys = RoleSetPermissions.objects.filter(fingerprint=fp).values_list('operation_keys', flat=True).first()
+    if keys is None:
+        keys = _resolve(role_ids)
+        try:
+            with transaction.atomic():
+                row = RoleSetPermissions.objects.create(fingerprint=fp, operation_keys=keys)
+                row.roles.set(role_ids)
+        except IntegrityError:
+            pass  # materialized concurrently
+        else:
+            current = _resolve(role_ids)
+            if current != keys:
+                # Grants changed while this set was being resolved, possibly
+                # before roles_changed() could see the row; don't keep it
+                RoleSetPermissions.objects.filter(pk=row.pk).delete()
+                return current
+
+    if use_lru:
+        _remember(fp, epoch, keys)
+    return list(keys)
+
+
+def _resolve(role_ids):
+    from .authentication import resolve_role_permissions
+
+    return sorted(set().union(*resolve_role_permissions(list(role_ids)).values()))
+
+
+def roles_changed(role_ids):
+    """Operations of these roles changed (or the roles are about to be deleted)."""
+    from .models import RoleSetPermissions
+
+    RoleSetPermissions.objects.filter(roles__in=list(role_ids)).delete()
+    _bump()
+
+
+def invalidate_all():
+    from .models import RoleSetPermissions
+
+    RoleSetPermissions.objects.all().delete()
+    _bump()
+
+
+def clear():
+    with _lock:
+        _entries.clear()
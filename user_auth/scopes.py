@@ -0,0 +1,277 @@
+"""
+Compact session scopes.
+
+A scope is {'org_ids', 'tenant_ids', 'account_ids'}, each None (unrestricted)
+or the ids the user may access. MSP admins can be scoped to thousands of
+accounts, so instead of JSON lists each id is interned to a small integer
+(scope_identifiers) and the set is kept as a roaring-style bitmap: ids are
+split by their high 16 bits into containers holding either a sorted array of
+the low 16 bits (up to 4096 entries) or a 65536-bit bitmap.
+
+In user_sessions.scope_cache each set is stored as a base64 string of its
+containers; older rows holding lists are read as before. In auth_context
+each set is a ScopeSet, and checks go through the membership API:
+
+    scope_allows(auth_context, 'tenant_ids', tenant_id)
+    scope_values(auth_context, 'tenant_ids')   # None, or ids for queryset filters
+    scope_as_lists(scope)                      # JSON-friendly copy
+    scope_digest(scope)                        # key for caches shared between users
+
+The id dictionary is cached in-process in both directions; only ids never
+seen by this process are looked up in the database.
+"""
+import base64
+import hashlib
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+
+SCOPE_KINDS = ('org_ids', 'tenant_ids', 'account_ids')
+UNRESTRICTED = {'org_ids': None, 'tenant_ids': None, 'account_ids': None}
+
+ARRAY_MAX = 4096
+BITMAP_BYTES = 65536 // 8
+LOOKUP_CHUNK = 1000
+_HEADER = struct.Struct('<HBH')  # high bits, container type, cardinality - 1
+_ARRAY, _BITMAP = 0, 1
+
+_lock = threading.Lock()
+_ids = {}
+_values = {}
+
+
+# ── Interning ────────────────────────────────────────────────────────────────
+
+def _remember(pairs):
+    with _lock:
+        for value, ident in pairs:
+            _ids[value] = ident
+            _values[ident] = value
+
+
+def _load(values):
+    from .models import ScopeIdentifiers
+
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        _remember(ScopeIdentifiers.objects.filter(
+            value__in=values[start:start + LOOKUP_CHUNK]
+        ).values_list('value', 'id'))
+
+
+def intern(values):
+    """Integer ids for scope id strings, creating them as needed."""
+    from .models import ScopeIdentifiers
+
+    values = [str(value) for value in values]
+    missing = {value for value in values if value not in _ids}
+    if missing:
+        _load(missing)
+        new = [value for value in missing if value not in _ids]
+        if new:
+            ScopeIdentifiers.objects.bulk_create(
+                [ScopeIdentifiers(value=value) for value in new],
+                ignore_conflicts=True, batch_size=LOOKUP_CHUNK,
+            )
+            _load(new)
+    return [_ids[value] for value in values]
+
+
+def lookup(value):
+    """Interned id of a scope id string, or None if it was never interned."""
+    value = str(value)
+    ident = _ids.get(value)
+    if ident is None:
+        _load([value])
+        ident = _ids.get(value)
+    return ident
+
+
+def resolve(idents):
+    """Scope id strings for interned ids."""
+    from .models import ScopeIdentifiers
+
+    idents = list(idents)
+    missing = [ident for ident in idents if ident not in _values]
+    for start in range(0, len(missing), LOOKUP_CHUNK):
+        _remember(ScopeIdentifiers.objects.filter(
+            id__in=missing[start:start + LOOKUP_CHUNK]
+        ).values_list('value', 'id'))
+    return [_values[ident] for ident in idents if ident in _values]
+
+
+# ── Bitmap ───────────────────────────────────────────────────────────────────
+
+class ScopeSet:
+    """Immutable roaring-style set of interned ids; membership by id string."""
+    __slots__ = ('_containers', '_len')
+
+    def __init__(self, containers):
+        # {high 16 bits: array('H') of sorted low bits | int bitmap}
+        self._containers = containers
+        self._len = sum(
+            len(c) if isinstance(c, array) else bin(c).count('1')
+            for c in containers.values()
+        )
+
+    @classmethod
+    def from_ids(cls, idents):
+        groups = {}
+        for ident in idents:
+            groups.setdefault(ident >> 16, set()).add(ident & 0xFFFF)
+        containers = {}
+        for high, lows in groups.items():
+            if len(lows) > ARRAY_MAX:
+                bitmap = 0
+                for low in lows:
+                    bitmap |= 1 << low
+                containers[high] = bitmap
+            else:
+                containers[high] = array('H', sorted(lows))
+        return cls(containers)
+
+    @classmethod
+    def from_values(cls, values):
+        return cls.from_ids(intern(values))
+
+    def contains_id(self, ident):
+        container = self._containers.get(ident >> 16)
+        if container is None:
+            return False
+        low = ident & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __contains__(self, value):
+        ident = lookup(value)
+        return ident is not None and self.contains_id(ident)
+
+    def ids(self):
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            if isinstance(container, int):
+                low = 0
+                while container:
+                    if container & 1:
+                        yield base | low
+                    container >>= 1
+                    low += 1
+            else:
+                for low in container:
+                    yield base | low
+
+    def __iter__(self):
+        return iter(resolve(self.ids()))
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"ScopeSet({len(self)} ids)"
+
+    def encode(self):
+        parts = []
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, int):
+                parts.append(_HEADER.pack(high, _BITMAP, bin(container).count('1') - 1))
+                parts.append(container.to_bytes(BITMAP_BYTES, 'little'))
+            else:
+                parts.append(_HEADER.pack(high, _ARRAY, len(container) - 1))
+                parts.append(container.tobytes())
+        return base64.b64encode(b''.join(parts)).decode()
+
+    @classmethod
+    def decode(cls, encoded):
+        data = base64.b64decode(encoded)
+        containers = {}
+        offset = 0
+        while offset < len(data):
+            high, kind, count = _HEADER.unpack_from(data, offset)
+            offset += _HEADER.size
+            if kind == _BITMAP:
+                containers[high] = int.from_bytes(data[offset:offset + BITMAP_BYTES], 'little')
+                offset += BITMAP_BYTES
+            else:
+                size = (count + 1) * 2
+                containers[high] = array('H', data[offset:offset + size])
+                offset += size
+        return cls(containers)
+
+
+# ── Session storage ──────────────────────────────────────────────────────────
+
+def _encode(value):
+    if value is None:
+        return None
+    if not isinstance(value, ScopeSet):
+        value = ScopeSet.from_values(value)
+    return value.encode()
+
+
+def pack_scope(scope):
+    """scope_cache value for a resolved scope (lists of ids) or an unpacked one."""
+    scope = scope or UNRESTRICTED
+    return {kind: _encode(scope.get(kind)) for kind in SCOPE_KINDS}
+
+
+def unpack_scope(stored):
+    """auth_context scope for a scope_cache value: kind -> None | ScopeSet."""
+    stored = stored or UNRESTRICTED
+    scope = {}
+    for kind in SCOPE_KINDS:
+        value = stored.get(kind)
+        if value is None or isinstance(value, ScopeSet):
+            scope[kind] = value
+        elif isinstance(value, str):
+            scope[kind] = ScopeSet.decode(value)
+        else:
+            scope[kind] = ScopeSet.from_values(value)
+    return scope
+
+
+def scope_as_lists(scope):
+    """JSON-friendly copy of an auth_context scope."""
+    return {
+        kind: None if (scope or {}).get(kind) is None else list(scope[kind])
+        for kind in SCOPE_KINDS
+    }
+
+
+# ── Checks ───────────────────────────────────────────────────────────────────
+
+def scope_allows(auth_context, kind, value):
+    """True if kind is unrestricted for the user or value is in it."""
+    allowed = ((auth_context or {}).get('scope') or {}).get(kind)
+    return allowed is None or str(value) in allowed
+
+
+def scope_values(auth_context, kind):
+    """None (unrestricted) or the ids of kind, e.g. for tenant_id__in filters."""
+    allowed = ((auth_context or {}).get('scope') or {}).get(kind)
+    return None if allowed is None else list(allowed)
+
+
+def scope_digest(scope):
+    """
+    Stable digest of an auth_context scope: equal for users who may see the
+    same org/tenant/account ids, so shared caches can key entries on it.
+    """
+    parts = []
+    for kind in SCOPE_KINDS:
+        value = (scope or {}).get(kind)
+        parts.append('*' if value is None else _encode(value))
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
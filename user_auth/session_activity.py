@@ -0,0 +1,190 @@
+"""
+Write-behind session activity.
+
+CookieTokenAuthentication calls record() for every authenticated request.
+Nothing is written then: each process accumulates, per session, the last
+time it was seen, the client IP and a request count, and a daemon thread
+flushes them every SESSION_ACTIVITY_FLUSH_SECONDS (or early, once
+SESSION_ACTIVITY_MAX_PENDING sessions are waiting) into
+user_sessions.last_seen_at / last_seen_ip / request_count. On PostgreSQL a
+flush is one UPDATE ... FROM (VALUES ...) per FLUSH_BATCH_SIZE sessions;
+counts are added to the stored value, so workers never overwrite each
+other.
+
+The stored values lag by up to one flush interval. is_idle() and
+with_pending() combine them with this process's own recent activity, for
+the idle timeout (SESSION_IDLE_TIMEOUT_MINUTES, 0 disables it) and for
+SessionListView. is_idle() only reads the row when this process hasn't seen
+the session within the timeout, so JWT requests stay free of queries. Rows
+whose flush fails are put back and retried with the next one.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from .models import UserSessions
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+_pending = {}    # session id -> [last seen (epoch seconds), ip, requests]
+_last_seen = {}  # session id -> last seen here, kept across flushes for is_idle()
+_wake = threading.Event()
+_thread = None
+
+
+def record(session_id, ip):
+    """Note one request of a session (no database access)."""
+    now = time.time()
+    session_id = str(session_id)
+    with _lock:
+        entry = _pending.get(session_id)
+        if entry is None:
+            _pending[session_id] = [now, ip, 1]
+            if len(_pending) >= settings.SESSION_ACTIVITY_MAX_PENDING:
+                _wake.set()
+        else:
+            entry[0] = now
+            entry[1] = ip or entry[1]
+            entry[2] += 1
+        _last_seen[session_id] = now
+    if _thread is None:
+        _start()
+
+
+def _to_datetime(ts):
+    return datetime.fromtimestamp(ts, dt_timezone.utc)
+
+
+def last_seen(session):
+    """Most recent activity of a session known to this process, as epoch seconds."""
+    with _lock:
+        seen = _last_seen.get(str(session.pk), 0)
+    stored = session.last_seen_at or session.created_at
+    return max(seen, stored.timestamp() if stored else 0)
+
+
+def is_idle(session):
+    timeout = settings.SESSION_IDLE_TIMEOUT_MINUTES
+    if timeout <= 0:
+        return False
+    cutoff = time.time() - timeout * 60
+    with _lock:
+        if _last_seen.get(str(session.pk), 0) > cutoff:
+            return False
+    deferred = {'last_seen_at', 'created_at'} & session.get_deferred_fields()
+    if deferred:
+        # Built from token claims (access_tokens): load both in one query
+        try:
+            session.refresh_from_db(fields=list(deferred))
+        except UserSessions.DoesNotExist:
+            return True
+    return last_seen(session) < cutoff
+
+
+def with_pending(session):
+    """(last_seen_at, last_seen_ip, request_count) including unflushed activity."""
+    with _lock:
+        entry = _pending.get(str(session.pk))
+    if entry is None:
+        return session.last_seen_at, session.last_seen_ip, session.request_count
+    seen = _to_datetime(entry[0])
+    if session.last_seen_at and session.last_seen_at > seen:
+        seen = session.last_seen_at
+    return seen, entry[1] or session.last_seen_ip, session.request_count + entry[2]
+
+
+# ── Flushing ─────────────────────────────────────────────────────────────────
+
+def _write_values(rows):
+    placeholders = ', '.join(['(%s, %s::timestamptz, %s, %s::bigint)'] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {UserSessions._meta.db_table} AS s
+            SET last_seen_at = GREATEST(s.last_seen_at, v.seen),
+                last_seen_ip = COALESCE(v.ip, s.last_seen_ip),
+                request_count = s.request_count + v.requests
+            FROM (VALUES {placeholders}) AS v(id, seen, ip, requests)
+            WHERE s.id = v.id
+            """,
+            params,
+        )
+
+
+def _write_rows(rows):
+    with transaction.atomic():
+        for session_id, seen, ip, requests in rows:
+            values = {'last_seen_at': seen, 'request_count': F('request_count') + requests}
+            if ip:
+                values['last_seen_ip'] = ip
+            UserSessions.objects.filter(pk=session_id).update(**values)
+
+
+def flush():
+    """Write accumulated activity; returns the number of sessions written."""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+        horizon = time.time() - max(settings.SESSION_IDLE_TIMEOUT_MINUTES * 60, 2 * settings.SESSION_ACTIVITY_FLUSH_SECONDS)
+        for session_id in [sid for sid, seen in _last_seen.items() if seen < horizon]:
+            del _last_seen[session_id]
+    if not pending:
+        return 0
+
+    rows = [
+        (session_id, _to_datetime(seen), ip, requests)
+        for session_id, (seen, ip, requests) in pending.items()
+    ]
+    write = _write_values if connection.vendor == 'postgresql' else _write_rows
+    for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+        try:
+            write(rows[start:start + FLUSH_BATCH_SIZE])
+        except Exception:
+            _restore(rows[start:])
+            raise
+    return len(rows)
+
+
+def _restore(rows):
+    """Put unwritten rows back into _pending, merged with activity recorded since."""
+    with _lock:
+        for session_id, seen, ip, requests in rows:
+            entry = _pending.get(session_id)
+            if entry is None:
+                _pending[session_id] = [seen.timestamp(), ip, requests]
+            else:
+                entry[0] = max(entry[0], seen.timestamp())
+                entry[1] = entry[1] or ip
+                entry[2] += requests
+
+
+def _run():
+    while True:
+        _wake.wait(settings.SESSION_ACTIVITY_FLUSH_SECONDS)
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Session activity flush failed")
+        finally:
+            close_old_connections()
+
+
+def _start():
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run, name="session-activity", daemon=True)
+        _thread.start()
+    atexit.register(flush)
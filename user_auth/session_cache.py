@@ -0,0 +1,132 @@
+"""
+In-process cache of verified sessions.
+
+CookieTokenAuthentication keeps the (user, session, auth_context) of recently
+verified tokens in a bounded LRU keyed by token digest, so the calls behind a
+single page load don't each repeat the user_sessions query. Entries live for
+SESSION_CACHE_TTL_SECONDS at most (never past the session's own expiry).
+
+Revocation is exact through epochs kept in the Django cache: each entry
+remembers the user's epoch and the global epoch it was verified under, and is
+dropped as soon as either changes. Anything that deletes or revokes sessions
+calls bump_user_epoch() / bump_global_epoch() after the database write.
+
+Epochs only reach other workers and replicas through a shared cache backend.
+With a per-process one (LocMemCache, the default) a revocation would go
+unnoticed elsewhere for up to the TTL, so the LRU is switched off and every
+request is verified against user_sessions.
+"""
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+GLOBAL_EPOCH_KEY = 'auth:epoch:global'
+# Backends whose entries are visible to the current process only
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+
+def enabled():
+    """Whether verified sessions are cached: needs a TTL and a shared cache for the epochs."""
+    return (
+        settings.SESSION_CACHE_TTL_SECONDS > 0
+        and settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+    )
+
+
+def _user_epoch_key(user_id):
+    return f"auth:epoch:user:{user_id}"
+
+
+def current_epochs(user_id):
+    """(user epoch, global epoch); None for an epoch that was never bumped."""
+    if not enabled():
+        return None, None
+    user_key = _user_epoch_key(user_id)
+    values = cache.get_many([user_key, GLOBAL_EPOCH_KEY])
+    return values.get(user_key), values.get(GLOBAL_EPOCH_KEY)
+
+
+def bump_user_epoch(user_id):
+    """Invalidate every cached session of a user, in all processes sharing the cache."""
+    # Random rather than counted, so an evicted epoch can't come back with an old value
+    cache.set(_user_epoch_key(user_id), secrets.token_hex(8), None)
+
+
+def bump_user_epochs(user_ids):
+    """bump_user_epoch for many users in one cache round trip."""
+    cache.set_many({_user_epoch_key(user_id): secrets.token_hex(8) for user_id in user_ids}, None)
+
+
+def bump_global_epoch():
+    """Invalidate every cached session."""
+    cache.set(GLOBAL_EPOCH_KEY, secrets.token_hex(8), None)
+
+
+def get(digest):
+    """Cached (user, session, auth_context) for a token digest, or None."""
+    if not enabled():
+        return None
+    with _lock:
+        entry = _entries.get(digest)
+        if entry is None:
+            return None
+        if entry['expires'] <= time.monotonic():
+            del _entries[digest]
+            return None
+        _entries.move_to_end(digest)
+
+    if current_epochs(entry['user_id']) != entry['epochs']:
+        discard(digest)
+        return None
+    # Callers may modify what they get back (e.g. user.save() in MeView)
+    return copy.copy(entry['user']), copy.copy(entry['session']), copy.deepcopy(entry['auth_context'])
+
+
+def put(digest, user, session, auth_context, epochs):
+    """
+    Cache a verified session. epochs must be read (current_epochs) after the
+    session was found in the database and before it was re-checked, so a
+    revocation racing with verification is never cached as valid.
+    """
+    if not enabled():
+        return
+    ttl = min(
+        settings.SESSION_CACHE_TTL_SECONDS,
+        (session.expires_at - timezone.now()).total_seconds(),
+    )
+    if ttl <= 0:
+        return
+    with _lock:
+        _entries[digest] = {
+            'expires': time.monotonic() + ttl,
+            'user_id': str(user.id),
+            'epochs': epochs,
+            'user': copy.copy(user),
+            'session': copy.copy(session),
+            'auth_context': copy.deepcopy(auth_context),
+        }
+        _entries.move_to_end(digest)
+        while len(_entries) > settings.SESSION_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def discard(digest):
+    with _lock:
+        _entries.pop(digest, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,123 @@
+"""
+Expired session reaper.
+
+Sessions are deleted on logout, but rows whose access/refresh lifetime ran
+out (and legacy revoked rows) were never removed. reap() deletes them in
+batches of SESSION_REAPER_BATCH_SIZE: each batch selects primary keys through
+the expires_at index and deletes exactly those rows in its own short
+transaction, pausing SESSION_REAPER_PAUSE_MS between batches, so locks are
+held for one small DELETE at a time and concurrent logins are never blocked
+behind a table-wide delete. A pass stops after SESSION_REAPER_MAX_BATCHES;
+whatever is left is picked up by the next one.
+
+Rows are kept for SESSION_REAPER_GRACE_MINUTES after they expire, so a
+client refreshing right at expiry still gets "expired" instead of "unknown".
+Expired revoked_access_tokens rows (see access_tokens) go the same way.
+
+Each worker runs a daemon thread (started on first login/refresh) that
+wakes every SESSION_REAPER_INTERVAL_SECONDS; a lock in the Django cache lets
+only one worker reap per interval. `manage.py reap_sessions` runs the same
+pass, e.g. from cron with the thread disabled (interval 0).
+"""
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RevokedAccessTokens, UserSessions
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'auth:session-reaper:lock'
+
+
+def dead_sessions(now=None):
+    """(label, filter) pairs for rows the reaper deletes, in the order it deletes them."""
+    cutoff = (now or timezone.now()) - timedelta(minutes=settings.SESSION_REAPER_GRACE_MINUTES)
+    return [
+        ('expired', Q(expires_at__lte=cutoff)),
+        ('revoked', Q(revoked=True)),
+    ]
+
+
+def _targets():
+    """(label, model, filter) for everything reap() deletes."""
+    targets = [(label, UserSessions, condition) for label, condition in dead_sessions()]
+    targets.append(('token revocation', RevokedAccessTokens, Q(expires_at__lte=timezone.now())))
+    return targets
+
+
+def reap(batch_size=None, max_batches=None, pause_ms=None, dry_run=False):
+    """Delete expired/revoked sessions (and expired token revocations) in bounded batches; returns {label: rows}."""
+    batch_size = batch_size or settings.SESSION_REAPER_BATCH_SIZE
+    max_batches = max_batches or settings.SESSION_REAPER_MAX_BATCHES
+    pause = (settings.SESSION_REAPER_PAUSE_MS if pause_ms is None else pause_ms) / 1000
+
+    deleted = {}
+    batches = 0
+    for label, model, condition in _targets():
+        deleted[label] = 0
+        if dry_run:
+            deleted[label] = model.objects.filter(condition).count()
+            continue
+        while batches < max_batches:
+            ids = list(
+                model.objects.filter(condition).order_by().values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                # Re-check the condition: a row may have been refreshed since it was selected
+                count, _ = model.objects.filter(condition, pk__in=ids).delete()
+            deleted[label] += count
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+    return deleted
+
+
+class SessionReaper:
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the reaper thread for this worker (idempotent, no-op when disabled)."""
+        if settings.SESSION_REAPER_INTERVAL_SECONDS <= 0 or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = settings.SESSION_REAPER_INTERVAL_SECONDS
+        # Workers started together shouldn't all try the lock at once
+        time.sleep(random.uniform(0, min(interval, 30)))
+        while True:
+            try:
+                if cache.add(LOCK_KEY, self.worker_id, interval):
+                    deleted = reap()
+                    if any(deleted.values()):
+                        logger.info("Session reaper deleted %s", deleted)
+            except Exception:
+                logger.exception("Session reaper pass failed")
+            finally:
+                close_old_connections()
+            time.sleep(interval)
+
+
+session_reaper = SessionReaper()
@@ -0,0 +1,543 @@
+import io
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import access_tokens, operation_catalog, rbac_propagation, role_sets, scopes, session_activity, session_cache
+from .models import (
+    Operations, RevokedAccessTokens, RoleOperations, Roles, RoleSetPermissions, UserRoles, Users, UserSessions,
+)
+from .scopes import ScopeSet, pack_scope, scope_allows, scope_digest, unpack_scope
+from .session_reaper import reap
+from .utils.auth_utils import DIGEST_PREFIX, find_by_token, generate_token, hash_token, verify_token
+
+
+def _session(user, token=None, **fields):
+    return UserSessions.objects.create(
+        user=user,
+        token=hash_token(token or generate_token()),
+        expires_at=timezone.now() + timedelta(hours=1),
+        **fields,
+    )
+
+
+class TokenHashingTests(TestCase):
+
+    def setUp(self):
+        self.user = Users.objects.create_user('a@example.com', 'password123')
+
+    def test_digest_is_keyed_and_stable(self):
+        token = generate_token()
+        self.assertTrue(hash_token(token).startswith(DIGEST_PREFIX))
+        self.assertEqual(hash_token(token), hash_token(token))
+        self.assertNotEqual(hash_token(token), hash_token(generate_token()))
+        digest = hash_token(token)
+        with override_settings(TOKEN_DIGEST_KEY='another-key'):
+            self.assertNotEqual(hash_token(token), digest)
+
+    def test_verify_token(self):
+        token = generate_token()
+        self.assertTrue(verify_token(token, hash_token(token)))
+        self.assertFalse(verify_token(generate_token(), hash_token(token)))
+        self.assertFalse(verify_token(token, None))
+
+    def test_find_by_digest(self):
+        token = generate_token()
+        session = _session(self.user, token)
+        self.assertEqual(find_by_token(UserSessions.objects.all(), token).pk, str(session.pk))
+        self.assertIsNone(find_by_token(UserSessions.objects.all(), generate_token()))
+
+    def test_legacy_hash_is_found_by_hint_and_upgraded(self):
+        token = generate_token()
+        session = UserSessions.objects.create(
+            user=self.user, token=make_password(token), token_hint=token[:8],
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        found = find_by_token(UserSessions.objects.all(), token)
+        self.assertEqual(found.pk, str(session.pk))
+        session.refresh_from_db()
+        self.assertEqual(session.token, hash_token(token))
+
+    def test_legacy_hash_needs_the_right_token(self):
+        token = generate_token()
+        stored = make_password(token)
+        UserSessions.objects.create(
+            user=self.user, token=stored, token_hint=token[:8],
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        wrong = token[:8] + generate_token()
+        self.assertIsNone(find_by_token(UserSessions.objects.all(), wrong))
+        self.assertTrue(UserSessions.objects.filter(token=stored).exists())
+
+    def test_legacy_lookup_can_be_disabled(self):
+        token = generate_token()
+        UserSessions.objects.create(
+            user=self.user, token=make_password(token), token_hint=token[:8],
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertIsNone(find_by_token(UserSessions.objects.all(), token, legacy_limit=0))
+
+
+class SessionCacheTests(TestCase):
+
+    def setUp(self):
+        session_cache.clear()
+        self.addCleanup(session_cache.clear)
+        # Epochs have to be visible to every process for the cache to be used
+        location = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(SESSION_CACHE_TTL_SECONDS=60, CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}))
+        self.user = Users.objects.create_user('cache@example.com', 'password123')
+        self.session = _session(self.user)
+
+    def _put(self, digest='digest-1', session=None):
+        session_cache.put(
+            digest, self.user, session or self.session, {'user_id': str(self.user.id)},
+            session_cache.current_epochs(self.user.id),
+        )
+
+    def test_hit_until_user_epoch_changes(self):
+        self._put()
+        user, session, context = session_cache.get('digest-1')
+        self.assertEqual(str(session.pk), str(self.session.pk))
+        self.assertEqual(context, {'user_id': str(self.user.id)})
+        session_cache.bump_user_epoch(self.user.id)
+        self.assertIsNone(session_cache.get('digest-1'))
+
+    def test_global_epoch_drops_everything(self):
+        self._put()
+        session_cache.bump_global_epoch()
+        self.assertIsNone(session_cache.get('digest-1'))
+
+    def test_callers_get_copies(self):
+        self._put()
+        session_cache.get('digest-1')[2]['user_id'] = 'someone-else'
+        self.assertEqual(session_cache.get('digest-1')[2]['user_id'], str(self.user.id))
+
+    def test_expired_session_is_not_cached(self):
+        self.session.expires_at = timezone.now() - timedelta(seconds=1)
+        self._put()
+        self.assertIsNone(session_cache.get('digest-1'))
+
+    def test_disabled_with_a_process_local_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(session_cache.enabled())
+            self._put()
+            self.assertIsNone(session_cache.get('digest-1'))
+
+
+class RefreshTokenLookupTests(TestCase):
+
+    def setUp(self):
+        self.user = Users.objects.create_user('refresh@example.com', 'password123')
+
+    def _find(self, token, legacy_limit):
+        return find_by_token(
+            UserSessions.objects.all(), token, field='refresh_token', hint_field=None, legacy_limit=legacy_limit,
+        )
+
+    def test_digest_lookup(self):
+        token = generate_token()
+        session = _session(self.user, refresh_token=hash_token(token))
+        self.assertEqual(self._find(token, 0).pk, str(session.pk))
+
+    def test_legacy_fallback_only_tries_the_newest_rows(self):
+        old, new = generate_token(), generate_token()
+        older = _session(self.user, refresh_token=make_password(old))
+        UserSessions.objects.filter(pk=older.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        newer = _session(self.user, refresh_token=make_password(new))
+
+        self.assertIsNone(self._find(old, 1))
+        self.assertIsNone(self._find(new, 0))
+        self.assertEqual(self._find(new, 1).pk, str(newer.pk))
+        newer.refresh_from_db()
+        self.assertEqual(newer.refresh_token, hash_token(new))
+
+    def test_backfill_clears_live_legacy_refresh_tokens(self):
+        legacy = _session(self.user, refresh_token=make_password(generate_token()))
+        digest = _session(self.user, refresh_token=hash_token(generate_token()))
+        out = io.StringIO()
+        call_command('backfill_session_tokens', '--revoke-legacy-refresh', stdout=out)
+        self.assertIn("Cleared 1 legacy refresh token(s)", out.getvalue())
+        legacy.refresh_from_db()
+        digest.refresh_from_db()
+        self.assertIsNone(legacy.refresh_token)
+        self.assertTrue(digest.refresh_token.startswith(DIGEST_PREFIX))
+
+
+@override_settings(AUTH_TOKEN_MODE='jwt')
+class AccessTokenRevocationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        operation_catalog.invalidate()
+        self._forget_revocations()
+        self.user = Users.objects.create_user('jwt@example.com', 'password123')
+        self.session = _session(self.user, login_method='local')
+
+    def _forget_revocations(self):
+        # What another worker or replica starts from
+        access_tokens._revoked.clear()
+        access_tokens._gaps.clear()
+        access_tokens._synced_seq = 0
+        access_tokens._next_sync = 0.0
+
+    def test_valid_token_authenticates(self):
+        user, session, context = access_tokens.authenticate(access_tokens.issue(self.session))
+        self.assertEqual(str(user.id), str(self.user.id))
+        self.assertEqual(str(session.pk), str(self.session.pk))
+        self.assertEqual(context['session_id'], str(self.session.pk))
+
+    def test_tampered_token_is_rejected(self):
+        token = access_tokens.issue(self.session)
+        self.assertIsNone(access_tokens.authenticate(token[:-2] + ('aa' if token[-2:] != 'aa' else 'bb')))
+
+    def test_revoked_token_is_rejected_by_every_process(self):
+        token = access_tokens.issue(self.session)
+        access_tokens.revoke([self.session.pk])
+        self.assertIsNone(access_tokens.authenticate(token))
+
+        self._forget_revocations()
+        cache.clear()
+        self.assertIsNone(access_tokens.authenticate(token))
+        self.assertEqual(RevokedAccessTokens.objects.filter(session_id=str(self.session.pk)).count(), 1)
+
+    def test_token_issued_after_revocation_is_valid(self):
+        access_tokens.revoke([self.session.pk])
+        time.sleep(0.01)  # iat has millisecond precision
+        self.assertIsNotNone(access_tokens.authenticate(access_tokens.issue(self.session)))
+
+    def test_expired_revocations_are_ignored(self):
+        token = access_tokens.issue(self.session)
+        RevokedAccessTokens.objects.create(
+            session_id=str(self.session.pk), revoked_at=timezone.now().timestamp(),
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertIsNotNone(access_tokens.authenticate(token))
+
+
+class OperationCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        operation_catalog.invalidate()
+        for key in ('account:threats:read', 'account:threats:write', 'platform:admin:manage'):
+            Operations.objects.create(key=key, name=key)
+
+    def tearDown(self):
+        operation_catalog.invalidate()
+
+    def test_pack_unpack_round_trip(self):
+        packed = operation_catalog.pack(['account:threats:read', 'unknown:key'])
+        self.assertEqual(set(packed), {'v', 'bits'})
+        permissions = operation_catalog.unpack(packed)
+        self.assertIn('account:threats:read', permissions)
+        self.assertNotIn('account:threats:write', permissions)
+        self.assertNotIn('unknown:key', permissions)
+        self.assertEqual(list(permissions), ['account:threats:read'])
+
+    def test_legacy_list_and_empty_values(self):
+        self.assertEqual(list(operation_catalog.unpack(['account:threats:write'])), ['account:threats:write'])
+        self.assertFalse(operation_catalog.unpack(None))
+        self.assertFalse(operation_catalog.unpack([]))
+
+    def test_older_version_is_translated_to_new_bits(self):
+        packed = operation_catalog.pack(['account:threats:write'])
+        Operations.objects.create(key='account:assets:read', name='assets')
+        operation_catalog.invalidate()
+        permissions = operation_catalog.unpack(packed)
+        self.assertNotEqual(permissions.catalog.version, packed['v'])
+        self.assertEqual(list(permissions), ['account:threats:write'])
+
+    def test_unknown_version_is_rejected(self):
+        self.assertIsNone(operation_catalog.unpack({'v': 'feedfacecafe', 'bits': 'ff'}))
+
+    def test_checks(self):
+        context = {'permissions': operation_catalog.unpack(operation_catalog.pack(['platform:admin:manage']))}
+        self.assertTrue(operation_catalog.has_operation(context, 'platform:admin:manage'))
+        self.assertFalse(operation_catalog.has_operation(context, 'account:threats:read'))
+        self.assertTrue(operation_catalog.has_any_operation(context, 'account:threats:read', 'platform:admin:manage'))
+        self.assertEqual(
+            operation_catalog.missing_operations(context, 'account:threats:read', 'platform:admin:manage'),
+            ['account:threats:read'],
+        )
+
+    @override_settings(ENGINE_WEBHOOK_SECRET=None)
+    def test_catalog_endpoint_without_webhook_secret(self):
+        response = self.client.get('/api/internal/operation-catalog/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['keys'], [
+            'account:threats:read', 'account:threats:write', 'platform:admin:manage',
+        ])
+
+    @override_settings(ENGINE_WEBHOOK_SECRET='s3cret')
+    def test_catalog_endpoint_checks_signature_when_configured(self):
+        self.assertEqual(self.client.get('/api/internal/operation-catalog/').status_code, 401)
+
+
+class RbacPropagationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        operation_catalog.invalidate()
+        role_sets.clear()
+        self.addCleanup(operation_catalog.invalidate)
+        self.addCleanup(role_sets.clear)
+        self.read = Operations.objects.create(key='account:threats:read', name='read')
+        self.write = Operations.objects.create(key='account:threats:write', name='write')
+        self.role = Roles.objects.create(name='analyst', level=4, scope_level='tenant')
+        RoleOperations.objects.create(role=self.role, operation=self.read)
+        self.user = Users.objects.create_user('rbac@example.com', 'password123')
+        UserRoles.objects.create(user=self.user, role=self.role, tenant_id='t1')
+        initial = {
+            'permissions_cache': operation_catalog.pack(['account:threats:read']),
+            'scope_cache': pack_scope({'org_ids': None, 'tenant_ids': ['t1'], 'account_ids': None}),
+        }
+        self.session = _session(self.user, **initial)
+        self.revoked = _session(self.user, revoked=True, **initial)
+
+    def _permissions(self, session):
+        session.refresh_from_db()
+        return list(operation_catalog.unpack(session.permissions_cache))
+
+    def test_new_grant_reaches_live_sessions(self):
+        RoleOperations.objects.create(role=self.role, operation=self.write)
+        with mock.patch.object(session_cache, 'bump_user_epochs') as bump:
+            self.assertEqual(rbac_propagation.roles_changed([self.role.id]), 1)
+        self.assertEqual(self._permissions(self.session), ['account:threats:read', 'account:threats:write'])
+        self.assertEqual(self._permissions(self.revoked), ['account:threats:read'])
+        self.assertEqual([str(user_id) for user_id in bump.call_args.args[0]], [str(self.user.id)])
+
+    def test_removed_grant_is_dropped(self):
+        RoleOperations.objects.filter(role=self.role).delete()
+        rbac_propagation.roles_changed([self.role.id])
+        self.assertEqual(self._permissions(self.session), [])
+
+    def test_new_assignment_updates_scope(self):
+        other = Roles.objects.create(name='responder', level=4, scope_level='tenant')
+        RoleOperations.objects.create(role=other, operation=self.write)
+        UserRoles.objects.create(user=self.user, role=other, tenant_id='t2')
+        rbac_propagation.users_changed([self.user.id])
+        self.assertIn('account:threats:write', self._permissions(self.session))
+        context = {'scope': unpack_scope(self.session.scope_cache)}
+        self.assertTrue(scope_allows(context, 'tenant_ids', 't2'))
+        self.assertFalse(scope_allows(context, 'tenant_ids', 't3'))
+
+
+class RoleSetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        role_sets.clear()
+        self.addCleanup(role_sets.clear)
+        self.read = Operations.objects.create(key='account:threats:read', name='read')
+        self.write = Operations.objects.create(key='account:threats:write', name='write')
+        self.role = Roles.objects.create(name='analyst')
+        RoleOperations.objects.create(role=self.role, operation=self.read)
+
+    def test_role_set_is_materialized(self):
+        self.assertEqual(role_sets.permissions_for([self.role.id]), ['account:threats:read'])
+        self.assertEqual(
+            RoleSetPermissions.objects.get(fingerprint=role_sets.fingerprint([self.role.id])).operation_keys,
+            ['account:threats:read'],
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(role_sets.permissions_for([str(self.role.id)]), ['account:threats:read'])
+
+    def test_roles_changed_rebuilds_the_set(self):
+        role_sets.permissions_for([self.role.id])
+        RoleOperations.objects.create(role=self.role, operation=self.write)
+        role_sets.roles_changed([self.role.id])
+        self.assertEqual(role_sets.permissions_for([self.role.id]), ['account:threats:read', 'account:threats:write'])
+
+    def test_change_made_by_another_process_is_seen(self):
+        # Without a shared cache this process never sees the other one's epoch
+        role_sets.permissions_for([self.role.id])
+        RoleOperations.objects.filter(role=self.role).delete()
+        RoleSetPermissions.objects.all().delete()
+        self.assertEqual(role_sets.permissions_for([self.role.id]), [])
+
+    def test_set_resolved_during_a_change_is_not_kept(self):
+        with mock.patch.object(role_sets, '_resolve', side_effect=[['account:threats:read'], []]):
+            self.assertEqual(role_sets.permissions_for([self.role.id]), [])
+        self.assertFalse(RoleSetPermissions.objects.exists())
+
+    def test_in_process_copy_with_a_shared_cache(self):
+        location = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}))
+        role_sets.permissions_for([self.role.id])
+        with self.assertNumQueries(0):
+            role_sets.permissions_for([self.role.id])
+        RoleOperations.objects.create(role=self.role, operation=self.write)
+        role_sets.roles_changed([self.role.id])
+        self.assertEqual(role_sets.permissions_for([self.role.id]), ['account:threats:read', 'account:threats:write'])
+
+class ScopeBitmapTests(TestCase):
+
+    def setUp(self):
+        # Interned ids are memoised per process; rows are rolled back per test
+        scopes._ids.clear()
+        scopes._values.clear()
+
+    def test_array_container_round_trip(self):
+        values = [f"tenant-{i}" for i in range(50)]
+        decoded = ScopeSet.decode(ScopeSet.from_values(values).encode())
+        self.assertEqual(len(decoded), 50)
+        self.assertEqual(sorted(decoded), sorted(values))
+        self.assertIn('tenant-7', decoded)
+        self.assertNotIn('tenant-99', decoded)
+
+    def test_bitmap_container_round_trip(self):
+        idents = list(range(1, scopes.ARRAY_MAX + 100))
+        scope_set = ScopeSet.from_ids(idents)
+        self.assertIsInstance(scope_set._containers[0], int)
+        decoded = ScopeSet.decode(scope_set.encode())
+        self.assertEqual(list(decoded.ids()), idents)
+        self.assertTrue(decoded.contains_id(scopes.ARRAY_MAX))
+        self.assertFalse(decoded.contains_id(0))
+
+    def test_ids_across_containers(self):
+        idents = [5, 70000, 70001, 200000]
+        decoded = ScopeSet.decode(ScopeSet.from_ids(idents).encode())
+        self.assertEqual(list(decoded.ids()), idents)
+        self.assertFalse(decoded.contains_id(70002))
+
+    def test_pack_and_unpack_scope(self):
+        stored = pack_scope({'org_ids': None, 'tenant_ids': ['t1', 't2'], 'account_ids': []})
+        self.assertIsNone(stored['org_ids'])
+        self.assertIsInstance(stored['tenant_ids'], str)
+        context = {'scope': unpack_scope(stored)}
+        self.assertTrue(scope_allows(context, 'org_ids', 'any-org'))
+        self.assertTrue(scope_allows(context, 'tenant_ids', 't2'))
+        self.assertFalse(scope_allows(context, 'tenant_ids', 't3'))
+        self.assertFalse(scope_allows(context, 'account_ids', 'a1'))
+
+    def test_legacy_lists_are_read(self):
+        scope = unpack_scope({'org_ids': None, 'tenant_ids': ['t1'], 'account_ids': None})
+        self.assertTrue(scope_allows({'scope': scope}, 'tenant_ids', 't1'))
+        self.assertFalse(scope_allows({'scope': scope}, 'tenant_ids', 't9'))
+
+    def test_digest_depends_on_scope_only(self):
+        first = unpack_scope(pack_scope({'org_ids': None, 'tenant_ids': ['t1', 't2'], 'account_ids': None}))
+        same = unpack_scope({'org_ids': None, 'tenant_ids': ['t2', 't1'], 'account_ids': None})
+        other = unpack_scope({'org_ids': None, 'tenant_ids': ['t1'], 'account_ids': None})
+        self.assertEqual(scope_digest(first), scope_digest(same))
+        self.assertNotEqual(scope_digest(first), scope_digest(other))
+        self.assertNotEqual(scope_digest(None), scope_digest(other))
+
+
+@override_settings(SESSION_REAPER_GRACE_MINUTES=5, SESSION_REAPER_PAUSE_MS=0)
+class SessionReaperTests(TestCase):
+
+    def setUp(self):
+        self.user = Users.objects.create_user('reaper@example.com', 'password123')
+
+    def _expired(self, minutes_ago):
+        session = _session(self.user)
+        UserSessions.objects.filter(pk=session.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+        return session
+
+    def _revocation(self, expires_in):
+        RevokedAccessTokens.objects.create(
+            session_id='s1', revoked_at=time.time(), expires_at=timezone.now() + timedelta(minutes=expires_in),
+        )
+
+    def test_only_dead_rows_are_deleted(self):
+        live = _session(self.user)
+        in_grace = self._expired(1)
+        self._expired(10)
+        _session(self.user, revoked=True)
+        self._revocation(-1)
+        self._revocation(5)
+
+        self.assertEqual(reap(), {'expired': 1, 'revoked': 1, 'token revocation': 1})
+        self.assertEqual(
+            set(UserSessions.objects.values_list('pk', flat=True)), {str(live.pk), str(in_grace.pk)},
+        )
+        self.assertEqual(RevokedAccessTokens.objects.count(), 1)
+
+    def test_dry_run_only_counts(self):
+        self._expired(10)
+        self.assertEqual(reap(dry_run=True), {'expired': 1, 'revoked': 0, 'token revocation': 0})
+        self.assertEqual(UserSessions.objects.count(), 1)
+
+    def test_batches_are_bounded(self):
+        for _ in range(3):
+            self._expired(10)
+        self.assertEqual(reap(batch_size=1, max_batches=2)['expired'], 2)
+        self.assertEqual(UserSessions.objects.count(), 1)
+
+    def test_command_reaps_everything(self):
+        for _ in range(3):
+            self._expired(10)
+        out = io.StringIO()
+        call_command('reap_sessions', '--all', '--batch-size', '1', stdout=out)
+        self.assertIn("Deleted 3 expired session row(s)", out.getvalue())
+        self.assertFalse(UserSessions.objects.exists())
+
+
+class SessionActivityTests(TestCase):
+
+    def setUp(self):
+        session_activity._pending.clear()
+        session_activity._last_seen.clear()
+        self.addCleanup(session_activity._pending.clear)
+        self.addCleanup(session_activity._last_seen.clear)
+        self.enterContext(mock.patch.object(session_activity, '_start'))
+        self.user = Users.objects.create_user('activity@example.com', 'password123')
+        self.session = _session(self.user)
+
+    def test_requests_are_written_in_one_flush(self):
+        session_activity.record(self.session.pk, '10.0.0.1')
+        session_activity.record(self.session.pk, None)
+        session_activity.record(self.session.pk, '10.0.0.2')
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.request_count, 0)
+        self.assertEqual(session_activity.with_pending(self.session)[1:], ('10.0.0.2', 3))
+
+        self.assertEqual(session_activity.flush(), 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.request_count, 3)
+        self.assertEqual(self.session.last_seen_ip, '10.0.0.2')
+        self.assertIsNotNone(self.session.last_seen_at)
+        self.assertEqual(session_activity.flush(), 0)
+
+    def test_failed_flush_keeps_activity(self):
+        session_activity.record(self.session.pk, '10.0.0.1')
+        with mock.patch.object(session_activity, '_write_rows', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            session_activity.flush()
+        session_activity.record(self.session.pk, None)
+        session_activity.flush()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.request_count, 2)
+        self.assertEqual(self.session.last_seen_ip, '10.0.0.1')
+
+    @override_settings(SESSION_IDLE_TIMEOUT_MINUTES=30)
+    def test_idle_timeout(self):
+        UserSessions.objects.filter(pk=self.session.pk).update(
+            created_at=timezone.now() - timedelta(hours=2), last_seen_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertTrue(session_activity.is_idle(UserSessions.objects.get(pk=self.session.pk)))
+        # Sessions built from token claims have these fields deferred
+        self.assertTrue(session_activity.is_idle(UserSessions.objects.only('id').get(pk=self.session.pk)))
+
+        session_activity.record(self.session.pk, None)
+        self.assertFalse(session_activity.is_idle(UserSessions.objects.only('id').get(pk=self.session.pk)))
+
+    def test_idle_timeout_disabled(self):
+        UserSessions.objects.filter(pk=self.session.pk).update(last_seen_at=timezone.now() - timedelta(days=30))
+        self.assertFalse(session_activity.is_idle(UserSessions.objects.get(pk=self.session.pk)))
@@ -1,5 +1,12 @@
+import hmac
 import secrets
-from django.contrib.auth.hashers import make_password, check_password
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.utils.crypto import salted_hmac
+
+# Stored token format: keyed digest, looked up by equality on the token column.
+# Anything else is a legacy PBKDF2 hash from make_password().
+DIGEST_PREFIX = "hmac_sha256$"
 
 
 def generate_token() -> str:
@@ -7,8 +14,51 @@ def generate_token() -> str:
 
 
 def hash_token(token: str) -> str:
-    return make_password(token)
+    """
+    Keyed HMAC-SHA256 digest of a token. Tokens are 512-bit random values, so a
+    slow password hash adds nothing; the key (TOKEN_DIGEST_KEY, default
+    SECRET_KEY) keeps a leaked table from being checked offline.
+    """
+    digest = salted_hmac(
+        "user_auth.tokens", token, secret=settings.TOKEN_DIGEST_KEY, algorithm="sha256"
+    ).hexdigest()
+    return DIGEST_PREFIX + digest
+
+
+def is_legacy_hash(stored_hashed_token) -> bool:
+    return bool(stored_hashed_token) and not stored_hashed_token.startswith(DIGEST_PREFIX)
 
 
 def verify_token(provided_token: str, stored_hashed_token: str) -> bool:
-    return check_password(provided_token, stored_hashed_token)
\ No newline at end of file
+    if not stored_hashed_token:
+        return False
+    if is_legacy_hash(stored_hashed_token):
+        return check_password(provided_token, stored_hashed_token)
+    return hmac.compare_digest(hash_token(provided_token), stored_hashed_token)
+
+
+def find_by_token(queryset, token, field="token", hint_field="token_hint", legacy_limit=None):
+    """
+    Row of queryset whose `field` stores `token`, or None.
+
+    One indexed equality lookup on the digest; rows still holding a legacy
+    PBKDF2 hash are only checked when that fails (narrowed by hint_field when
+    the table has one, else capped to the legacy_limit newest rows) and are
+    upgraded to the digest on match.
+    """
+    digest = hash_token(token)
+    row = queryset.filter(**{field: digest}).first()
+    if row is not None or legacy_limit == 0:
+        return row
+
+    legacy = queryset.filter(**{f"{field}__isnull": False}).exclude(**{f"{field}__startswith": DIGEST_PREFIX})
+    if hint_field:
+        legacy = legacy.filter(**{hint_field: token[:8]})
+    if legacy_limit is not None:
+        legacy = legacy.order_by('-created_at')[:legacy_limit]
+    for candidate in legacy:
+        if check_password(token, getattr(candidate, field)):
+            setattr(candidate, field, digest)
+            candidate.save(update_fields=[field])
+            return candidate
+    return None
@@ -15,10 +15,12 @@ from django.views import View
 from django.utils import timezone
 
 from user_auth.authentication import (
-    CookieTokenAuthentication, resolve_user_permissions, resolve_user_scope
+    CookieTokenAuthentication, resolve_user_access
 )
+from user_auth import access_tokens, operation_catalog
+from user_auth.operation_catalog import has_operation, has_operation_suffix
 from user_auth.models import Users, UserSessions, UserRoles, UserInvitations, Roles
-from user_auth.utils.auth_utils import generate_token, hash_token
+from user_auth.utils.auth_utils import generate_token, hash_token, find_by_token
 from user_auth.utils.cookie_utils import set_auth_cookies
 from user_auth.serializers import UserInvitationSerializer
 
@@ -46,8 +48,7 @@ def _auth(request, required_op=None):
         return None, None, _err("Authentication required.", 401)
     user, session = result
     if required_op:
-        perms = request.auth_context.get('permissions', [])
-        if required_op not in perms:
+        if not has_operation(request.auth_context, required_op):
             return None, None, _err(f"Permission denied. Requires: {required_op}", 403)
     return user, session, None
 
@@ -66,9 +67,8 @@ class InviteUserView(View):
             return err
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
 
-        can_invite = any(p.endswith(':users:write') for p in perms)
+        can_invite = has_operation_suffix(auth_ctx, ':users:write')
         if not can_invite:
             return _err("Permission denied. Requires users:write at some scope level.", 403)
 
@@ -106,7 +106,6 @@ class InviteUserView(View):
             scope_type=scope_type,
             scope_id=scope_id,
             token=hashed,
-            token_hint=token[:8],
             invited_by=inviter,
             expires_at=expires,
         )
@@ -153,20 +152,13 @@ class AcceptInviteView(View):
         if len(password) < 8:
             return _err("Password must be at least 8 characters.")
 
-        # Find invitation by token_hint for fast lookup
-        token_hint = token[:8]
-        candidates = UserInvitations.objects.filter(
-            token_hint=token_hint,
-            status='pending',
-            expires_at__gt=timezone.now()
-        ).select_related('role')
-
-        invitation = None
-        for c in candidates:
-            from user_auth.utils.auth_utils import verify_token
-            if verify_token(token, c.token):
-                invitation = c
-                break
+        invitation = find_by_token(
+            UserInvitations.objects.filter(
+                status='pending',
+                expires_at__gt=timezone.now()
+            ).select_related('role'),
+            token,
+        )
 
         if not invitation:
             return _err("Invalid, expired, or already used invitation token.", 400)
@@ -208,14 +200,13 @@ class AcceptInviteView(View):
             days=getattr(settings, 'REFRESH_TOKEN_LIFETIME_DAYS', 7)
         )
 
-        permissions_cache = resolve_user_permissions(user)
-        scope_cache = resolve_user_scope(user)
+        permissions, scope_cache = resolve_user_access(user)
+        permissions_cache = operation_catalog.pack(permissions)
 
         session = UserSessions.objects.create(
             id=str(uuid.uuid4()),
             user=user,
             token=hash_token(access_token),
-            token_hint=access_token[:8],
             refresh_token=hash_token(refresh_token),
             login_method='invitation',
             expires_at=expires_at,
@@ -245,7 +236,7 @@ class AcceptInviteView(View):
             }
         }, status=201)
 
-        set_auth_cookies(response, access_token, refresh_token)
+        set_auth_cookies(response, access_tokens.cookie_token(session, access_token), refresh_token)
         return response
 
 
@@ -258,8 +249,7 @@ class InvitationListView(View):
             return err
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
-        if not any(p.endswith(':users:write') for p in perms):
+        if not has_operation_suffix(auth_ctx, ':users:write'):
             return _err("Permission denied.", 403)
 
         status_filter = request.GET.get('status', 'pending')
@@ -287,8 +277,7 @@ class InvitationRevokeView(View):
             return err
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
-        if not any(p.endswith(':users:write') for p in perms):
+        if not has_operation_suffix(auth_ctx, ':users:write'):
             return _err("Permission denied.", 403)
 
         try:
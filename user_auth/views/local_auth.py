@@ -8,9 +8,11 @@ from datetime import timedelta
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from user_auth.models import Users, UserSessions
-from user_auth.utils.auth_utils import generate_token, hash_token, verify_token
+from user_auth import access_tokens, operation_catalog, session_activity, session_cache
+from user_auth.utils.auth_utils import generate_token, hash_token, find_by_token
 from user_auth.utils.cookie_utils import set_auth_cookies, clear_auth_cookies
-from user_auth.authentication import resolve_user_permissions, resolve_user_scope
+from user_auth.authentication import resolve_user_access
+from user_auth.session_reaper import session_reaper
 from django.http import JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_GET
@@ -40,6 +42,7 @@ def _get_user_roles_data(user):
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class LoginView(APIView):
     def post(self, request):
+        session_reaper.start()
         try:
             data = json.loads(request.body)
         except json.JSONDecodeError:
@@ -76,10 +79,15 @@ class LoginView(APIView):
             )
 
         # Revoke existing sessions
-        UserSessions.objects.filter(user=user).delete()
+        previous = UserSessions.objects.filter(user=user)
+        previous_ids = list(previous.values_list('id', flat=True))
+        previous.delete()
+        session_cache.bump_user_epoch(user.id)
+        access_tokens.revoke(previous_ids)
 
         access_token = generate_token()
-        refresh_token = generate_token() if remember_me else None
+        # Signed access tokens are short-lived, so the session always needs a refresh token
+        refresh_token = generate_token() if remember_me or access_tokens.enabled() else None
 
         hashed_access = hash_token(access_token)
         hashed_refresh = hash_token(refresh_token) if refresh_token else None
@@ -89,14 +97,13 @@ class LoginView(APIView):
         expires_at = timezone.now() + (refresh_lifetime if remember_me else access_lifetime)
 
         # Resolve and cache permissions + scope at login time
-        permissions_cache = resolve_user_permissions(user)
-        scope_cache = resolve_user_scope(user)
+        permissions, scope_cache = resolve_user_access(user)
+        permissions_cache = operation_catalog.pack(permissions)
 
-        UserSessions.objects.create(
+        session = UserSessions.objects.create(
             id=uuid.uuid4(),
             user=user,
             token=hashed_access,
-            token_hint=access_token[:8],
             refresh_token=hashed_refresh,
             login_method="local",
             expires_at=expires_at,
@@ -115,7 +122,7 @@ class LoginView(APIView):
         response_data = {
             "success": True,
             "message": "Login successful",
-            "expiresIn": f"{getattr(settings, 'ACCESS_TOKEN_LIFETIME_MINUTES', 60)}m",
+            "expiresIn": access_tokens.expires_in(),
             "user": {
                 "id": str(user.id),
                 "email": user.email,
@@ -128,7 +135,7 @@ class LoginView(APIView):
         }
 
         response = JsonResponse(response_data)
-        set_auth_cookies(response, access_token, refresh_token)
+        set_auth_cookies(response, access_tokens.cookie_token(session, access_token), refresh_token)
         response["Cache-Control"] = "no-store"
         return response
 
@@ -136,6 +143,7 @@ class LoginView(APIView):
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class RefreshTokenView(APIView):
     def post(self, request):
+        session_reaper.start()
         refresh_token = request.COOKIES.get("refresh_token")
         if not refresh_token:
             response = JsonResponse(
@@ -145,22 +153,17 @@ class RefreshTokenView(APIView):
             clear_auth_cookies(response)
             return response
 
-        # Use token_hint for fast lookup if refresh_token has a hint stored
-        # Fall back to full scan (refresh tokens don't currently store hints)
-        sessions = UserSessions.objects.filter(
-            refresh_token__isnull=False,
-            revoked=False,
-            expires_at__gt=timezone.now()
-        ).select_related('user')
-
-        valid_session = None
-        user = None
-
-        for session in sessions:
-            if session.refresh_token and verify_token(refresh_token, session.refresh_token):
-                valid_session = session
-                user = session.user
-                break
+        valid_session = find_by_token(
+            UserSessions.objects.filter(
+                revoked=False,
+                expires_at__gt=timezone.now()
+            ).select_related('user'),
+            refresh_token, field="refresh_token", hint_field=None,
+            legacy_limit=settings.LEGACY_REFRESH_TOKEN_SCAN_LIMIT,
+        )
+        if valid_session and session_activity.is_idle(valid_session):
+            valid_session = None
+        user = valid_session.user if valid_session else None
 
         if not valid_session:
             response = JsonResponse(
@@ -174,21 +177,24 @@ class RefreshTokenView(APIView):
         hashed_new_access = hash_token(new_access_token)
 
         # Refresh permissions cache on token refresh
-        permissions_cache = resolve_user_permissions(user)
-        scope_cache = resolve_user_scope(user)
+        permissions, scope_cache = resolve_user_access(user)
+        permissions_cache = operation_catalog.pack(permissions)
 
         valid_session.token = hashed_new_access
-        valid_session.token_hint = new_access_token[:8]
+        valid_session.token_hint = None
         valid_session.permissions_cache = permissions_cache
         valid_session.scope_cache = scope_cache
         valid_session.save(update_fields=["token", "token_hint", "permissions_cache", "scope_cache"])
+        session_activity.record(valid_session.pk, request.META.get('REMOTE_ADDR'))
+        # The previous access token stops working
+        session_cache.bump_user_epoch(user.id)
 
         roles = _get_user_roles_data(user)
 
         response = JsonResponse({
             "success": True,
             "message": "Access token refreshed successfully",
-            "expiresIn": f"{getattr(settings, 'ACCESS_TOKEN_LIFETIME_MINUTES', 60)}m",
+            "expiresIn": access_tokens.expires_in(),
             "user": {
                 "id": str(user.id),
                 "email": user.email,
@@ -199,7 +205,7 @@ class RefreshTokenView(APIView):
                 "roles": roles,
             },
         })
-        set_auth_cookies(response, new_access_token)
+        set_auth_cookies(response, access_tokens.cookie_token(valid_session, new_access_token))
         return response
 
 
@@ -210,26 +216,25 @@ class LogoutView(APIView):
         refresh_token = request.COOKIES.get("refresh_token")
 
         login_method = "local"
-        deleted = False
-
-        if access_token:
-            token_hint = access_token[:8]
-            sessions = UserSessions.objects.filter(token_hint=token_hint)
-            for session in sessions:
-                if verify_token(access_token, session.token):
-                    login_method = session.login_method or "local"
-                    session.delete()
-                    deleted = True
-                    break
-
-        if not deleted and refresh_token:
-            sessions = UserSessions.objects.filter(refresh_token__isnull=False)
-            for session in sessions:
-                if session.refresh_token and verify_token(refresh_token, session.refresh_token):
-                    login_method = session.login_method or "local"
-                    session.delete()
-                    deleted = True
-                    break
+
+        session = None
+        if access_token and access_tokens.looks_like_jwt(access_token):
+            claims = access_tokens.decode(access_token)
+            if claims:
+                session = UserSessions.objects.filter(pk=claims['sid']).first()
+        elif access_token:
+            session = find_by_token(UserSessions.objects.filter(revoked=False), access_token)
+        if session is None and refresh_token:
+            session = find_by_token(
+                UserSessions.objects.filter(revoked=False), refresh_token, field="refresh_token", hint_field=None,
+                legacy_limit=settings.LEGACY_REFRESH_TOKEN_SCAN_LIMIT,
+            )
+        if session is not None:
+            login_method = session.login_method or "local"
+            session_id = session.id
+            session.delete()
+            session_cache.bump_user_epoch(session.user_id)
+            access_tokens.revoke([session_id])
 
         is_sso = login_method == "saml"
         response_data = {
@@ -13,6 +13,7 @@ from django.http import JsonResponse
 from django.views import View
 
 from user_auth.authentication import CookieTokenAuthentication
+from user_auth.operation_catalog import has_operation
 from user_auth.models import Organizations
 from user_auth.serializers import OrganizationSerializer
 
@@ -40,8 +41,7 @@ def _auth(request, required_op=None):
         return None, None, _err("Authentication required.", 401)
     user, session = result
     if required_op:
-        perms = request.auth_context.get('permissions', [])
-        if required_op not in perms:
+        if not has_operation(request.auth_context, required_op):
             return None, None, _err(f"Permission denied. Requires: {required_op}", 403)
     return user, session, None
 
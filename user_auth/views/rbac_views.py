@@ -23,13 +23,19 @@ Role-Operation assignments:
 User-Role assignments:
   POST /api/auth/users/{id}/roles/         — assign role to user
   DEL  /api/auth/users/{id}/roles/{rid}/   — remove role from user
+
+Internal (engines):
+  GET  /api/internal/operation-catalog/    — operation keys by bit index
 """
 import json
 import logging
+from django.conf import settings
 from django.http import JsonResponse
 from django.views import View
 
 from user_auth.authentication import CookieTokenAuthentication
+from user_auth import operation_catalog, rbac_propagation, role_sets
+from user_auth.operation_catalog import has_operation, has_any_operation
 from user_auth.models import Roles, Operations, RoleOperations, UserRoles, Users
 from user_auth.serializers import (
     RoleSerializer, RoleDetailSerializer,
@@ -61,8 +67,7 @@ def _auth(request, required_op=None):
         return None, None, _err("Authentication required.", 401)
     user, session = result
     if required_op:
-        perms = request.auth_context.get('permissions', [])
-        if required_op not in perms:
+        if not has_operation(request.auth_context, required_op):
             return None, None, _err(f"Permission denied. Requires: {required_op}", 403)
     return user, session, None
 
@@ -154,6 +159,8 @@ class RoleDetailView(View):
                 setattr(role, field, body[field])
         role.updated_by = user
         role.save()
+        if 'level' in body or 'scope_level' in body:
+            rbac_propagation.roles_changed([role.id], grants=False, scope=True)
 
         return _ok(RoleDetailSerializer(role).data, "Role updated successfully")
 
@@ -169,7 +176,10 @@ class RoleDetailView(View):
             return _err("System roles cannot be deleted.", 400)
 
         role_name = role.name
+        user_ids = list(UserRoles.objects.filter(role=role).values_list('user_id', flat=True))
+        role_sets.roles_changed([role.id])
         role.delete()
+        rbac_propagation.users_changed(user_ids)
         return _ok(None, f"Role '{role_name}' deleted successfully")
 
 
@@ -226,9 +236,10 @@ class RoleOperationsView(View):
             _, created = RoleOperations.objects.get_or_create(role=role, operation=op)
             if created:
                 added += 1
+        sessions_updated = rbac_propagation.roles_changed([role.id]) if added else 0
 
         return _ok(
-            {"added": added, "total_in_role": role.role_operations.count()},
+            {"added": added, "total_in_role": role.role_operations.count(), "sessions_updated": sessions_updated},
             f"{added} operation(s) assigned to role '{role.name}'"
         )
 
@@ -259,9 +270,10 @@ class RoleOperationsView(View):
             deleted_count += RoleOperations.objects.filter(
                 role=role, operation__key__in=op_keys
             ).delete()[0]
+        sessions_updated = rbac_propagation.roles_changed([role.id]) if deleted_count else 0
 
         return _ok(
-            {"removed": deleted_count},
+            {"removed": deleted_count, "sessions_updated": sessions_updated},
             f"{deleted_count} operation(s) removed from role '{role.name}'"
         )
 
@@ -305,6 +317,7 @@ class OperationListCreateView(View):
             description=body.get('description', ''),
             scope_type=body['scope_type'],
         )
+        operation_catalog.invalidate()
         return _ok(OperationsSerializer(op).data, "Operation created successfully", status=201)
 
 
@@ -351,9 +364,37 @@ class OperationDetailView(View):
         if not op:
             return _err("Operation not found.", 404)
         op.delete()
+        operation_catalog.invalidate()
+        role_sets.invalidate_all()
         return _ok(None, "Operation deleted successfully")
 
 
+class OperationCatalogView(View):
+    """
+    GET /api/internal/operation-catalog/?version= — keys of a compiled
+    operation catalog in bit order, for engines decoding permissions_packed
+    in X-Auth-Context. The keys are operation names, not secrets; when
+    ENGINE_WEBHOOK_SECRET is set the request must be signed like
+    /api/internal/events/, with the query string as the signed body.
+    """
+
+    def get(self, request):
+        from onboarding_management import events
+
+        if settings.ENGINE_WEBHOOK_SECRET and not events.verify_signature(
+            request.META.get('QUERY_STRING', '').encode(),
+            request.headers.get(events.TIMESTAMP_HEADER, ""),
+            request.headers.get(events.SIGNATURE_HEADER, ""),
+        ):
+            return _err("Invalid or expired signature", 401)
+
+        version = request.GET.get('version')
+        catalog = operation_catalog.by_version(version) if version else operation_catalog.current()
+        if catalog is None:
+            return _err("Unknown catalog version.", 404)
+        return _ok({"version": catalog.version, "keys": list(catalog.keys)}, "Operation catalog fetched successfully")
+
+
 # ─── USER-ROLE ASSIGNMENTS ────────────────────────────────────────────────────
 
 class UserRoleAssignView(View):
@@ -368,8 +409,7 @@ class UserRoleAssignView(View):
             return err
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
-        if not any(p in perms for p in ['platform:users:write', 'org:users:write', 'tenant:users:write']):
+        if not has_any_operation(auth_ctx, 'platform:users:write', 'org:users:write', 'tenant:users:write'):
             return _err("Permission denied.", 403)
 
         try:
@@ -401,6 +441,7 @@ class UserRoleAssignView(View):
 
         if not created:
             return _ok(None, "User already has this role.")
+        rbac_propagation.users_changed([target_user.id])
 
         return _ok(
             {"user_id": user_id, "role_id": str(role.id), "role_name": role.name, "tenant_id": tenant_id},
@@ -418,8 +459,7 @@ class UserRoleRemoveView(View):
             return err
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
-        if not any(p in perms for p in ['platform:users:write', 'org:users:write', 'tenant:users:write']):
+        if not has_any_operation(auth_ctx, 'platform:users:write', 'org:users:write', 'tenant:users:write'):
             return _err("Permission denied.", 403)
 
         deleted, _ = UserRoles.objects.filter(
@@ -429,5 +469,6 @@ class UserRoleRemoveView(View):
 
         if deleted == 0:
             return _err("User role assignment not found.", 404)
+        rbac_propagation.users_changed([user_id])
 
         return _ok(None, "Role removed from user successfully")
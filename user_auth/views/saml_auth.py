@@ -5,6 +5,8 @@ from django.http import HttpResponseRedirect
 from rest_framework.views import APIView
 from rest_framework.authentication import SessionAuthentication
 from user_auth.models import UserSessions
+from user_auth import access_tokens, operation_catalog, session_cache
+from user_auth.authentication import resolve_user_access
 from user_auth.utils.auth_utils import generate_token, hash_token
 from user_auth.utils.cookie_utils import set_auth_cookies
 
@@ -26,7 +28,11 @@ class SamlSuccessBridgeView(APIView):
         user_obj.last_login = timezone.now()
         user_obj.save(update_fields=['sso_provider', 'status', 'last_login'])
 
-        UserSessions.objects.filter(user=user_obj).delete()
+        previous = UserSessions.objects.filter(user=user_obj)
+        previous_ids = list(previous.values_list('id', flat=True))
+        previous.delete()
+        session_cache.bump_user_epoch(user_obj.id)
+        access_tokens.revoke(previous_ids)
 
         access_token = generate_token()
         refresh_token = generate_token()
@@ -37,7 +43,10 @@ class SamlSuccessBridgeView(APIView):
             minutes=getattr(settings, 'ACCESS_TOKEN_LIFETIME_MINUTES', 60)
         )
 
-        UserSessions.objects.create(
+        # Resolve and cache permissions + scope at login time
+        permissions, scope_cache = resolve_user_access(user_obj)
+
+        session = UserSessions.objects.create(
             id=uuid.uuid4(),
             user=user_obj,
             token=hashed_access,
@@ -46,11 +55,13 @@ class SamlSuccessBridgeView(APIView):
             expires_at=expires_at,
             ip_address=request.META.get('REMOTE_ADDR', ''),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            permissions_cache=operation_catalog.pack(permissions),
+            scope_cache=scope_cache,
         )
 
 
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
         response = HttpResponseRedirect(f"{frontend_url}/dashboard")
-        set_auth_cookies(response, access_token, refresh_token)
+        set_auth_cookies(response, access_tokens.cookie_token(session, access_token), refresh_token)
 
         return response
\ No newline at end of file
@@ -19,12 +19,15 @@ from django.views import View
 from django.utils import timezone
 
 from user_auth.authentication import CookieTokenAuthentication
+from user_auth import access_tokens, session_activity, session_cache
 from user_auth.models import Users, UserSessions, UserRoles
 from user_auth.serializers import (
     UserPublicSerializer, UserCreateSerializer, UserUpdateSerializer,
     ChangePasswordSerializer
 )
 from user_auth.decorators import authenticated, has_operations
+from user_auth.operation_catalog import has_operation, has_any_operation
+from user_auth.scopes import scope_as_lists
 
 logger = logging.getLogger(__name__)
 
@@ -80,8 +83,8 @@ class MeView(View):
             "last_login": user.last_login.isoformat() if user.last_login else None,
             "created_at": user.created_at.isoformat(),
             "roles": roles_data,
-            "permissions": request.auth_context.get('permissions', []),
-            "scope": request.auth_context.get('scope', {}),
+            "permissions": list(request.auth_context.get('permissions', [])),
+            "scope": scope_as_lists(request.auth_context.get('scope')),
         }
         return _ok(data, "Profile fetched successfully")
 
@@ -131,7 +134,11 @@ class ChangePasswordView(View):
         user.save(update_fields=['password'])
 
         # Revoke all other sessions (force re-login)
-        UserSessions.objects.filter(user=user).exclude(id=session.id).delete()
+        others = UserSessions.objects.filter(user=user).exclude(id=session.id)
+        other_ids = list(others.values_list('id', flat=True))
+        others.delete()
+        session_cache.bump_user_epoch(user.id)
+        access_tokens.revoke(other_ids)
 
         return _ok(None, "Password changed successfully. Other sessions have been revoked.")
 
@@ -149,10 +156,9 @@ class UserListCreateView(View):
         user, _ = result
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
 
         # Must have platform or org users:read
-        if not any(p in perms for p in ['platform:users:read', 'org:users:read']):
+        if not has_any_operation(auth_ctx, 'platform:users:read', 'org:users:read'):
             return _err("Permission denied.", 403)
 
         page = int(request.GET.get('page', 1))
@@ -189,7 +195,7 @@ class UserListCreateView(View):
             return _err("Authentication required.", 401)
 
         auth_ctx = request.auth_context
-        if 'platform:users:write' not in auth_ctx.get('permissions', []):
+        if not has_operation(auth_ctx, 'platform:users:write'):
             return _err("Permission denied. Requires platform:users:write", 403)
 
         try:
@@ -232,11 +238,10 @@ class UserDetailView(View):
         requester, _ = result
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
 
         # Can view self or with users:read permission
-        if str(requester.id) != user_id and not any(
-            p in perms for p in ['platform:users:read', 'org:users:read']
+        if str(requester.id) != user_id and not has_any_operation(
+            auth_ctx, 'platform:users:read', 'org:users:read'
         ):
             return _err("Permission denied.", 403)
 
@@ -265,10 +270,9 @@ class UserDetailView(View):
         requester, _ = result
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
 
         is_self = str(requester.id) == user_id
-        can_manage = any(p in perms for p in ['platform:users:write', 'org:users:write'])
+        can_manage = has_any_operation(auth_ctx, 'platform:users:write', 'org:users:write')
 
         if not is_self and not can_manage:
             return _err("Permission denied.", 403)
@@ -303,7 +307,7 @@ class UserDetailView(View):
             return _err("Authentication required.", 401)
 
         auth_ctx = request.auth_context
-        if 'platform:users:write' not in auth_ctx.get('permissions', []):
+        if not has_operation(auth_ctx, 'platform:users:write'):
             return _err("Permission denied. Requires platform:users:write", 403)
 
         target = self._get_user_or_404(user_id)
@@ -313,7 +317,11 @@ class UserDetailView(View):
         # Soft delete — deactivate
         target.status = 'inactive'
         target.save(update_fields=['status'])
-        UserSessions.objects.filter(user=target).delete()
+        sessions = UserSessions.objects.filter(user=target)
+        session_ids = list(sessions.values_list('id', flat=True))
+        sessions.delete()
+        session_cache.bump_user_epoch(target.id)
+        access_tokens.revoke(session_ids)
 
         return _ok(None, "User deactivated successfully.")
 
@@ -328,10 +336,9 @@ class UserRolesView(View):
         requester, _ = result
 
         auth_ctx = request.auth_context
-        perms = auth_ctx.get('permissions', [])
 
-        if str(requester.id) != user_id and not any(
-            p in perms for p in ['platform:users:read', 'org:users:read', 'tenant:users:read']
+        if str(requester.id) != user_id and not has_any_operation(
+            auth_ctx, 'platform:users:read', 'org:users:read', 'tenant:users:read'
         ):
             return _err("Permission denied.", 403)
 
@@ -370,6 +377,7 @@ class SessionListView(View):
 
         data = []
         for s in sessions:
+            last_seen_at, last_seen_ip, request_count = session_activity.with_pending(s)
             data.append({
                 "id": str(s.id),
                 "ip_address": s.ip_address,
@@ -377,6 +385,9 @@ class SessionListView(View):
                 "login_method": s.login_method,
                 "created_at": s.created_at.isoformat(),
                 "expires_at": s.expires_at.isoformat(),
+                "last_seen_at": last_seen_at.isoformat() if last_seen_at else None,
+                "last_seen_ip": last_seen_ip,
+                "request_count": request_count,
                 "is_current": str(s.id) == str(current_session.id),
                 "location": {
                     "country": s.location_country,
@@ -403,4 +414,6 @@ class SessionRevokeView(View):
             return _err("Session not found.", 404)
 
         session.delete()
+        session_cache.bump_user_epoch(user.id)
+        access_tokens.revoke([session_id])
         return _ok(None, "Session revoked successfully.")
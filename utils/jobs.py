@@ -0,0 +1,115 @@
+"""
+Background job helpers shared by the gateway's long-running endpoints.
+
+JobStore keeps job state (status, progress, result chunks) in the Django cache,
+so a status poll can be answered by any worker. That only holds when the cache
+backend is shared: with a per-process one (LocMemCache, the default) a job is
+invisible to every other worker and replica, so `manage.py check --deploy`
+fails until CACHE_BACKEND points at a shared backend such as RedisCache.
+BoundedExecutor runs the work in a fixed-size thread pool with a cap on
+queued jobs, so a burst of requests can't pile up unbounded work in memory.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from user_auth.session_cache import PROCESS_LOCAL_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_job_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [checks.Error(
+        f"Background jobs are stored in {backend}, which other workers and replicas can't see.",
+        hint="Set CACHE_BACKEND to a shared backend, e.g. django.core.cache.backends.redis.RedisCache "
+             "with CACHE_LOCATION=redis://<host>:6379/0.",
+        id='jobs.E001',
+    )]
+
+
+class JobStore:
+    """
+    Cache-backed job records, namespaced per feature (e.g. 'hunt', 'intel-ingest').
+    Only the worker running a job writes to it, so read-modify-write is safe.
+    """
+
+    def __init__(self, namespace, ttl=3600):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, job_id, suffix=''):
+        return f"jobs:{self.namespace}:{job_id}{suffix}"
+
+    def create(self, **fields) -> dict:
+        now = timezone.now().isoformat()
+        job = {
+            'job_id': str(uuid.uuid4()),
+            'status': 'queued',
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+        }
+        job.update(fields)
+        cache.set(self._key(job['job_id']), job, self.ttl)
+        return job
+
+    def get(self, job_id):
+        return cache.get(self._key(job_id))
+
+    def update(self, job_id, **fields):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        job['updated_at'] = timezone.now().isoformat()
+        cache.set(self._key(job_id), job, self.ttl)
+        return job
+
+    def set_chunk(self, job_id, index, rows):
+        cache.set(self._key(job_id, f":chunk:{index}"), rows, self.ttl)
+
+    def get_chunk(self, job_id, index):
+        return cache.get(self._key(job_id, f":chunk:{index}"))
+
+
+class BoundedExecutor:
+    """
+    Thread pool that refuses new work once max_pending jobs are queued or running.
+    Each task gets a fresh DB connection state, since pool threads outlive requests.
+    """
+
+    def __init__(self, max_workers, max_pending, name):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.name = name
+
+    def submit(self, fn, *args, **kwargs) -> bool:
+        if not self._slots.acquire(blocking=False):
+            logger.warning("%s executor is full, rejecting job", self.name)
+            return False
+
+        def run():
+            close_old_connections()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("%s job failed", self.name)
+            finally:
+                close_old_connections()
+                self._slots.release()
+
+        self._pool.submit(run)
+        return True